@@ -0,0 +1,98 @@
+"""
+Allocation benchmark: barcodes/sec reserved by concurrent asyncio tasks, one
+`allocate_barcodes` call per order versus one `allocate_barcodes_bulk` call per
+batch of orders, for every storage.
+
+Usage:
+    poetry run python benchmarks/bench_allocation.py --barcodes 1000000 --tasks 64
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from vouchers_cli.compact_storage import CompactOrderStorage
+from vouchers_cli.numpy_storage import NumpyOrderStorage
+from vouchers_cli.storage import OrderStorage
+
+BATCH_SIZE = 1_000  # Requests per allocate_barcodes_bulk call
+PER_ORDER = 2  # Barcodes reserved per order
+
+
+async def fill(storage: OrderStorage, barcodes: int) -> None:
+    """
+    Store one order per `PER_ORDER` barcodes and `barcodes` unused barcodes.
+    """
+    await storage.store_orders_bulk(
+        (order_id, order_id % 1_000 + 1) for order_id in range(barcodes // PER_ORDER)
+    )
+    await storage.store_barcode_columns(
+        [str(10_000_000_000 + index) for index in range(barcodes)], [None] * barcodes
+    )
+    await storage.get_unused_barcodes()  # Let lazy storages settle first
+
+
+async def allocate(
+    storage: OrderStorage, barcodes: int, tasks: int, bulk: bool
+) -> float:
+    """
+    Reserve every unused barcode from `tasks` concurrent tasks.
+
+    :return: The elapsed time in seconds.
+    """
+    orders = list(range(barcodes // PER_ORDER))
+
+    async def worker(worker_orders: list[int]) -> None:
+        if not bulk:
+            for order_id in worker_orders:
+                await storage.allocate_barcodes(order_id, PER_ORDER)
+            return
+        for start in range(0, len(worker_orders), BATCH_SIZE):
+            await storage.allocate_barcodes_bulk(
+                [
+                    (order_id, PER_ORDER)
+                    for order_id in worker_orders[start : start + BATCH_SIZE]
+                ]
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(orders[index::tasks]) for index in range(tasks)))
+    return time.perf_counter() - start
+
+
+async def run(
+    storage_class: type[OrderStorage], barcodes: int, tasks: int, bulk: bool
+) -> float:
+    storage = storage_class(logging.getLogger("bench_allocation"))
+    await fill(storage, barcodes)
+    elapsed = await allocate(storage, barcodes, tasks, bulk)
+    assert not await storage.get_unused_barcodes()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--barcodes", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--tasks", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.getLogger("bench_allocation").setLevel(logging.CRITICAL)
+
+    for barcodes in args.barcodes:
+        for name, storage_class in (
+            ("memory", OrderStorage),
+            ("compact", CompactOrderStorage),
+            ("numpy", NumpyOrderStorage),
+        ):
+            for bulk in (False, True):
+                elapsed = asyncio.run(run(storage_class, barcodes, args.tasks, bulk))
+                print(
+                    f"{barcodes:>12,} barcodes | {name:>7} | "
+                    f"{'bulk' if bulk else 'single':>6} | "
+                    f"{barcodes / elapsed:12,.0f} barcodes/s"
+                )
+
+
+if __name__ == "__main__":
+    main()
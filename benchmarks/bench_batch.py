@@ -0,0 +1,84 @@
+"""
+Batch mode benchmark: wall-clock time of processing many file pairs with one
+CLI invocation per pair versus one `--batch` invocation over a manifest.
+
+Usage:
+    poetry run python benchmarks/bench_batch.py --jobs 20 --rows 10000 100000 \\
+        --batch-workers 1 4
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from datagen import DatasetSpec, generate_dataset
+
+
+def cli(*arguments: str | Path) -> float:
+    """
+    Run the CLI in a new interpreter, discarding its output, and return the time.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "from vouchers_cli.main import entry; entry()"]
+        + [str(argument) for argument in arguments],
+        stdout=subprocess.DEVNULL,
+        check=False,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--batch-workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            # Every job gets its own pair, as partners send different files
+            manifest_path = Path(tmp) / "manifest.csv"
+            lines = ["orders_file,barcodes_file,output_dir\n"]
+            for job in range(args.jobs):
+                orders, barcodes = generate_dataset(
+                    Path(tmp) / f"input-{job}", DatasetSpec(rows=rows, seed=job)
+                )
+                lines.append(f"{orders},{barcodes},output-{job}\n")
+            manifest_path.write_text("".join(lines))
+            label = f"{args.jobs} jobs x {rows:>9,} rows"
+
+            seconds = sum(
+                cli(
+                    "--orders-file",
+                    Path(tmp) / f"input-{job}" / "orders.csv",
+                    "--barcodes-file",
+                    Path(tmp) / f"input-{job}" / "barcodes.csv",
+                    "--output-dir",
+                    Path(tmp) / f"single-{job}",
+                    "--cache-dir",
+                    Path(tmp) / "cache-single",
+                )
+                for job in range(args.jobs)
+            )
+            print(f"{label} | one invocation per job | {seconds:8.3f}s")
+
+            for workers in args.batch_workers:
+                seconds = cli(
+                    "--batch",
+                    manifest_path,
+                    "--batch-workers",
+                    str(workers),
+                    "--cache-dir",
+                    Path(tmp) / f"cache-batch-{workers}",
+                )
+                print(f"{label} | --batch-workers {workers:<6} | {seconds:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compressed input benchmark: time of reading a gzip, zstd or bz2 compressed
+barcodes file by decompressing it to disk first and streaming the plain file,
+versus streaming it through `AsyncCSVReader`'s decompression directly.
+
+Usage:
+    poetry run python benchmarks/bench_compressed_input.py --rows 1000000 5000000
+"""
+
+import argparse
+import asyncio
+import bz2
+import gzip
+import logging
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import zstandard
+from datagen import DatasetSpec, generate_dataset
+
+from vouchers_cli.async_reader import (
+    DEFAULT_CHUNK_SIZE,
+    AsyncCSVReader,
+    open_decompressed,
+)
+from vouchers_cli.options import COMPRESSION_SUFFIXES, Compression
+
+
+def compress(file_path: Path, compressed_path: Path, compression: Compression) -> None:
+    """
+    Write a compressed copy of a file, streaming it in blocks.
+    """
+    with open(file_path, "rb") as source:
+        if compression == Compression.GZIP:
+            with gzip.open(compressed_path, "wb") as target:
+                shutil.copyfileobj(source, target)
+        elif compression == Compression.BZ2:
+            with bz2.open(compressed_path, "wb") as target:
+                shutil.copyfileobj(source, target)
+        else:
+            with zstandard.ZstdCompressor().stream_writer(
+                open(compressed_path, "wb")
+            ) as target:
+                shutil.copyfileobj(source, target)
+
+
+def decompress(
+    compressed_path: Path, file_path: Path, compression: Compression
+) -> None:
+    """
+    Write the decompressed content of a file to disk, streaming it in blocks.
+    """
+    source = open_decompressed(compressed_path, compression)
+    try:
+        with open(file_path, "wb") as target:
+            while block := source.read(DEFAULT_CHUNK_SIZE):
+                target.write(block)
+    finally:
+        source.close()
+
+
+async def scan(reader: AsyncCSVReader, file_path: Path) -> int:
+    """
+    Stream every barcode batch and return the number of rows read.
+    """
+    return sum([len(barcodes) async for barcodes, _ in reader.iter_barcodes(file_path)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--pipeline-depth", type=int, default=0)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_compressed_input")
+    logger.setLevel(logging.CRITICAL)
+    reader = AsyncCSVReader(logger, pipeline_depth=args.pipeline_depth)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            _, barcodes = generate_dataset(Path(tmp), DatasetSpec(rows=rows))
+            size = barcodes.stat().st_size
+            for suffix, compression in COMPRESSION_SUFFIXES.items():
+                compressed = barcodes.with_name(f"barcodes.csv{suffix}")
+                compress(barcodes, compressed, compression)
+
+                # Baseline: decompress to a plain file, then read that
+                start = time.perf_counter()
+                plain = Path(tmp) / "decompressed.csv"
+                decompress(compressed, plain, compression)
+                read = asyncio.run(scan(reader, plain))
+                to_disk = time.perf_counter() - start
+                plain.unlink()
+                assert read > 0
+
+                start = time.perf_counter()
+                assert asyncio.run(scan(reader, compressed)) == read
+                streamed = time.perf_counter() - start
+
+                print(
+                    f"{rows:>12,} rows ({size / 2**20:,.0f} MiB, "
+                    f"{compressed.stat().st_size / 2**20:,.1f} MiB {compression:<4}) | "
+                    f"decompress to disk {to_disk:7.2f}s | streamed {streamed:7.2f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
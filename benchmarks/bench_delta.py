@@ -0,0 +1,64 @@
+"""
+Delta mode benchmark: end-to-end run time (load and write) of a full run
+versus a delta run after 1% more barcodes were appended to the input.
+
+Usage:
+    poetry run python benchmarks/bench_delta.py --rows 1000000 10000000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench_ingestion import generate_files
+
+from vouchers_cli.extractor import VouchersExtractor
+from vouchers_cli.schemas import ExtractorConfig
+
+
+def run(config: ExtractorConfig, logger: logging.Logger) -> float:
+    """
+    Run the extractor once, discarding its stdout output, and return the time.
+    """
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        asyncio.run(VouchersExtractor.create(config, logger).run())
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_delta")
+    logger.setLevel(logging.CRITICAL)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders_path, barcodes_path = generate_files(Path(tmp), rows)
+            full = ExtractorConfig(
+                orders_file_path=orders_path,
+                barcodes_file_path=barcodes_path,
+                output_dir=Path(tmp) / "output",
+            )
+            delta = full.model_copy(update={"delta_state": Path(tmp) / "state"})
+            run(delta, logger)  # Record the state of the current input
+
+            with open(barcodes_path, "a", encoding="utf-8") as file:
+                file.writelines(
+                    f"{20_000_000_000 + index},{index % rows + 1}\n"
+                    for index in range(rows // 100)
+                )
+
+            for name, config in (("full", full), ("delta", delta)):
+                print(f"{rows:>12,} rows +1% | {name:>5} | {run(config, logger):8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+External sort benchmark: end-to-end run time and peak RSS of the CLI with the
+in-memory storage versus `--storage external` under several memory limits, each
+in a fresh process.
+
+Usage:
+    poetry run python benchmarks/bench_external.py --rows 1000000 --memory-limit 16 64
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_ingestion import generate_files
+
+# Runs the extractor once and prints its run time and peak RSS as JSON
+CHILD = """
+import asyncio, json, logging, resource, sys, time
+from pathlib import Path
+from vouchers_cli.extractor import VouchersExtractor
+from vouchers_cli.schemas import ExtractorConfig
+
+orders, barcodes, output, storage, memory_limit = sys.argv[1:]
+config = ExtractorConfig(
+    orders_file_path=Path(orders),
+    barcodes_file_path=Path(barcodes),
+    output_dir=Path(output),
+    storage=storage,
+    memory_limit=int(memory_limit),
+)
+logger = logging.getLogger("bench_external")
+logger.setLevel(logging.CRITICAL)
+start = time.perf_counter()
+asyncio.run(VouchersExtractor.create(config, logger).run())
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}), file=sys.stderr)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--memory-limit", type=int, nargs="+", default=[16, 64])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders_path, barcodes_path = generate_files(Path(tmp), rows)
+            runs = [("memory", 0)]
+            runs += [("external", limit) for limit in args.memory_limit]
+            for storage, memory_limit in runs:
+                output = Path(tmp) / f"{storage}-{memory_limit}"
+                output.mkdir()
+                result = subprocess.run(
+                    [
+                        sys.executable,
+                        "-c",
+                        CHILD,
+                        str(orders_path),
+                        str(barcodes_path),
+                        str(output),
+                        storage,
+                        str(memory_limit or 1),
+                    ],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    check=True,
+                    text=True,
+                )
+                stats = json.loads(result.stderr.splitlines()[-1])
+                limit = f"{memory_limit} MB" if memory_limit else "-"
+                print(
+                    f"{rows:>12,} rows | {storage:>8} | limit {limit:>7} | "
+                    f"{stats['seconds']:8.2f}s | peak {stats['peak_mb']:8.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Ingestion benchmark: rows/sec of the per-row `store_order`/`store_barcode` path
+versus the batched `store_orders_bulk`/`store_barcodes_bulk` path.
+
+Usage:
+    poetry run python benchmarks/bench_ingestion.py --rows 1000000 10000000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.repository import Repository
+from vouchers_cli.storage import OrderStorage
+
+
+def generate_files(directory: Path, rows: int, seed: int = 42) -> tuple[Path, Path]:
+    """
+    Write synthetic orders/barcodes CSVs with `rows` rows each.
+    Roughly 10% of the barcodes are unused.
+    """
+    rng = random.Random(seed)
+    orders_path = directory / "orders.csv"
+    barcodes_path = directory / "barcodes.csv"
+    orders = max(rows, 1)
+
+    with open(orders_path, "w", encoding="utf-8") as file:
+        file.write("order_id,customer_id\n")
+        file.writelines(
+            f"{order_id},{rng.randrange(orders // 10 + 1)}\n"
+            for order_id in range(1, orders + 1)
+        )
+
+    with open(barcodes_path, "w", encoding="utf-8") as file:
+        file.write("barcode,order_id\n")
+        file.writelines(
+            f"{10_000_000_000 + index},"
+            f"{'' if rng.random() < 0.1 else rng.randrange(1, orders + 1)}\n"
+            for index in range(rows)
+        )
+
+    return orders_path, barcodes_path
+
+
+async def load_per_row(
+    orders_path: Path, barcodes_path: Path, logger: logging.Logger
+) -> None:
+    """
+    Reproduce the original ingestion path: one awaited store call per row.
+    """
+    reader = AsyncCSVReader(logger)
+    storage = OrderStorage(logger)
+    async for orders in reader.iter_batches(orders_path):
+        for order_id, customer_id in orders:
+            await storage.store_order(int(order_id), int(customer_id))
+    async for barcodes in reader.iter_batches(barcodes_path):
+        for barcode, order_id in barcodes:
+            await storage.store_barcode(barcode, order_id)
+
+
+async def load_bulk(
+    orders_path: Path, barcodes_path: Path, logger: logging.Logger
+) -> None:
+    """
+    Current ingestion path through `Repository._load_data`.
+    """
+    repository = Repository(
+        orders_path,
+        barcodes_path,
+        logger,
+        AsyncCSVReader(logger),
+        OrderStorage(logger),
+    )
+    await repository._load_data()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_ingestion")
+    logger.setLevel(logging.CRITICAL)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders_path, barcodes_path = generate_files(Path(tmp), rows)
+            for name, loader in (("per-row", load_per_row), ("bulk", load_bulk)):
+                start = time.perf_counter()
+                asyncio.run(loader(orders_path, barcodes_path, logger))
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{rows:>12,} rows x2 | {name:<8} | {elapsed:8.2f}s | "
+                    f"{2 * rows / elapsed:>12,.0f} rows/sec"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Join benchmark: seconds to join barcodes to orders and group them into vouchers
+with the per-row `OrderStorage` versus the vectorized `NumpyOrderStorage`.
+
+Usage:
+    poetry run python benchmarks/bench_join.py --barcodes 1000000 10000000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+from vouchers_cli.numpy_storage import NumpyOrderStorage
+from vouchers_cli.storage import OrderStorage
+
+BATCH_SIZE = 10_000
+
+
+def generate_columns(
+    barcodes: int, seed: int = 42
+) -> tuple[list[tuple[int, int]], list[tuple[list[str], list[int | None]]]]:
+    """
+    Build synthetic orders and barcode column batches; roughly 10% of the
+    barcodes are unused and 1% are duplicates.
+    """
+    rng = random.Random(seed)
+    orders = barcodes // 3 + 1
+    order_rows = [
+        (order_id, rng.randrange(orders // 10 + 1) + 1)
+        for order_id in range(1, orders + 1)
+    ]
+    batches = []
+    for start in range(0, barcodes, BATCH_SIZE):
+        indexes = range(start, min(start + BATCH_SIZE, barcodes))
+        # Every 100th barcode repeats a random earlier or later one
+        codes = [
+            rng.randrange(barcodes) if index % 100 == 0 else index for index in indexes
+        ]
+        batches.append(
+            (
+                [str(10_000_000_000 + code) for code in codes],
+                [
+                    None if rng.random() < 0.1 else rng.randrange(1, orders + 1)
+                    for _ in indexes
+                ],
+            )
+        )
+    return order_rows, batches
+
+
+async def join(
+    storage: OrderStorage,
+    orders: list[tuple[int, int]],
+    batches: list[tuple[list[str], list[int | None]]],
+) -> int:
+    """
+    Store the orders and barcode batches, then read every voucher back.
+    """
+    await storage.store_orders_bulk(orders)
+    for barcodes, order_ids in batches:
+        await storage.store_barcode_columns(barcodes, order_ids)
+    await storage.get_unused_barcodes()
+    return sum([1 async for _ in storage.iter_vouchers()])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--barcodes", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_join")
+    logger.setLevel(logging.CRITICAL)
+
+    for barcodes in args.barcodes:
+        orders, batches = generate_columns(barcodes)
+        for name, storage_class in (
+            ("memory", OrderStorage),
+            ("numpy", NumpyOrderStorage),
+        ):
+            start = time.perf_counter()
+            vouchers = asyncio.run(join(storage_class(logger), orders, batches))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{barcodes:>12,} barcodes | {name:<6} | {elapsed:8.2f}s | "
+                f"{barcodes / elapsed:>12,.0f} barcodes/sec | {vouchers:,} vouchers"
+            )
+
+
+if __name__ == "__main__":
+    main()
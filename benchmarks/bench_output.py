@@ -0,0 +1,77 @@
+"""
+Output benchmark: vouchers/sec of the `Voucher` named-tuple fast path versus the
+opt-in `VoucherSchema` validation path (`--validate-output`), measured through
+`FileWriter` serialization.
+
+Usage:
+    poetry run python benchmarks/bench_output.py --vouchers 1000000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.async_writer import FileWriter
+from vouchers_cli.extractor import VoucherStream
+from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import OutputSchema
+from vouchers_cli.storage import OrderStorage
+
+
+async def serialize(vouchers: int, validate: bool, logger: logging.Logger) -> float:
+    """
+    Serialize `vouchers` synthetic vouchers (three barcodes each) and return the
+    elapsed time in seconds.
+    """
+    storage = OrderStorage(logger)
+    await storage.store_orders_bulk(
+        (order_id, order_id % 1000) for order_id in range(1, vouchers + 1)
+    )
+    for order_id in range(1, vouchers + 1):
+        storage.customer_to_barcodes[(order_id, order_id % 1000)] = [
+            str(10_000_000_000 + order_id * 3 + index) for index in range(3)
+        ]
+
+    repository = Repository(
+        Path("orders.csv"),
+        Path("barcodes.csv"),
+        logger,
+        AsyncCSVReader(logger),
+        storage,
+    )
+    repository._loaded = True  # Storage was filled directly above
+
+    output = OutputSchema(
+        top_customers=[],
+        unused_barcode_count=0,
+        vouchers=VoucherStream(repository, validate=validate),
+    )
+    writer = FileWriter(Path("."), logger)
+
+    start = time.perf_counter()
+    async for _ in writer._serialize_output(output):
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vouchers", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_output")
+    logger.setLevel(logging.CRITICAL)
+
+    for name, validate in (("fast", False), ("validated", True)):
+        elapsed = asyncio.run(serialize(args.vouchers, validate, logger))
+        print(
+            f"{name:<10} | {elapsed:8.2f}s | "
+            f"{args.vouchers / elapsed:>12,.0f} vouchers/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
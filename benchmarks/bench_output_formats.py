@@ -0,0 +1,101 @@
+"""
+Output format benchmark: write time and file size of the vouchers output in
+every `--output-format` (plain text, gzip, zstd and Parquet).
+
+Usage:
+    poetry run python benchmarks/bench_output_formats.py --vouchers 1000000
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.extractor import VoucherStream, create_file_writer
+from vouchers_cli.options import OutputFormat
+from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import ExtractorConfig, OutputSchema
+from vouchers_cli.storage import OrderStorage
+
+
+async def build_output(vouchers: int, logger: logging.Logger) -> OutputSchema:
+    """
+    Build an output of `vouchers` synthetic vouchers (three barcodes each),
+    streamed from a filled in-memory storage.
+    """
+    storage = OrderStorage(logger)
+    await storage.store_orders_bulk(
+        (order_id, order_id % 1000) for order_id in range(1, vouchers + 1)
+    )
+    for order_id in range(1, vouchers + 1):
+        storage.customer_to_barcodes[(order_id, order_id % 1000)] = [
+            str(10_000_000_000 + order_id * 3 + index) for index in range(3)
+        ]
+
+    repository = Repository(
+        Path("orders.csv"),
+        Path("barcodes.csv"),
+        logger,
+        AsyncCSVReader(logger),
+        storage,
+    )
+    repository._loaded = True  # Storage was filled directly above
+
+    return OutputSchema(
+        top_customers=[],
+        unused_barcode_count=0,
+        vouchers=VoucherStream(repository),
+    )
+
+
+async def write(
+    vouchers: int, output_format: OutputFormat, output_dir: Path, logger: logging.Logger
+) -> float:
+    """
+    Write `vouchers` synthetic vouchers in `output_format` and return the
+    elapsed time in seconds.
+    """
+    output = await build_output(vouchers, logger)
+    config = ExtractorConfig.model_construct(
+        output_dir=output_dir, output_format=output_format, output_partitions=1
+    )
+    writer = create_file_writer(config, logger)
+
+    start = time.perf_counter()
+    await writer.write(output)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vouchers", type=int, default=1_000_000)
+    parser.add_argument(
+        "--formats",
+        type=OutputFormat,
+        nargs="+",
+        choices=list(OutputFormat),
+        default=list(OutputFormat),
+    )
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_output_formats")
+    logger.setLevel(logging.CRITICAL)
+
+    for output_format in args.formats:
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed = asyncio.run(
+                write(args.vouchers, output_format, Path(tmp), logger)
+            )
+            size = sum(path.stat().st_size for path in Path(tmp).iterdir())
+            print(
+                f"{output_format:<8} | {elapsed:8.2f}s | "
+                f"{args.vouchers / elapsed:>12,.0f} vouchers/sec | "
+                f"{size / 2**20:10.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Partitioned output benchmark: write time of the vouchers as one text file
+(`FileWriter`) versus hash-partitioned files written in parallel
+(`PartitionedFileWriter`, `--output-partitions`).
+
+Usage:
+    poetry run python benchmarks/bench_partitions.py --vouchers 1000000 \\
+        --partitions 4 16
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from bench_output_formats import build_output
+
+from vouchers_cli.async_writer import AsyncWriter, FileWriter, PartitionedFileWriter
+
+
+async def write(vouchers: int, partitions: int, output_dir: Path) -> float:
+    """
+    Write `vouchers` synthetic vouchers into `partitions` files (a plain
+    `FileWriter` for 1) and return the elapsed time in seconds.
+    """
+    logger = logging.getLogger("bench_partitions")
+    logger.setLevel(logging.CRITICAL)
+    output = await build_output(vouchers, logger)
+    writer: AsyncWriter[Any]
+    if partitions == 1:
+        writer = FileWriter(output_dir, logger)
+    else:
+        writer = PartitionedFileWriter(output_dir, logger, partitions)
+
+    start = time.perf_counter()
+    await writer.write(output)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--vouchers", type=int, default=1_000_000)
+    parser.add_argument("--partitions", type=int, nargs="+", default=[4, 16])
+    args = parser.parse_args()
+
+    for partitions in [1, *args.partitions]:
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed = asyncio.run(write(args.vouchers, partitions, Path(tmp)))
+            print(
+                f"{partitions:>4} file(s) | {elapsed:8.2f}s | "
+                f"{args.vouchers / elapsed:>12,.0f} vouchers/sec"
+            )
+
+
+if __name__ == "__main__":
+    main()
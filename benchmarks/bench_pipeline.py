@@ -0,0 +1,92 @@
+"""
+Pipelined ingestion benchmark: wall-clock time of `Repository._load_data` with
+reads on demand versus reader tasks buffering `--depth` chunks and batches ahead,
+next to the time spent in each stage. `--read-latency-ms` adds a delay to every
+chunk read, emulating slow (network or cold) storage, where pipelining lets the
+reads overlap parsing and storing.
+
+Usage:
+    poetry run python benchmarks/bench_pipeline.py --rows 1000000 --read-latency-ms 0 5
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncGenerator
+
+from datagen import DatasetSpec, generate_dataset
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.repository import Repository
+from vouchers_cli.storage import OrderStorage
+
+
+class SlowCSVReader(AsyncCSVReader):
+    """
+    CSV reader waiting `latency` seconds for every chunk read from disk.
+    """
+
+    def __init__(
+        self, logger: logging.Logger, latency: float, metrics: Metrics, depth: int
+    ):
+        super().__init__(logger, metrics=metrics, pipeline_depth=depth)
+        self._latency = latency
+
+    async def _iter_buffers(self, file_path: Path) -> AsyncGenerator[bytes]:
+        async for buffer in super()._iter_buffers(file_path):
+            await asyncio.sleep(self._latency)
+            yield buffer
+
+
+async def load(
+    orders: Path, barcodes: Path, latency: float, depth: int
+) -> tuple[float, Metrics]:
+    logger = logging.getLogger("bench_pipeline")
+    metrics = Metrics()
+    repository = Repository(
+        orders,
+        barcodes,
+        logger,
+        SlowCSVReader(logger, latency, metrics, depth),
+        OrderStorage(logger),
+        metrics=metrics,
+        pipeline_depth=depth,
+    )
+    start = time.perf_counter()
+    await repository._load_data()
+    return time.perf_counter() - start, metrics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--read-latency-ms", type=float, nargs="+", default=[0, 5])
+    parser.add_argument("--depth", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.getLogger("bench_pipeline").setLevel(logging.CRITICAL)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders, barcodes = generate_dataset(Path(tmp), DatasetSpec(rows=rows))
+            for latency in args.read_latency_ms:
+                for depth in (0, args.depth):
+                    elapsed, metrics = asyncio.run(
+                        load(orders, barcodes, latency / 1000, depth)
+                    )
+                    stages = " ".join(
+                        f"{stage}={metrics.stages.get(stage, 0.0):.2f}s"
+                        for stage in ("csv_read", "csv_parse", "store")
+                    )
+                    print(
+                        f"{rows:>12,} rows | latency {latency:4.0f} ms | "
+                        f"depth {depth} | {elapsed:7.2f}s | {stages}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
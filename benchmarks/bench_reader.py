@@ -0,0 +1,74 @@
+"""
+CSV reader benchmark: rows/sec of `AsyncCSVReader` (chunked reads parsed by
+`csv.reader`) versus `MmapCSVReader` (memory-mapped byte scanning) when
+streaming a barcodes file into typed columns.
+
+Usage:
+    poetry run python benchmarks/bench_reader.py --rows 50000000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from vouchers_cli.async_reader import AsyncCSVReader, FileReader
+from vouchers_cli.mmap_reader import MmapCSVReader
+
+
+def generate_barcodes(file_path: Path, rows: int, seed: int = 42) -> None:
+    """
+    Write a synthetic barcodes CSV; roughly 10% of the barcodes are unused.
+    """
+    rng = random.Random(seed)
+    orders = rows // 3 + 1
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("barcode,order_id\n")
+        for start in range(0, rows, 100_000):
+            file.writelines(
+                f"{10_000_000_000 + index},"
+                f"{'' if rng.random() < 0.1 else rng.randrange(1, orders + 1)}\n"
+                for index in range(start, min(start + 100_000, rows))
+            )
+
+
+async def scan(reader: FileReader, file_path: Path) -> int:
+    """
+    Stream every barcode batch and return the number of rows read.
+    """
+    return sum([len(barcodes) async for barcodes, _ in reader.iter_barcodes(file_path)])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000_000])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_reader")
+    logger.setLevel(logging.CRITICAL)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = Path(tmp) / "barcodes.csv"
+            generate_barcodes(file_path, rows)
+            size = file_path.stat().st_size
+            readers: list[tuple[str, FileReader]] = [
+                ("stream", AsyncCSVReader(logger)),
+                ("mmap", MmapCSVReader(logger)),
+            ]
+            for name, reader in readers:
+                start = time.perf_counter()
+                read = asyncio.run(scan(reader, file_path))
+                elapsed = time.perf_counter() - start
+                assert read == rows
+                print(
+                    f"{rows:>12,} rows ({size / 2**20:,.0f} MiB) | {name:<6} | "
+                    f"{elapsed:8.2f}s | {rows / elapsed:>12,.0f} rows/sec"
+                )
+
+
+if __name__ == "__main__":
+    main()
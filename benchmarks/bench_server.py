@@ -0,0 +1,186 @@
+"""
+Server load test: p50/p99 latency and throughput of every query endpoint of
+`--serve`, measured with concurrent keep-alive httpx clients.
+
+By default a local server is started over generated input files and stopped
+afterwards; `--url` targets an instance that is already running instead. An
+httpx client spends more CPU per request than the server, so on multi-core
+hosts use `--clients` to spread the load over several client processes.
+
+Usage:
+    poetry run python benchmarks/bench_server.py --rows 1000000 --requests 20000
+    poetry run python benchmarks/bench_server.py --url http://127.0.0.1:8080 --clients 4
+"""
+
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import httpx
+from bench_ingestion import generate_files
+
+
+def free_port() -> int:
+    """
+    Return a local TCP port that is free right now.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@contextmanager
+def local_server(rows: int) -> Iterator[str]:
+    """
+    Run the CLI in server mode over generated files; yields its URL.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        orders_path, barcodes_path = generate_files(Path(tmp), rows)
+        port = free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "from vouchers_cli.main import entry; entry()",
+                "--serve",
+                "--port",
+                str(port),
+                "--orders-file",
+                str(orders_path),
+                "--barcodes-file",
+                str(barcodes_path),
+                "--cache-dir",
+                tmp,
+            ],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            process.terminate()
+            process.wait()
+
+
+async def wait_ready(url: str, timeout: float = 600) -> None:
+    """
+    Poll the health endpoint until the server has loaded its data.
+    """
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                (await client.get("/health")).raise_for_status()
+                return
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def measure(
+    url: str, paths: list[str], concurrency: int
+) -> tuple[list[float], float]:
+    """
+    Send GET requests for `paths` from `concurrency` concurrent workers sharing
+    one keep-alive client.
+
+    :return: The latency of every request and the total elapsed time.
+    """
+    latencies: list[float] = []
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+
+        async def worker(worker_paths: list[str]) -> None:
+            for path in worker_paths:
+                start = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code not in (200, 404):
+                    response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(paths[index::concurrency]) for index in range(concurrency))
+        )
+        return latencies, time.perf_counter() - start
+
+
+def run_client(
+    url: str, paths: list[str], concurrency: int
+) -> tuple[list[float], float]:
+    """
+    Run `measure` in a client process.
+    """
+    return asyncio.run(measure(url, paths, concurrency))
+
+
+def load_test(
+    url: str, rows: int, requests: int, concurrency: int, clients: int
+) -> None:
+    endpoints: dict[str, Callable[[random.Random], str]] = {
+        "order vouchers": lambda rng: f"/orders/{rng.randint(1, rows)}/vouchers",
+        "customer vouchers": lambda rng: (
+            f"/customers/{rng.randint(0, rows // 10)}/vouchers"
+        ),
+        "top customers": lambda rng: "/customers/top?n=10",
+        "unused barcodes": lambda rng: (
+            f"/barcodes/unused?offset={rng.randint(0, rows // 20)}&limit=100"
+        ),
+    }
+    asyncio.run(wait_ready(url))
+
+    rng = random.Random(42)
+    with ProcessPoolExecutor(clients) as pool:
+        for name, make_path in endpoints.items():
+            paths = [make_path(rng) for _ in range(requests)]
+            results = list(
+                pool.map(
+                    run_client,
+                    [url] * clients,
+                    [paths[index::clients] for index in range(clients)],
+                    [concurrency] * clients,
+                )
+            )
+            latencies = [latency for result, _ in results for latency in result]
+            elapsed = max(elapsed for _, elapsed in results)
+            percentiles = statistics.quantiles(latencies, n=100)
+            print(
+                f"{name:>18} | p50 {percentiles[49] * 1000:7.2f} ms | "
+                f"p99 {percentiles[98] * 1000:7.2f} ms | "
+                f"{len(latencies) / elapsed:9,.0f} req/s"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Connections per client"
+    )
+    parser.add_argument("--clients", type=int, default=1, help="Client processes")
+    parser.add_argument("--url", help="Server to test instead of a local one")
+    args = parser.parse_args()
+    options = (args.rows, args.requests, args.concurrency, args.clients)
+
+    if args.url:
+        load_test(args.url, *options)
+        return
+
+    with local_server(args.rows) as url:
+        load_test(url, *options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Snapshot cache benchmark: time until the data is loaded on a cold run (CSV
+parsing plus writing the snapshot) versus a warm run (mapping the snapshot).
+
+Usage:
+    poetry run python benchmarks/bench_snapshot.py --rows 1000000 10000000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench_ingestion import generate_files
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.repository import Repository
+from vouchers_cli.snapshot import SnapshotCache
+from vouchers_cli.storage import OrderStorage
+
+
+async def load(
+    orders_path: Path, barcodes_path: Path, cache_dir: Path, logger: logging.Logger
+) -> None:
+    """
+    Load the input files through a repository with a snapshot cache.
+    """
+    repository = Repository(
+        orders_path,
+        barcodes_path,
+        logger,
+        AsyncCSVReader(logger),
+        OrderStorage(logger),
+        cache=SnapshotCache(cache_dir, logger),
+    )
+    await repository._load_data()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_snapshot")
+    logger.setLevel(logging.CRITICAL)
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders_path, barcodes_path = generate_files(Path(tmp), rows)
+            size = orders_path.stat().st_size + barcodes_path.stat().st_size
+            # Inputs are normally written well before the run reads them
+            for path in (orders_path, barcodes_path):
+                os.utime(path, (time.time() - 3600,) * 2)
+            for name in ("cold", "warm"):
+                start = time.perf_counter()
+                asyncio.run(load(orders_path, barcodes_path, Path(tmp), logger))
+                elapsed = time.perf_counter() - start
+                print(
+                    f"{rows:>12,} rows x2 ({size / 2**20:,.0f} MiB) | {name} | "
+                    f"{elapsed:8.3f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+SQLite storage benchmark: end-to-end run time and peak RSS of the CLI with the
+in-memory storages versus `--storage sqlite`, each in a fresh process.
+
+Usage:
+    poetry run python benchmarks/bench_sqlite.py --rows 1000000 5000000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_ingestion import generate_files
+
+# Runs the extractor once and prints its run time and peak RSS as JSON
+CHILD = """
+import asyncio, json, logging, resource, sys, time
+from pathlib import Path
+from vouchers_cli.extractor import VouchersExtractor
+from vouchers_cli.schemas import ExtractorConfig
+
+orders, barcodes, output, storage = sys.argv[1:]
+config = ExtractorConfig(
+    orders_file_path=Path(orders),
+    barcodes_file_path=Path(barcodes),
+    output_dir=Path(output),
+    storage=storage,
+    sqlite_path=Path(output) / "vouchers.sqlite3",
+)
+logger = logging.getLogger("bench_sqlite")
+logger.setLevel(logging.CRITICAL)
+start = time.perf_counter()
+asyncio.run(VouchersExtractor.create(config, logger).run())
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}), file=sys.stderr)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders_path, barcodes_path = generate_files(Path(tmp), rows)
+            for storage in ("memory", "compact", "sqlite"):
+                output = Path(tmp) / storage
+                output.mkdir()
+                result = subprocess.run(
+                    [
+                        sys.executable,
+                        "-c",
+                        CHILD,
+                        str(orders_path),
+                        str(barcodes_path),
+                        str(output),
+                        storage,
+                    ],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    check=True,
+                    text=True,
+                )
+                stats = json.loads(result.stderr.splitlines()[-1])
+                print(
+                    f"{rows:>12,} rows | {storage:>7} | {stats['seconds']:8.2f}s | "
+                    f"peak {stats['peak_mb']:8.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Startup benchmark: wall-clock time of `--help` and of a run over small
+generated files in a new interpreter, where imports dominate the time.
+
+Usage:
+    poetry run python benchmarks/bench_startup.py --rows 100 --repeat 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from datagen import DatasetSpec, generate_dataset
+
+
+def cli(*arguments: str | Path) -> float:
+    """
+    Run the CLI in a new interpreter, discarding its output, and return the time.
+    """
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "from vouchers_cli.main import entry; entry()"]
+        + [str(argument) for argument in arguments],
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        orders, barcodes = generate_dataset(Path(tmp), DatasetSpec(rows=args.rows))
+        commands: dict[str, tuple[str | Path, ...]] = {
+            "--help": ("--help",),
+            f"run, {args.rows:,} rows": (
+                "--orders-file",
+                orders,
+                "--barcodes-file",
+                barcodes,
+                "--output-dir",
+                Path(tmp) / "output",
+                "--cache-dir",
+                Path(tmp) / "cache",
+                "--no-cache",
+            ),
+        }
+        for label, arguments in commands.items():
+            seconds = [cli(*arguments) for _ in range(args.repeat)]
+            print(
+                f"{label:<20} | median {statistics.median(seconds) * 1000:8.1f} ms"
+                f" | best {min(seconds) * 1000:8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
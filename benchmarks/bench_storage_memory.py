@@ -0,0 +1,71 @@
+"""
+Storage memory benchmark: bytes held per million barcodes by `OrderStorage`
+versus `CompactOrderStorage`, measured with `tracemalloc`.
+
+Usage:
+    poetry run python benchmarks/bench_storage_memory.py --barcodes 1000000
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import random
+import tracemalloc
+
+from vouchers_cli.compact_storage import CompactOrderStorage
+from vouchers_cli.storage import OrderStorage
+
+BATCH_SIZE = 10_000
+
+
+async def measure(storage: OrderStorage, barcodes: int, seed: int = 42) -> int:
+    """
+    Load `barcodes` synthetic barcodes (10% unused) into `storage` and return
+    the number of bytes the barcode structures hold.
+    """
+    rng = random.Random(seed)
+    orders = barcodes // 3 + 1
+    await storage.store_orders_bulk(
+        (order_id, rng.randrange(orders // 10 + 1) + 1)
+        for order_id in range(1, orders + 1)
+    )
+
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for start in range(0, barcodes, BATCH_SIZE):
+        await storage.store_barcodes_bulk(
+            [
+                (
+                    str(10_000_000_000 + index),
+                    "" if rng.random() < 0.1 else str(rng.randrange(1, orders + 1)),
+                )
+                for index in range(start, min(start + BATCH_SIZE, barcodes))
+            ]
+        )
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current - baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--barcodes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_storage_memory")
+    logger.setLevel(logging.CRITICAL)
+
+    for name, storage_class in (
+        ("memory", OrderStorage),
+        ("compact", CompactOrderStorage),
+    ):
+        used = asyncio.run(measure(storage_class(logger), args.barcodes))
+        # Bytes per barcode is numerically equal to MB per million barcodes
+        print(f"{name:<8} | {used / args.barcodes:8.1f} MB per million barcodes")
+
+
+if __name__ == "__main__":
+    main()
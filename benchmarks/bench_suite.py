@@ -0,0 +1,235 @@
+"""
+Benchmark suite: times the full CLI path and its components on deterministic
+synthetic datasets, stores the results as JSON and compares them against a
+baseline run, failing when a benchmark got slower than the threshold allows.
+
+Components: `AsyncCSVReader.read_csv`, `Repository._load_data`,
+`Repository.get_top_customers` and `FileWriter.write`. Every benchmark reports
+the best of `--repeats` runs.
+
+Usage:
+    poetry run python benchmarks/bench_suite.py --rows 1000 100000 1000000 \\
+        --output baseline.json
+    poetry run python benchmarks/bench_suite.py --rows 1000 100000 1000000 \\
+        --output current.json --baseline baseline.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Coroutine
+
+from datagen import (
+    DatasetSpec,
+    add_spec_arguments,
+    generate_dataset,
+    spec_from_arguments,
+)
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.async_writer import FileWriter
+from vouchers_cli.extractor import VouchersExtractor, VoucherStream
+from vouchers_cli.options import DEFAULT_TOP_CUSTOMERS
+from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import ExtractorConfig, OutputSchema
+from vouchers_cli.storage import OrderStorage
+
+DEFAULT_THRESHOLD = 0.2  # Allowed slowdown before a benchmark counts as regressed
+NOISE_FLOOR = 0.005  # Seconds; smaller slowdowns are never reported as regressions
+
+# Times one run of a benchmark on the given orders and barcodes files, in seconds
+Benchmark = Callable[[Path, Path, Path, logging.Logger], Coroutine[Any, Any, float]]
+
+
+def _repository(orders: Path, barcodes: Path, logger: logging.Logger) -> Repository:
+    return Repository(
+        orders, barcodes, logger, AsyncCSVReader(logger), OrderStorage(logger)
+    )
+
+
+async def bench_cli(
+    orders: Path, barcodes: Path, output_dir: Path, logger: logging.Logger
+) -> float:
+    """
+    Full CLI path: load, extract and write with every writer.
+    """
+    config = ExtractorConfig(
+        orders_file_path=orders, barcodes_file_path=barcodes, output_dir=output_dir
+    )
+    extractor = VouchersExtractor.create(config, logger)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        await extractor.run()
+    return time.perf_counter() - start
+
+
+async def bench_read_csv(
+    orders: Path, barcodes: Path, output_dir: Path, logger: logging.Logger
+) -> float:
+    """
+    `AsyncCSVReader.read_csv` of both input files.
+    """
+    reader = AsyncCSVReader(logger)
+    start = time.perf_counter()
+    await reader.read_csv(orders)
+    await reader.read_csv(barcodes)
+    return time.perf_counter() - start
+
+
+async def bench_load(
+    orders: Path, barcodes: Path, output_dir: Path, logger: logging.Logger
+) -> float:
+    """
+    `Repository._load_data` into the in-memory storage.
+    """
+    repository = _repository(orders, barcodes, logger)
+    start = time.perf_counter()
+    await repository._load_data()
+    return time.perf_counter() - start
+
+
+async def bench_top_customers(
+    orders: Path, barcodes: Path, output_dir: Path, logger: logging.Logger
+) -> float:
+    """
+    First (uncached) `Repository.get_top_customers` call after loading.
+    """
+    repository = _repository(orders, barcodes, logger)
+    await repository._load_data()
+    start = time.perf_counter()
+    await repository.get_top_customers(DEFAULT_TOP_CUSTOMERS)
+    return time.perf_counter() - start
+
+
+async def bench_file_writer(
+    orders: Path, barcodes: Path, output_dir: Path, logger: logging.Logger
+) -> float:
+    """
+    `FileWriter.write` of every voucher of the loaded repository.
+    """
+    repository = _repository(orders, barcodes, logger)
+    output = OutputSchema(
+        top_customers=await repository.get_top_customers(DEFAULT_TOP_CUSTOMERS),
+        unused_barcode_count=await repository.get_unused_barcode_count(),
+        vouchers=VoucherStream(repository),
+    )
+    writer = FileWriter(output_dir, logger)
+    start = time.perf_counter()
+    await writer.write(output)
+    return time.perf_counter() - start
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "cli": bench_cli,
+    "read_csv": bench_read_csv,
+    "load_data": bench_load,
+    "top_customers": bench_top_customers,
+    "file_writer": bench_file_writer,
+}
+
+
+def run_suite(
+    specs: list[DatasetSpec], names: list[str], repeats: int
+) -> dict[str, dict[str, float]]:
+    """
+    Run the benchmarks `names` on a dataset generated for every spec.
+
+    :return: The best time in seconds per dataset name and benchmark.
+    """
+    logger = logging.getLogger("bench_suite")
+    logger.setLevel(logging.CRITICAL)
+
+    results: dict[str, dict[str, float]] = {}
+    for spec in specs:
+        with tempfile.TemporaryDirectory() as tmp:
+            orders, barcodes = generate_dataset(Path(tmp) / "input", spec)
+            results[spec.name] = {}
+            for name in names:
+                seconds = min(
+                    asyncio.run(
+                        BENCHMARKS[name](
+                            orders, barcodes, Path(tmp) / f"output-{name}", logger
+                        )
+                    )
+                    for _ in range(repeats)
+                )
+                results[spec.name][name] = seconds
+                print(f"{spec.name:<48} | {name:<13} | {seconds:10.4f}s")
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """
+    Compare results with a baseline, printing the change of every benchmark
+    they share.
+
+    :return: The benchmarks slower than `1 + threshold` times their baseline
+        (and by more than the noise floor).
+    """
+    regressions = []
+    for dataset, timings in results.items():
+        for name, seconds in timings.items():
+            previous = baseline.get(dataset, {}).get(name)
+            if previous is None:
+                continue
+            change = seconds / previous - 1 if previous else 0.0
+            regressed = change > threshold and seconds - previous > NOISE_FLOOR
+            print(
+                f"{dataset:<48} | {name:<13} | {previous:10.4f}s -> {seconds:10.4f}s "
+                f"| {change:+7.1%}{'  REGRESSION' if regressed else ''}"
+            )
+            if regressed:
+                regressions.append(f"{dataset} {name}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000])
+    add_spec_arguments(parser)
+    parser.add_argument(
+        "--benchmarks", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS)
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    specs = [spec_from_arguments(args, rows) for rows in args.rows]
+    results = run_suite(specs, args.benchmarks, args.repeats)
+
+    if args.output is not None:
+        report: dict[str, Any] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeats": args.repeats,
+            "datasets": {spec.name: spec._asdict() for spec in specs},
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        if regressions := compare(results, baseline, args.threshold):
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            print("\n".join(f"  {regression}" for regression in regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Deterministic synthetic data generator: orders/barcodes CSVs at a given scale,
+with a configurable duplicate rate, unused ratio and customer skew. The same
+arguments and seed always produce byte-identical files.
+
+Usage:
+    poetry run python benchmarks/datagen.py --rows 1000000 --output-dir data/bench
+    poetry run python benchmarks/datagen.py --rows 100000000 --customer-skew 2
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import NamedTuple
+
+WRITE_LINES = 100_000  # Lines buffered per file write, so any scale fits in memory
+FIRST_BARCODE = 10_000_000_000  # Numeric barcodes are consecutive from here
+
+
+class DatasetSpec(NamedTuple):
+    """
+    Shape of a generated dataset.
+
+    :param rows: Number of orders, and of barcode rows.
+    :param duplicate_rate: Share of barcode rows repeating an earlier barcode.
+    :param unused_ratio: Share of barcode rows without an order.
+    :param customer_skew: 0 spreads orders evenly over customers; larger values
+        concentrate them on low customer ids (a power law).
+    :param orders_per_customer: Average number of orders per customer.
+    :param seed: Seed of the random generator.
+    """
+
+    rows: int
+    duplicate_rate: float = 0.01
+    unused_ratio: float = 0.1
+    customer_skew: float = 0.0
+    orders_per_customer: int = 10
+    seed: int = 42
+
+    @property
+    def name(self) -> str:
+        """
+        Short label of the spec, used as a key of benchmark results.
+        """
+        return (
+            f"rows={self.rows},dup={self.duplicate_rate},unused={self.unused_ratio},"
+            f"skew={self.customer_skew}"
+        )
+
+
+def generate_dataset(directory: Path, spec: DatasetSpec) -> tuple[Path, Path]:
+    """
+    Write `orders.csv` and `barcodes.csv` for `spec` into `directory`, streaming
+    them in blocks of lines.
+
+    :return: The orders and barcodes file paths.
+    """
+    rng = random.Random(spec.seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    orders_path = directory / "orders.csv"
+    barcodes_path = directory / "barcodes.csv"
+    orders = max(spec.rows, 1)
+    customers = max(orders // spec.orders_per_customer, 1)
+    exponent = 1 + spec.customer_skew
+
+    with open(orders_path, "w", encoding="utf-8") as file:
+        file.write("order_id,customer_id\n")
+        for start in range(1, orders + 1, WRITE_LINES):
+            file.writelines(
+                f"{order_id},{int(customers * rng.random() ** exponent) + 1}\n"
+                for order_id in range(start, min(start + WRITE_LINES, orders + 1))
+            )
+
+    with open(barcodes_path, "w", encoding="utf-8") as file:
+        file.write("barcode,order_id\n")
+        for start in range(0, spec.rows, WRITE_LINES):
+            lines = []
+            for index in range(start, min(start + WRITE_LINES, spec.rows)):
+                if index and rng.random() < spec.duplicate_rate:
+                    barcode = FIRST_BARCODE + rng.randrange(index)
+                else:
+                    barcode = FIRST_BARCODE + index
+                if rng.random() < spec.unused_ratio:
+                    lines.append(f"{barcode},\n")
+                else:
+                    lines.append(f"{barcode},{rng.randrange(1, orders + 1)}\n")
+            file.writelines(lines)
+
+    return orders_path, barcodes_path
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the dataset shape options, shared with the benchmark suite.
+    """
+    defaults = DatasetSpec(rows=0)
+    parser.add_argument("--duplicate-rate", type=float, default=defaults.duplicate_rate)
+    parser.add_argument("--unused-ratio", type=float, default=defaults.unused_ratio)
+    parser.add_argument("--customer-skew", type=float, default=defaults.customer_skew)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_arguments(args: argparse.Namespace, rows: int) -> DatasetSpec:
+    return DatasetSpec(
+        rows=rows,
+        duplicate_rate=args.duplicate_rate,
+        unused_ratio=args.unused_ratio,
+        customer_skew=args.customer_skew,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--output-dir", type=Path, default=Path("data/bench"))
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    orders_path, barcodes_path = generate_dataset(
+        args.output_dir, spec_from_arguments(args, args.rows)
+    )
+    print(f"Wrote {orders_path} and {barcodes_path}")
+
+
+if __name__ == "__main__":
+    main()
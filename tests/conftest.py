@@ -2,7 +2,7 @@ import logging
 import os
 from logging import Logger
 from pathlib import Path
-from typing import Generator
+from typing import AsyncIterator, Generator
 from unittest.mock import AsyncMock
 
 import pytest
@@ -11,7 +11,7 @@ from vouchers_cli.async_reader import AsyncCSVReader, FileReader
 from vouchers_cli.async_writer import FileWriter, STDOutWriter
 from vouchers_cli.extractor import VouchersExtractor
 from vouchers_cli.repository import Repository
-from vouchers_cli.schemas import ExtractorConfig, OutputSchema, VoucherSchema
+from vouchers_cli.schemas import ExtractorConfig, OutputSchema, Voucher
 from vouchers_cli.storage import OrderStorage
 
 
@@ -102,14 +102,15 @@ def extractor(
 @pytest.fixture
 def output_schema() -> OutputSchema:
     """Creates a mock OutputSchema."""
-    vouchers = [
-        VoucherSchema(customer_id=1, order_id=123, barcodes=["barcode1", "barcode2"]),
-        VoucherSchema(customer_id=2, order_id=456, barcodes=["barcode3"]),
-    ]
+
+    async def vouchers() -> AsyncIterator[Voucher]:
+        yield Voucher(customer_id=1, order_id=123, barcodes=["barcode1", "barcode2"])
+        yield Voucher(customer_id=2, order_id=456, barcodes=["barcode3"])
+
     return OutputSchema(
         top_customers=[(1, 500), (2, 300)],
-        unused_barcodes={"barcode4", "barcode5"},
-        vouchers=vouchers,
+        unused_barcode_count=2,
+        vouchers=vouchers(),
     )
 
 
@@ -0,0 +1,134 @@
+import logging
+import sys
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from vouchers_cli.arrow_reader import ArrowFileReader
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.options import is_columnar
+from vouchers_cli.repository import Repository
+from vouchers_cli.storage import OrderStorage
+
+ORDERS = pa.table({"order_id": [1, 2, 3], "customer_id": [10, 20, 10]})
+BARCODES = pa.table(
+    {
+        "order_id": pa.array([1, None, 3, 1], type=pa.int64()),
+        "barcode": ["11111111111", "11111111112", "11111111113", "11111111111"],
+    }
+)
+
+
+def write_table(table: pa.Table, file_path: Path) -> Path:
+    """
+    Write a table as Parquet, Arrow IPC file or Arrow IPC stream by suffix.
+    """
+    if file_path.suffix == ".parquet":
+        pq.write_table(table, file_path)
+    elif file_path.suffix == ".arrow":
+        with pa.ipc.new_file(file_path, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        with pa.ipc.new_stream(file_path, table.schema) as writer:
+            writer.write_table(table)
+    return file_path
+
+
+async def test_is_columnar() -> None:
+    """
+    Test that Parquet and Arrow IPC suffixes are recognised.
+    """
+    assert is_columnar(Path("orders.parquet"))
+    assert is_columnar(Path("orders.ARROW"))
+    assert not is_columnar(Path("orders.csv"))
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow", ".ipc"])
+async def test_iter_columns(
+    mock_logger: logging.Logger, tmp_path: Path, suffix: str
+) -> None:
+    """
+    Test that orders and barcodes are streamed as typed columns in batches,
+    with columns selected by name regardless of their order in the file.
+    """
+    reader = ArrowFileReader(mock_logger)
+    orders_path = write_table(ORDERS, tmp_path / f"orders{suffix}")
+    barcodes_path = write_table(BARCODES, tmp_path / f"barcodes{suffix}")
+
+    orders = [batch async for batch in reader.iter_orders(orders_path, batch_size=2)]
+    barcodes = [batch async for batch in reader.iter_barcodes(barcodes_path)]
+
+    assert orders == [([1, 2], [10, 20]), ([3], [10])]
+    assert barcodes == [
+        (
+            ["11111111111", "11111111112", "11111111113", "11111111111"],
+            [1, None, 3, 1],
+        )
+    ]
+
+
+async def test_repository_with_parquet_matches_csv(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that loading Parquet input gives the same results as the CSV input.
+    """
+    csv_reader = AsyncCSVReader(mock_logger)
+    orders_path, barcodes_path = Path("data/orders.csv"), Path("data/barcodes.csv")
+    for source, target in (
+        (orders_path, tmp_path / "orders.parquet"),
+        (barcodes_path, tmp_path / "barcodes.parquet"),
+    ):
+        rows = list(await csv_reader.read_csv(source))
+        header = source.read_text().splitlines()[0].split(",")
+        columns = {
+            name: [row[index] or None for row in rows]
+            for index, name in enumerate(header)
+        }
+        write_table(pa.table(columns), target)
+
+    csv_repository = Repository(
+        orders_path, barcodes_path, mock_logger, csv_reader, OrderStorage(mock_logger)
+    )
+    parquet_repository = Repository(
+        tmp_path / "orders.parquet",
+        tmp_path / "barcodes.parquet",
+        mock_logger,
+        ArrowFileReader(mock_logger),
+        OrderStorage(mock_logger),
+    )
+
+    assert (
+        await parquet_repository.get_vouchers() == await csv_repository.get_vouchers()
+    )
+    assert (
+        await parquet_repository.get_unused_barcodes()
+        == await csv_repository.get_unused_barcodes()
+    )
+
+
+async def test_iter_orders_file_not_found(mock_logger: logging.Logger) -> None:
+    """
+    Test that a missing file yields no batches.
+    """
+    reader = ArrowFileReader(mock_logger)
+
+    batches = [batch async for batch in reader.iter_orders(Path("missing.parquet"))]
+
+    assert batches == []
+
+
+async def test_missing_pyarrow(
+    mock_logger: logging.Logger, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a clear error is raised when pyarrow is not installed.
+    """
+    orders_path = write_table(ORDERS, tmp_path / "orders.parquet")
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    reader = ArrowFileReader(mock_logger)
+
+    with pytest.raises(ValueError, match="requires the optional 'pyarrow' package"):
+        _ = [batch async for batch in reader.iter_orders(orders_path)]
@@ -0,0 +1,72 @@
+import logging
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+import pyarrow.parquet as pq
+import pytest
+
+from vouchers_cli.arrow_writer import ParquetFileWriter
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.schemas import OutputSchema, Voucher
+
+
+async def test_parquet_file_writer_write(
+    mock_logger: logging.Logger, output_schema: OutputSchema, tmp_path: Path
+) -> None:
+    """
+    Test that every voucher becomes a row keyed by customer and order, with its
+    barcodes as a list column, in row groups of `row_group_size` vouchers.
+    """
+    metrics = Metrics()
+    writer = ParquetFileWriter(
+        tmp_path / "output", mock_logger, row_group_size=1, metrics=metrics
+    )
+
+    await writer.write(output_schema)
+
+    (file_path,) = (tmp_path / "output").iterdir()
+    assert file_path.suffix == ".parquet"
+    parquet_file = pq.ParquetFile(file_path)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.read().to_pylist() == [
+        {"customer_id": 1, "order_id": 123, "barcodes": ["barcode1", "barcode2"]},
+        {"customer_id": 2, "order_id": 456, "barcodes": ["barcode3"]},
+    ]
+    assert metrics.counters["vouchers_written"] == 2
+
+
+async def test_parquet_file_writer_without_vouchers(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that an output without vouchers is still a valid, empty Parquet file.
+    """
+
+    async def no_vouchers() -> AsyncIterator[Voucher]:
+        return
+        yield
+
+    output = OutputSchema(
+        top_customers=[], unused_barcode_count=0, vouchers=no_vouchers()
+    )
+    writer = ParquetFileWriter(tmp_path, mock_logger)
+
+    await writer.write(output)
+
+    (file_path,) = tmp_path.iterdir()
+    table = pq.read_table(file_path)
+    assert table.num_rows == 0
+    assert table.column_names == ["customer_id", "order_id", "barcodes"]
+
+
+async def test_parquet_file_writer_without_pyarrow(
+    mock_logger: logging.Logger, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a clear error is raised up front when pyarrow is not installed.
+    """
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ValueError, match="requires the optional 'pyarrow' package"):
+        ParquetFileWriter(tmp_path, mock_logger)
@@ -1,6 +1,12 @@
+import bz2
+import gzip
 import logging
 import os
 from pathlib import Path
+from typing import Callable
+
+import pytest
+import zstandard
 
 from vouchers_cli.async_reader import AsyncCSVReader
 
@@ -63,3 +69,139 @@ async def test_read_csv_empty_file(mock_logger: logging.Logger) -> None:
 
     # Clean up the empty file after the test
     os.remove(empty_csv_path)
+
+
+async def test_iter_batches_yields_bounded_batches(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that iter_batches streams rows in batches of at most `batch_size` rows,
+    even when lines are split across byte chunks.
+    """
+    csv_path = tmp_path / "orders.csv"
+    rows = [[str(i), str(i * 10)] for i in range(1, 8)]
+    csv_path.write_text(
+        "order_id,customer_id\n" + "\n".join(",".join(row) for row in rows) + "\n"
+    )
+
+    # A tiny chunk size forces rows to straddle chunk boundaries
+    reader = AsyncCSVReader(mock_logger, chunk_size=5)
+    batches = [batch async for batch in reader.iter_batches(csv_path, batch_size=3)]
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [row for batch in batches for row in batch] == rows
+
+
+async def test_iter_batches_without_trailing_newline(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that the last line is parsed when the file has no trailing newline.
+    """
+    csv_path = tmp_path / "barcodes.csv"
+    csv_path.write_text("barcode,order_id\n11111111111,1\n\n11111111112,")
+
+    reader = AsyncCSVReader(mock_logger)
+    batches = [batch async for batch in reader.iter_batches(csv_path)]
+
+    assert batches == [[["11111111111", "1"], ["11111111112", ""]]]
+
+
+async def test_iter_batches_file_not_found(mock_logger: logging.Logger) -> None:
+    """
+    Test that iter_batches yields nothing when the file does not exist.
+    """
+    reader = AsyncCSVReader(mock_logger)
+
+    batches = [
+        batch async for batch in reader.iter_batches(Path("data/non_existent.csv"))
+    ]
+
+    assert batches == []
+
+
+async def test_iter_orders_and_barcodes_columns(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that CSV rows are converted into typed column batches.
+    """
+    orders_path = tmp_path / "orders.csv"
+    orders_path.write_text("order_id,customer_id\n1,10\n2,20\n")
+    barcodes_path = tmp_path / "barcodes.csv"
+    barcodes_path.write_text("barcode,order_id\n11111111111,1\n11111111112,\n")
+    reader = AsyncCSVReader(mock_logger)
+
+    orders = [batch async for batch in reader.iter_orders(orders_path)]
+    barcodes = [batch async for batch in reader.iter_barcodes(barcodes_path)]
+
+    assert orders == [([1, 2], [10, 20])]
+    assert barcodes == [(["11111111111", "11111111112"], [1, None])]
+
+
+async def test_iter_batches_pipelined(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that reading chunks ahead of the parser yields the same batches, and
+    that a missing file is still reported.
+    """
+    csv_path = tmp_path / "orders.csv"
+    rows = [[str(i), str(i * 10)] for i in range(1, 50)]
+    csv_path.write_text(
+        "order_id,customer_id\n" + "\n".join(",".join(row) for row in rows)
+    )
+
+    reader = AsyncCSVReader(mock_logger, chunk_size=7, pipeline_depth=2)
+    batches = [batch async for batch in reader.iter_batches(csv_path, batch_size=10)]
+    missing = [
+        batch async for batch in reader.iter_batches(Path("data/non_existent.csv"))
+    ]
+
+    assert [len(batch) for batch in batches] == [10, 10, 10, 10, 9]
+    assert [row for batch in batches for row in batch] == rows
+    assert missing == []
+
+
+def zstd_stream(data: bytes) -> bytes:
+    """
+    Compress data as two zstd frames without a content size, as streaming
+    compressors write them.
+    """
+    frames = []
+    middle = len(data) // 2
+    for part in (data[:middle], data[middle:]):
+        compressor = zstandard.ZstdCompressor().compressobj()
+        frames.append(compressor.compress(part) + compressor.flush())
+    return b"".join(frames)
+
+
+@pytest.mark.parametrize(
+    ("suffix", "compress"),
+    [
+        (".csv.gz", gzip.compress),
+        (".csv.zst", zstd_stream),
+        (".csv.bz2", bz2.compress),
+        (".csv", gzip.compress),  # Detected from the magic bytes
+    ],
+)
+async def test_iter_batches_decompresses_input(
+    mock_logger: logging.Logger,
+    tmp_path: Path,
+    suffix: str,
+    compress: Callable[[bytes], bytes],
+) -> None:
+    """
+    Test that compressed files are decompressed while streaming, with rows
+    straddling decompressed chunks, and read as the plain file.
+    """
+    rows = [[str(i), str(i * 10)] for i in range(1, 50)]
+    content = "order_id,customer_id\n" + "\n".join(",".join(row) for row in rows)
+    csv_path = tmp_path / f"orders{suffix}"
+    csv_path.write_bytes(compress(content.encode()))
+
+    reader = AsyncCSVReader(mock_logger, chunk_size=7)
+    batches = [batch async for batch in reader.iter_batches(csv_path, batch_size=10)]
+
+    assert [row for batch in batches for row in batch] == rows
+    assert reader._metrics.counters["bytes_read"] == len(content)
@@ -1,12 +1,31 @@
+import asyncio
+import gzip
+import hashlib
+import json
 import logging
 import os
 import sys
 from datetime import datetime
+from functools import partial
 from io import StringIO
 from pathlib import Path
+from typing import AsyncIterator, Callable
 
-from vouchers_cli.async_writer import FileWriter, STDOutWriter
-from vouchers_cli.schemas import OutputSchema
+import pytest
+import zstandard
+
+from vouchers_cli.async_writer import (
+    MANIFEST_NAME,
+    FileWriter,
+    GzipFileWriter,
+    PartitionedFileWriter,
+    STDOutWriter,
+    ZstdFileWriter,
+    partition_of,
+    write_behind,
+)
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.schemas import OutputSchema, Voucher
 
 
 async def test_stdout_writer_write(
@@ -48,3 +67,178 @@ async def test_file_writer_write(
     expected_file_content = "1,123,[barcode1,barcode2]\n2,456,[barcode3]"
     assert file_content == expected_file_content
     os.remove(filename)
+
+
+async def test_file_writer_writes_in_chunks(
+    mock_logger: logging.Logger, output_schema: OutputSchema, tmp_path: Path
+) -> None:
+    """
+    Test that FileWriter emits bounded chunks that add up to the same content.
+    """
+    writer = FileWriter(tmp_path, mock_logger, chunk_size=1)
+
+    chunks = [chunk async for chunk in writer._serialize_output(output_schema)]
+
+    assert chunks == ["1,123,[barcode1,barcode2]", "\n2,456,[barcode3]"]
+
+
+@pytest.mark.parametrize(
+    ("writer_class", "suffix", "decompress"),
+    [
+        (GzipFileWriter, ".log.gz", gzip.decompress),
+        # Streamed frames do not record their size, so the output needs a bound
+        (
+            ZstdFileWriter,
+            ".log.zst",
+            partial(zstandard.decompress, max_output_size=1024),
+        ),
+    ],
+)
+async def test_compressed_file_writers(
+    mock_logger: logging.Logger,
+    output_schema: OutputSchema,
+    tmp_path: Path,
+    writer_class: type[FileWriter],
+    suffix: str,
+    decompress: Callable[[bytes], bytes],
+) -> None:
+    """
+    Test that the compressed writers write the text output of FileWriter,
+    chunk by chunk, to a file with their suffix.
+    """
+    writer = writer_class(tmp_path / "output", mock_logger, chunk_size=1)
+
+    await writer.write(output_schema)
+
+    (file_path,) = (tmp_path / "output").iterdir()
+    assert file_path.name.endswith(suffix)
+    assert (
+        decompress(file_path.read_bytes())
+        == b"1,123,[barcode1,barcode2]\n2,456,[barcode3]"
+    )
+
+
+async def test_zstd_file_writer_without_zstandard(
+    mock_logger: logging.Logger, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a clear error is raised up front when zstandard is not installed.
+    """
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+
+    with pytest.raises(ValueError, match="requires the optional 'zstandard'"):
+        ZstdFileWriter(tmp_path, mock_logger)
+
+
+async def test_write_behind_keeps_order_and_waits_on_errors() -> None:
+    """
+    Test that chunks are written in order, and that a failing producer still
+    lets the write in flight finish before the error is raised.
+    """
+    written: list[int] = []
+
+    def write(chunk: int) -> None:
+        written.append(chunk)
+
+    async def chunks(fail: bool) -> AsyncIterator[int]:
+        for chunk in range(5):
+            yield chunk
+            await asyncio.sleep(0)
+        if fail:
+            raise RuntimeError("producer failed")
+
+    await write_behind(chunks(False), write)
+    assert written == [0, 1, 2, 3, 4]
+
+    written.clear()
+    with pytest.raises(RuntimeError, match="producer failed"):
+        await write_behind(chunks(True), write)
+    assert written == [0, 1, 2, 3, 4]
+
+
+async def test_partitioned_file_writer(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that vouchers are split by the hashed customer id into files of
+    FileWriter lines, empty partitions included, and that the manifest lists
+    the voucher count, size and checksum of every file.
+    """
+
+    async def vouchers() -> AsyncIterator[Voucher]:
+        for order_id in range(1, 101):
+            yield Voucher(order_id % 7, order_id, [f"b{order_id}"])
+
+    output = OutputSchema(top_customers=[], unused_barcode_count=0, vouchers=vouchers())
+    metrics = Metrics()
+    writer = PartitionedFileWriter(
+        tmp_path, mock_logger, partitions=8, chunk_size=64, metrics=metrics, threads=3
+    )
+
+    await writer.write(output)
+
+    (directory,) = tmp_path.iterdir()
+    manifest = json.loads((directory / MANIFEST_NAME).read_text())
+    assert (manifest["partitions"], manifest["vouchers"]) == (8, 100)
+    assert manifest["partition_key"] == (
+        "((customer_id * 0x9e3779b97f4a7c15) mod 2**64 * 8) >> 64"
+    )
+    lines: list[str] = []
+    for index, entry in enumerate(manifest["files"]):
+        data = (directory / entry["file"]).read_bytes()
+        assert entry["file"] == f"part-{index:05d}.log"
+        assert entry["bytes"] == len(data)
+        assert entry["sha256"] == hashlib.sha256(data).hexdigest()
+        partition_lines = data.decode().split("\n") if data else []
+        assert entry["vouchers"] == len(partition_lines)
+        assert all(
+            partition_of(int(line.split(",")[0]), 8) == index
+            for line in partition_lines
+        )
+        lines += partition_lines
+    # Customers 0 to 6 hash to 6 of the 8 partitions
+    assert [entry["vouchers"] == 0 for entry in manifest["files"]].count(True) == 2
+    assert sorted(lines) == sorted(
+        f"{order_id % 7},{order_id},[b{order_id}]" for order_id in range(1, 101)
+    )
+    assert metrics.counters["vouchers_written"] == 100
+
+
+def test_partition_of_spreads_strided_ids() -> None:
+    """
+    Test that customer ids with a stride of the partition count, which a plain
+    modulo sends to one partition, spread evenly over every partition.
+    """
+    for partitions in (2, 8, 16):
+        counts = [0] * partitions
+        for customer_id in range(0, 1000 * partitions, partitions):
+            counts[partition_of(customer_id, partitions)] += 1
+
+        assert min(counts) > 1000 // partitions * 0.9
+    assert partition_of(12345, 1) == 0
+
+
+async def test_partitioned_file_writer_closes_files_on_errors(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that a failing voucher stream still closes every partition file and
+    writes no manifest.
+    """
+
+    async def vouchers() -> AsyncIterator[Voucher]:
+        yield Voucher(1, 1, ["b1"])
+        raise RuntimeError("storage failed")
+
+    output = OutputSchema(top_customers=[], unused_barcode_count=0, vouchers=vouchers())
+    writer = PartitionedFileWriter(tmp_path, mock_logger, partitions=2, chunk_size=1)
+
+    with pytest.raises(RuntimeError, match="storage failed"):
+        await writer.write(output)
+
+    (directory,) = tmp_path.iterdir()
+    assert sorted(path.name for path in directory.iterdir()) == [
+        "part-00000.log",
+        "part-00001.log",
+    ]
+    assert (directory / "part-00001.log").read_text() == "1,1,[b1]"
@@ -0,0 +1,179 @@
+import json
+import logging
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.batch import (
+    BatchJob,
+    BatchRunner,
+    JobResult,
+    init_batch_worker,
+    read_manifest,
+    run_job,
+    summarize,
+)
+from vouchers_cli.options import StorageBackend
+
+DATA_DIR = Path("data").resolve()
+
+
+def write_manifest(tmp_path: Path, rows: list[str]) -> Path:
+    manifest_path = tmp_path / "manifest.csv"
+    manifest_path.write_text(
+        "orders_file,barcodes_file,output_dir\n" + "".join(f"{row}\n" for row in rows)
+    )
+    return manifest_path
+
+
+async def test_read_manifest_resolves_relative_paths(tmp_path: Path) -> None:
+    """
+    Test that every row becomes a job named after its line, with relative paths
+    resolved against the manifest's directory.
+    """
+    manifest_path = write_manifest(
+        tmp_path,
+        [f"{DATA_DIR}/orders.csv,{DATA_DIR}/barcodes.csv,out/a", "o.csv,b.csv,out/b"],
+    )
+
+    jobs = read_manifest(manifest_path)
+
+    assert jobs == [
+        BatchJob(
+            "line 2",
+            DATA_DIR / "orders.csv",
+            DATA_DIR / "barcodes.csv",
+            tmp_path / "out/a",
+        ),
+        BatchJob("line 3", tmp_path / "o.csv", tmp_path / "b.csv", tmp_path / "out/b"),
+    ]
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        ("orders_file,output_dir\no.csv,out\n", "lacks the columns: barcodes_file"),
+        (
+            "orders_file,barcodes_file,output_dir\no.csv,,out\n",
+            "line 2: empty column",
+        ),
+        (
+            "orders_file,barcodes_file,output_dir\na.csv,b.csv,out\nc.csv,d.csv,out\n",
+            "is also used by line 2",
+        ),
+    ],
+)
+async def test_read_manifest_rejects_invalid_manifests(
+    tmp_path: Path, content: str, message: str
+) -> None:
+    """
+    Test that missing columns, empty cells and shared output directories are
+    reported with their manifest line.
+    """
+    manifest_path = tmp_path / "manifest.csv"
+    manifest_path.write_text(content)
+
+    with pytest.raises(ValueError, match=message):
+        read_manifest(manifest_path)
+
+
+def test_run_job_isolates_failures(tmp_path: Path) -> None:
+    """
+    Test a successful job and a failing one in this process: the failure is
+    returned as exit code 1 with its error instead of being raised.
+    """
+    init_batch_worker("test_batch_worker", logging.DEBUG)
+    good = BatchJob(
+        "line 2", DATA_DIR / "orders.csv", DATA_DIR / "barcodes.csv", tmp_path / "a"
+    )
+    bad = BatchJob(
+        "line 3", tmp_path / "missing.csv", DATA_DIR / "barcodes.csv", tmp_path / "b"
+    )
+    options = {"cache_dir": tmp_path / "cache"}
+
+    result = run_job(good, options)
+    failed = run_job(bad, options)
+
+    assert (result.exit_code, result.error) == (0, None)
+    counters = result.metrics["counters"]
+    assert result.rows == counters["orders_stored"] + counters["barcodes_stored"]
+    assert len(list((tmp_path / "a").iterdir())) == 1
+    assert failed.exit_code == 1
+    assert failed.error is not None and "File not found" in failed.error
+    assert failed.rows == 0
+
+
+async def test_summarize_reports_throughput() -> None:
+    """
+    Test the per-job and total rows/sec of the batch summary.
+    """
+    results = [
+        JobResult(
+            "line 2",
+            0,
+            2.0,
+            None,
+            {"counters": {"orders_stored": 60, "barcodes_stored": 40}},
+        ),
+        JobResult("line 3", 1, 0.5, "boom", {}),
+    ]
+
+    summary = summarize(results, 4.0)
+
+    assert [job["rows_per_second"] for job in summary["jobs"]] == [50.0, 0.0]
+    assert (summary["failed"], summary["rows"], summary["rows_per_second"]) == (
+        1,
+        100,
+        25.0,
+    )
+
+
+async def test_batch_runner_rejects_shared_state(tmp_path: Path) -> None:
+    """
+    Test that options making concurrent jobs share a state or database file
+    are rejected.
+    """
+    manifest_path = write_manifest(tmp_path, [])
+    logger = logging.getLogger("test_logger")
+
+    with pytest.raises(ValueError, match="--delta-state"):
+        BatchRunner.create(manifest_path, {"delta_state": tmp_path / "state"}, logger)
+    with pytest.raises(ValueError, match="'sqlite' storage"):
+        BatchRunner.create(manifest_path, {"storage": StorageBackend.SQLITE}, logger)
+
+
+async def test_batch_runner_runs_jobs_in_worker_processes(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """
+    Test a batch with a good and a bad job: results keep the manifest order,
+    the good job writes its output and the summary is logged and written.
+    """
+    manifest_path = write_manifest(
+        tmp_path,
+        [
+            f"{DATA_DIR}/orders.csv,{DATA_DIR}/barcodes.csv,out/a",
+            f"missing.csv,{DATA_DIR}/barcodes.csv,out/b",
+        ],
+    )
+    summary_path = tmp_path / "summary.json"
+    runner = BatchRunner.create(
+        manifest_path,
+        {"cache_dir": tmp_path / "cache"},
+        logging.getLogger("test_logger"),
+        workers=2,
+        summary_json=summary_path,
+    )
+
+    with caplog.at_level(logging.INFO, logger="test_logger"):
+        results = await runner.run()
+
+    assert [(result.name, result.exit_code) for result in results] == [
+        ("line 2", 0),
+        ("line 3", 1),
+    ]
+    assert len(list((tmp_path / "out/a").iterdir())) == 1
+    assert "Batch of 2 jobs (1 failed)" in caplog.text
+    summary = json.loads(summary_path.read_text())
+    assert summary["failed"] == 1
+    assert summary["jobs"][0]["rows"] == results[0].rows > 0
@@ -0,0 +1,99 @@
+from logging import Logger
+
+from vouchers_cli.compact_storage import CompactOrderStorage, Int64HashSet
+from vouchers_cli.storage import OrderStorage
+
+
+async def test_int64_hash_set_add_and_contains() -> None:
+    """
+    Test that Int64HashSet detects duplicates and keeps values across growth.
+    """
+    hash_set = Int64HashSet(capacity=4)
+    values = [0, 11111111111, 1 << 40, 7, 123456789012345678]
+
+    assert all(hash_set.add(value) for value in values)
+    assert not hash_set.add(11111111111)
+    assert len(hash_set) == len(values)
+    assert all(value in hash_set for value in values)
+    assert 42 not in hash_set
+    assert hash_set.nbytes() >= len(values) * 8
+
+
+async def test_compact_storage_matches_order_storage(mock_logger: Logger) -> None:
+    """
+    Test that CompactOrderStorage returns the same vouchers and unused barcodes
+    as OrderStorage, including non-numeric and zero-padded barcodes.
+    """
+    rows = [
+        ("11111111111", "1"),
+        ("ABC-1", "1"),
+        ("00042", "2"),
+        ("42", "2"),
+        ("11111111112", ""),
+        ("X-unused", ""),
+        ("11111111111", "2"),  # Duplicate numeric barcode
+        ("ABC-1", ""),  # Duplicate string barcode
+        ("11111111113", "3"),  # Unknown order
+        ("1234567890123456789", "1"),  # Too long for the numeric encoding
+    ]
+
+    reference = OrderStorage(mock_logger)
+    compact = CompactOrderStorage(mock_logger)
+    for storage in (reference, compact):
+        await storage.store_orders_bulk([(1, 100), (2, 200)])
+        await storage.store_barcodes_bulk(rows)
+
+    assert await compact.get_vouchers() == await reference.get_vouchers()
+    assert await compact.get_unused_barcodes() == await reference.get_unused_barcodes()
+    for customer_id in (100, 200, 300):
+        assert await compact.get_customer_vouchers(
+            customer_id
+        ) == await reference.get_customer_vouchers(customer_id)
+        assert await compact.get_customer_barcode_count(
+            customer_id
+        ) == await reference.get_customer_barcode_count(customer_id)
+
+
+async def test_compact_storage_per_row_api(mock_logger: Logger) -> None:
+    """
+    Test that the per-row store methods work on CompactOrderStorage.
+    """
+    storage = CompactOrderStorage(mock_logger)
+
+    await storage.store_order(1, 100)
+    await storage.store_barcode("11111111111", "1")
+    await storage.store_barcode("11111111112", "")
+
+    assert await storage.get_vouchers() == {(1, 100): ["11111111111"]}
+    assert await storage.get_unused_barcodes() == {"11111111112"}
+    assert await storage.get_customer_vouchers(100) == {1: ["11111111111"]}
+
+    # The customer index is rebuilt after new barcodes
+    await storage.store_barcode("11111111113", "1")
+    assert await storage.get_customer_vouchers(100) == {
+        1: ["11111111111", "11111111113"]
+    }
+
+
+async def test_compact_storage_allocate_barcodes(mock_logger: Logger) -> None:
+    """
+    Test that allocations take the most recently stored unused barcodes,
+    including string-encoded ones, and show up in the vouchers.
+    """
+    storage = CompactOrderStorage(mock_logger)
+    await storage.store_orders_bulk([(1, 100), (2, 200)])
+    await storage.store_barcodes_bulk(
+        [("11111111111", "1"), ("11111111112", ""), ("X-1", ""), ("11111111113", "")]
+    )
+    assert await storage.get_customer_barcode_count(100) == 1
+
+    assert await storage.allocate_barcodes_bulk([(2, 1), (1, 2)]) == [
+        ["11111111113"],
+        ["11111111112", "X-1"],
+    ]
+    assert await storage.get_vouchers() == {
+        (1, 100): ["11111111111", "11111111112", "X-1"],
+        (2, 200): ["11111111113"],
+    }
+    assert await storage.get_customer_barcode_count(100) == 3
+    assert await storage.get_unused_barcodes() == set()
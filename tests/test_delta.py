@@ -0,0 +1,233 @@
+from logging import Logger
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.compact_storage import CompactOrderStorage
+from vouchers_cli.delta import DeltaState
+from vouchers_cli.extractor import VouchersExtractor
+from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import ExtractorConfig
+from vouchers_cli.storage import OrderStorage
+
+ORDERS = "order_id,customer_id\n1,10\n2,20\n3,10\n"
+BARCODES = "barcode,order_id\n111,1\n222,\n333,2\n"
+
+
+@pytest.fixture
+def input_files(tmp_path: Path) -> tuple[Path, Path]:
+    """
+    Small orders and barcodes files that tests append to.
+    """
+    orders = tmp_path / "orders.csv"
+    barcodes = tmp_path / "barcodes.csv"
+    orders.write_text(ORDERS)
+    barcodes.write_text(BARCODES)
+    return orders, barcodes
+
+
+def append(file_path: Path, content: str) -> None:
+    with open(file_path, "a", encoding="utf-8") as file:
+        file.write(content)
+
+
+async def run(
+    input_files: tuple[Path, Path],
+    state_path: Path,
+    logger: Logger,
+    storage: type[OrderStorage] = OrderStorage,
+) -> tuple[dict[tuple[int, int], list[str]], set[str], list[tuple[int, int]]]:
+    """
+    Load the input files in delta mode, save the state and return the vouchers
+    of this run, the unused barcodes and the full customer ranking.
+    """
+    repository = Repository(
+        *input_files,
+        logger,
+        AsyncCSVReader(logger),
+        storage(logger),
+        delta=DeltaState(state_path, logger, chunk_size=8),
+    )
+    result = (
+        await repository.get_vouchers(),
+        await repository.get_unused_barcodes(),
+        await repository.get_top_customers(100),
+    )
+    await repository.save_state()
+    return result
+
+
+async def full_load(
+    input_files: tuple[Path, Path], logger: Logger
+) -> tuple[set[str], list[tuple[int, int]]]:
+    """
+    Load the input files without delta mode.
+    """
+    repository = Repository(
+        *input_files, logger, AsyncCSVReader(logger), OrderStorage(logger)
+    )
+    return (
+        await repository.get_unused_barcodes(),
+        await repository.get_top_customers(100),
+    )
+
+
+@pytest.mark.parametrize("storage", [OrderStorage, CompactOrderStorage])
+async def test_delta_loads_only_appended_lines(
+    input_files: tuple[Path, Path],
+    tmp_path: Path,
+    mock_logger: Logger,
+    storage: type[OrderStorage],
+) -> None:
+    """
+    Test that a second run only yields new barcodes, while top customers and
+    unused barcodes cover both runs.
+    """
+    state_path = tmp_path / "state"
+    first = await run(input_files, state_path, mock_logger, storage)
+    assert first[0] == {(1, 10): ["111"], (2, 20): ["333"]}
+
+    append(input_files[0], "4,30\n5,30\n")
+    append(input_files[1], "44ü,1\n555,4\n666,\n777,3\n")
+    vouchers, unused, ranking = await run(input_files, state_path, mock_logger, storage)
+
+    assert vouchers == {(1, 10): ["44ü"], (4, 30): ["555"], (3, 10): ["777"]}
+    assert (unused, ranking) == await full_load(input_files, mock_logger)
+
+    # Nothing appended: nothing new to write
+    assert (await run(input_files, state_path, mock_logger, storage))[0] == {}
+
+
+async def test_delta_keeps_partial_line_for_next_run(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a line still being written is loaded once it is complete.
+    """
+    state_path = tmp_path / "state"
+    await run(input_files, state_path, mock_logger)
+
+    append(input_files[1], "888,3\n999,")
+    assert (await run(input_files, state_path, mock_logger))[0] == {(3, 10): ["888"]}
+
+    append(input_files[1], "1\n")
+    assert (await run(input_files, state_path, mock_logger))[0] == {(1, 10): ["999"]}
+
+
+async def test_delta_retries_barcodes_of_later_orders(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a barcode line whose order is only appended by a later run is
+    kept in the state and stored once the order is loaded.
+    """
+    state_path = tmp_path / "state"
+    append(input_files[1], "888,9\n")
+    assert (await run(input_files, state_path, mock_logger))[0] == {
+        (1, 10): ["111"],
+        (2, 20): ["333"],
+    }
+
+    # Still unknown after a run that appends nothing
+    assert (await run(input_files, state_path, mock_logger))[0] == {}
+
+    append(input_files[0], "9,40\n")
+    append(input_files[1], "999,9\n")
+    vouchers, unused, ranking = await run(input_files, state_path, mock_logger)
+
+    assert vouchers == {(9, 40): ["888", "999"]}
+    assert (unused, ranking) == await full_load(input_files, mock_logger)
+    assert (await run(input_files, state_path, mock_logger))[0] == {}
+
+
+async def test_delta_rebuilds_rewritten_input(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a change before the recorded offset loads the files from scratch.
+    """
+    state_path = tmp_path / "state"
+    await run(input_files, state_path, mock_logger)
+
+    input_files[1].write_text(BARCODES.replace("111", "112"))
+    vouchers, unused, ranking = await run(input_files, state_path, mock_logger)
+
+    assert vouchers == {(1, 10): ["112"], (2, 20): ["333"]}
+    assert (unused, ranking) == await full_load(input_files, mock_logger)
+
+
+async def test_delta_rebuilds_truncated_or_other_input(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a truncated file, or state recorded for other files, loads the
+    files from scratch.
+    """
+    state_path = tmp_path / "state"
+    await run(input_files, state_path, mock_logger)
+
+    input_files[0].write_text(ORDERS[:-10])
+    assert (await run(input_files, state_path, mock_logger))[0] == {(1, 10): ["111"]}
+
+    other = tmp_path / "other.csv"
+    other.write_text(ORDERS)
+    vouchers = (await run((other, input_files[1]), state_path, mock_logger))[0]
+    assert vouchers == {(1, 10): ["111"], (2, 20): ["333"]}
+
+
+@pytest.mark.parametrize("content", [b"", b"not a delta state"])
+async def test_delta_ignores_unreadable_state(
+    input_files: tuple[Path, Path],
+    tmp_path: Path,
+    mock_logger: Logger,
+    content: bytes,
+) -> None:
+    """
+    Test that an empty or corrupt state file loads the files from scratch.
+    """
+    state_path = tmp_path / "state"
+    state_path.write_bytes(content)
+
+    vouchers = (await run(input_files, state_path, mock_logger))[0]
+    assert vouchers == {(1, 10): ["111"], (2, 20): ["333"]}
+
+
+async def test_extractor_saves_delta_state(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a delta run of the extractor records its state after writing.
+    """
+    config = ExtractorConfig(
+        orders_file_path=input_files[0],
+        barcodes_file_path=input_files[1],
+        output_dir=tmp_path / "output",
+        delta_state=tmp_path / "state",
+    )
+    await VouchersExtractor.create(config, mock_logger).run()
+
+    assert (tmp_path / "state").stat().st_size > 0
+
+
+async def test_delta_customer_lookup_returns_new_barcodes(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that per-customer lookups in delta mode only cover new barcodes.
+    """
+    state_path = tmp_path / "state"
+    await run(input_files, state_path, mock_logger)
+
+    append(input_files[1], "444,3\n")
+    repository = Repository(
+        *input_files,
+        mock_logger,
+        AsyncCSVReader(mock_logger),
+        OrderStorage(mock_logger),
+        delta=DeltaState(state_path, mock_logger),
+    )
+
+    assert await repository.get_customer_vouchers(10) == {3: ["444"]}
+    assert await repository.get_customer_barcode_count(10) == 1
+    assert await repository.get_customer_vouchers(20) == {}
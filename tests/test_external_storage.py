@@ -0,0 +1,143 @@
+import random
+from logging import Logger
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.external_storage import (
+    ExternalSorter,
+    ExternalSortStorage,
+    MemoryBudget,
+)
+from vouchers_cli.storage import OrderStorage
+
+
+async def test_external_storage_matches_order_storage(
+    mock_logger: Logger, tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """
+    Test that ExternalSortStorage returns the same vouchers, in the same order,
+    unused barcodes, top customers and customer lookups as OrderStorage.
+    """
+    rows = [
+        ("11111111111", "2"),
+        ("ABC-1", "1"),
+        ("00042", "2"),
+        ("11111111112", ""),
+        ("11111111111", "1"),  # Duplicate of a used barcode
+        ("11111111112", "1"),  # Duplicate of an unused barcode
+        ("11111111113", "3"),  # Unknown order
+        ("11111111113", "1"),  # Not a duplicate: the unknown-order row was dropped
+        ("11111111114", "4"),  # Customer 0 is treated as missing
+        ("11111111115", "2"),
+        ("11111111115", ""),  # Duplicate inside the batch
+    ]
+
+    reference = OrderStorage(mock_logger)
+    external = ExternalSortStorage(mock_logger, memory_limit=1, temp_dir=tmp_path)
+    for storage in (reference, external):
+        await storage.store_orders_bulk([(1, 100), (2, 200), (4, 0), (5, 200)])
+        await storage.store_orders_bulk([(5, 100)])  # Moves order 5
+        await storage.store_barcodes_bulk(rows[:4])
+        await storage.store_barcodes_bulk(rows[4:])
+
+    caplog.clear()  # The reference logged its duplicates while storing
+    vouchers = await external.get_vouchers()
+    assert list(vouchers.items()) == list((await reference.get_vouchers()).items())
+    assert vouchers == {
+        (2, 200): ["11111111111", "00042", "11111111115"],
+        (1, 100): ["ABC-1", "11111111113"],
+    }
+    assert await external.get_unused_barcodes() == {"11111111112"}
+    assert await external.get_unused_barcode_count() == 1
+    assert await external.get_top_customers(2) == [(100, 2), (200, 1)]
+    assert await external.get_top_customers(10) == await reference.get_top_customers(10)
+    for order_id in (1, 2, 3, 4, 5):
+        assert await external.get_order_voucher(
+            order_id
+        ) == await reference.get_order_voucher(order_id)
+    assert await external.get_order_voucher(1) == (100, ["ABC-1", "11111111113"])
+    for customer_id in (0, 100, 200, 300):
+        assert await external.get_customer_vouchers(
+            customer_id
+        ) == await reference.get_customer_vouchers(customer_id)
+        assert await external.get_customer_barcode_count(
+            customer_id
+        ) == await reference.get_customer_barcode_count(customer_id)
+
+    # Duplicates are logged once per extra row, in barcode order
+    assert external.duplicate_count == reference.duplicate_count == 3
+    assert [record.message for record in caplog.records] == [
+        "Duplicate barcode: 11111111111",
+        "Duplicate barcode: 11111111112",
+        "Duplicate barcode: 11111111115",
+    ]
+    with pytest.raises(ValueError, match="does not support allocation"):
+        await external.allocate_barcodes(1, 1)
+
+
+@pytest.mark.parametrize("memory_limit", [1, 4_000, 1 << 30])
+async def test_external_storage_matches_random_loads(
+    mock_logger: Logger, tmp_path: Path, memory_limit: int
+) -> None:
+    """
+    Test ExternalSortStorage against OrderStorage on random orders and barcodes
+    with many duplicates, unknown and re-assigned orders, whether every row is
+    spilled, some are or none are.
+    """
+    rng = random.Random(7)
+    orders = [(rng.randrange(40), rng.randrange(10)) for _ in range(60)]
+    rows = [
+        (str(rng.randrange(150)), str(rng.randrange(50)) if rng.random() < 0.8 else "")
+        for _ in range(300)
+    ]
+
+    reference = OrderStorage(mock_logger)
+    external = ExternalSortStorage(mock_logger, memory_limit, temp_dir=tmp_path)
+    for storage in (reference, external):
+        await storage.store_orders_bulk(orders[:30])
+        await storage.store_orders_bulk([*orders[30:], (1_000, 9)])
+        await storage.store_barcodes_bulk(rows[:150])
+        await storage.merge_barcodes({(1_000, 9): ["x", "1"]}, {"x", "1"}, {"y"})
+        await storage.store_barcodes_bulk(rows[150:])
+
+    assert list((await external.get_vouchers()).items()) == list(
+        (await reference.get_vouchers()).items()
+    )
+    assert await external.get_unused_barcodes() == await reference.get_unused_barcodes()
+    assert await external.get_top_customers(100) == await reference.get_top_customers(
+        100
+    )
+
+    # Storing more rows invalidates the merged results
+    for storage in (reference, external):
+        await storage.store_barcodes_bulk([("new", "1"), ("new-unused", "")])
+    assert list((await external.get_vouchers()).items()) == list(
+        (await reference.get_vouchers()).items()
+    )
+    assert await external.get_unused_barcodes() == await reference.get_unused_barcodes()
+
+
+async def test_external_sorter_spills_within_budget(tmp_path: Path) -> None:
+    """
+    Test that sorters spill their largest buffer to sorted runs once the shared
+    budget is exceeded, merge runs back in order and delete them on close.
+    """
+    budget = MemoryBudget(limit=100)
+    small, large = ExternalSorter(tmp_path, budget), ExternalSorter(tmp_path, budget)
+    rows = [(value,) for value in random.Random(3).sample(range(20_000), 10_000)]
+
+    small.add((5,), 10)
+    for start in range(0, len(rows), 1_000):
+        large.extend(rows[start : start + 1_000], 60)
+    # Every second batch exceeds the budget and spills `large`, never `small`
+    assert budget.used == small.buffered_bytes == 10
+    assert len(list(tmp_path.iterdir())) == 5
+
+    assert list(large) == sorted(rows)
+    assert list(small) == [(5,)]
+
+    large.close()
+    small.close()
+    assert budget.used == 0
+    assert list(tmp_path.iterdir()) == []
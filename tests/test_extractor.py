@@ -1,7 +1,33 @@
+import bz2
+import gzip
+import json
+import logging
+from pathlib import Path
 from unittest.mock import AsyncMock
 
-from vouchers_cli.extractor import VouchersExtractor
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import pytest
+
+from vouchers_cli.arrow_reader import ArrowFileReader
+from vouchers_cli.arrow_writer import ParquetFileWriter
+from vouchers_cli.async_writer import (
+    FileWriter,
+    GzipFileWriter,
+    PartitionedFileWriter,
+    ZstdFileWriter,
+)
+from vouchers_cli.compact_storage import CompactOrderStorage
+from vouchers_cli.delta import DeltaState
+from vouchers_cli.external_storage import ExternalSortStorage
+from vouchers_cli.extractor import VouchersExtractor, VoucherStream
+from vouchers_cli.mmap_reader import MmapCSVReader
+from vouchers_cli.numpy_storage import NumpyOrderStorage
+from vouchers_cli.options import CSVReader, OutputFormat, StorageBackend
 from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import ExtractorConfig, Voucher
+from vouchers_cli.snapshot import SnapshotCache, SnapshotStorage
+from vouchers_cli.sqlite_storage import SqliteOrderStorage
 
 
 async def test_extract_data(
@@ -11,13 +37,17 @@ async def test_extract_data(
     Test the _extract_data method to ensure it processes data correctly.
     """
     output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
 
     # Assert the extracted data is correct
-    assert len(output.vouchers) == 204
+    assert len(vouchers) == 204
     assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
-    assert len(output.unused_barcodes) == 98
-    assert output.vouchers[0].customer_id == 10
-    assert output.vouchers[1].customer_id == 11
+    assert output.unused_barcode_count == 98
+    assert vouchers[0].customer_id == 10
+    assert vouchers[1].customer_id == 11
+
+    # The voucher stream can be consumed by more than one writer
+    assert len([voucher async for voucher in output.vouchers]) == 204
 
 
 async def test_run(
@@ -37,3 +67,406 @@ async def test_run(
     # Check that the writers' write methods are called with the correct data
     for writer in mock_writers:
         writer.write.assert_called_once()
+
+
+async def test_create_with_compact_storage(mock_logger: logging.Logger) -> None:
+    """
+    Test that the compact storage backend is selectable and yields the same output.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        storage=StorageBackend.COMPACT,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    assert isinstance(extractor._repository._storage, CompactOrderStorage)
+    assert len(vouchers) == 204
+    assert vouchers[0].customer_id == 10
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_numpy_storage(mock_logger: logging.Logger) -> None:
+    """
+    Test that the numpy storage backend is selectable and yields the same output.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        storage=StorageBackend.NUMPY,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    assert isinstance(extractor._repository._storage, NumpyOrderStorage)
+    assert len(vouchers) == 204
+    assert vouchers[0].customer_id == 10
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_sqlite_storage(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that the sqlite storage backend is selectable, bypasses the snapshot
+    cache and yields the same output.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        storage=StorageBackend.SQLITE,
+        cache_dir=tmp_path / "cache",
+        sqlite_path=tmp_path / "vouchers.sqlite3",
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    assert isinstance(extractor._repository._storage, SqliteOrderStorage)
+    assert extractor._repository._cache is None
+    assert (tmp_path / "vouchers.sqlite3").exists()
+    assert len(vouchers) == 204
+    assert vouchers[0].customer_id == 10
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_external_storage(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that the external storage backend is selectable with a memory limit,
+    bypasses the snapshot cache and yields the same output.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        storage=StorageBackend.EXTERNAL,
+        cache_dir=tmp_path / "cache",
+        memory_limit=64,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    storage = extractor._repository._storage
+    assert isinstance(storage, ExternalSortStorage)
+    assert storage._budget.limit == 64 << 20
+    assert extractor._repository._cache is None
+    assert len(vouchers) == 204
+    assert vouchers[0].customer_id == 10
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_compressed_input(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that compressed input files are streamed through the CSV reader and
+    yield the same output as the plain files.
+    """
+    orders_path = tmp_path / "orders.csv.gz"
+    barcodes_path = tmp_path / "barcodes.csv.bz2"
+    orders_path.write_bytes(gzip.compress(Path("data/orders.csv").read_bytes()))
+    barcodes_path.write_bytes(bz2.compress(Path("data/barcodes.csv").read_bytes()))
+    config = ExtractorConfig(
+        orders_file_path=orders_path,
+        barcodes_file_path=barcodes_path,
+        output_dir=Path("output"),
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    assert len(vouchers) == 204
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_mmap_reader(mock_logger: logging.Logger) -> None:
+    """
+    Test that the memory-mapped CSV reader is selectable and yields the same output.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        csv_reader=CSVReader.MMAP,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    assert isinstance(extractor._repository._reader, MmapCSVReader)
+    assert len(vouchers) == 204
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_columnar_input(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that Parquet input files are read by the Arrow reader and yield the
+    same output as the CSV files they were converted from.
+    """
+    orders_path = tmp_path / "orders.parquet"
+    barcodes_path = tmp_path / "barcodes.parquet"
+    pq.write_table(pa_csv.read_csv("data/orders.csv"), orders_path)
+    pq.write_table(pa_csv.read_csv("data/barcodes.csv"), barcodes_path)
+    config = ExtractorConfig(
+        orders_file_path=orders_path,
+        barcodes_file_path=barcodes_path,
+        output_dir=Path("output"),
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    output = await extractor._extract_data()
+    vouchers = [voucher async for voucher in output.vouchers]
+
+    assert isinstance(extractor._repository._reader, ArrowFileReader)
+    assert len(vouchers) == 204
+    assert output.top_customers == [(10, 8), (60, 8), (56, 7), (59, 7), (19, 6)]
+    assert output.unused_barcode_count == 98
+
+
+async def test_create_with_snapshot_cache(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that a configured cache directory gives the repository a snapshot cache.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        cache_dir=tmp_path,
+        rebuild_cache=True,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    assert isinstance(extractor._repository._cache, SnapshotCache)
+    assert extractor._repository._rebuild_cache is True
+
+
+async def test_warm_run_reports_cold_run_duplicates(
+    mock_logger: logging.Logger,
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture[str],
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    """
+    Test that a warm run served from the snapshot prints the same summary,
+    logs the same duplicate barcodes and reports the same metrics as the cold
+    run that built it.
+    """
+    runs = []
+    for run in ("cold", "warm"):
+        config = ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=tmp_path / "output",
+            cache_dir=tmp_path / "cache",
+            metrics_json=tmp_path / f"{run}.json",
+        )
+        caplog.clear()
+        extractor = VouchersExtractor.create(config, mock_logger)
+        await extractor.run()
+        duplicates = [
+            record.message
+            for record in caplog.records
+            if record.message.startswith("Duplicate barcode")
+        ]
+        counters = json.loads((tmp_path / f"{run}.json").read_text())["counters"]
+        runs.append(
+            (capsys.readouterr().out, duplicates, counters["duplicate_barcodes"])
+        )
+
+    assert isinstance(extractor._repository._storage, SnapshotStorage)
+    assert runs[1] == runs[0]
+    assert len(runs[0][1]) == runs[0][2] == 5
+
+
+async def test_create_with_delta_state(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that a configured delta state file gives the repository a delta state.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+        delta_state=tmp_path / "state",
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    assert isinstance(extractor._repository._delta, DeltaState)
+
+
+async def test_voucher_stream_with_validation(
+    extractor: VouchersExtractor,
+) -> None:
+    """
+    Test that the validated output path yields the same vouchers as the fast path.
+    """
+    fast = [voucher async for voucher in VoucherStream(extractor._repository)]
+    validated = [
+        voucher async for voucher in VoucherStream(extractor._repository, validate=True)
+    ]
+
+    assert validated == fast
+    assert isinstance(fast[0], Voucher)
+
+
+async def test_run_writes_metrics(mock_logger: logging.Logger, tmp_path: Path) -> None:
+    """
+    Test that a run records every pipeline stage and writes the metrics as JSON
+    and in the Prometheus text format at exit.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=tmp_path / "output",
+        metrics_json=tmp_path / "metrics" / "run.json",
+        metrics_prometheus=tmp_path / "metrics" / "run.prom",
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    await extractor.run()
+
+    metrics = json.loads((tmp_path / "metrics" / "run.json").read_text())
+    assert set(metrics["stages"]) == {
+        "extract",
+        "load",
+        "csv_read",
+        "csv_parse",
+        "store",
+        "write.STDOutWriter",
+        "write.FileWriter",
+    }
+    counters = metrics["counters"]
+    assert counters["bytes_read"] == sum(
+        path.stat().st_size
+        for path in (config.orders_file_path, config.barcodes_file_path)
+    )
+    assert counters["rows_parsed"] == (
+        counters["orders_stored"] + counters["barcodes_stored"]
+    )
+    assert counters["vouchers_written"] == 204
+    assert counters["duplicate_barcodes"] == 5
+    assert metrics["rates"]["rows_per_second"] > 0
+    assert metrics["peak_rss_bytes"] > 0
+
+    prometheus = (tmp_path / "metrics" / "run.prom").read_text()
+    assert 'vouchers_stage_seconds{stage="load"} ' in prometheus
+    assert "vouchers_vouchers_written_total 204\n" in prometheus
+
+
+async def test_run_metrics_with_workers(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that duplicates dropped inside the shards of a parallel load, the bytes
+    and rows read by the workers and the stored rows are counted in the metrics
+    like in a sequential run.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=tmp_path / "output",
+        metrics_json=tmp_path / "run.json",
+        workers=2,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    await extractor.run()
+
+    counters = json.loads((tmp_path / "run.json").read_text())["counters"]
+    assert counters["vouchers_written"] == 204
+    assert counters["duplicate_barcodes"] == 5
+    assert counters["bytes_read"] == sum(
+        path.stat().st_size
+        for path in (config.orders_file_path, config.barcodes_file_path)
+    )
+    assert counters["rows_parsed"] == (
+        counters["orders_stored"] + counters["barcodes_stored"]
+    )
+    assert counters["barcodes_stored"] > counters["orders_stored"] > 0
+
+
+@pytest.mark.parametrize(
+    ("output_format", "writer_class", "suffix"),
+    [
+        (OutputFormat.TEXT, FileWriter, ".log"),
+        (OutputFormat.GZIP, GzipFileWriter, ".log.gz"),
+        (OutputFormat.ZSTD, ZstdFileWriter, ".log.zst"),
+        (OutputFormat.PARQUET, ParquetFileWriter, ".parquet"),
+    ],
+)
+async def test_create_with_output_format(
+    mock_logger: logging.Logger,
+    tmp_path: Path,
+    output_format: OutputFormat,
+    writer_class: type,
+    suffix: str,
+) -> None:
+    """
+    Test that the output format selects the file writer, whose stage is timed
+    under its own name.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=tmp_path / "output",
+        output_format=output_format,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    await extractor.run()
+
+    assert type(extractor._writers[1]) is writer_class
+    (file_path,) = (tmp_path / "output").iterdir()
+    assert file_path.name.endswith(suffix)
+    assert f"write.{writer_class.__name__}" in extractor.metrics.stages
+    assert extractor.metrics.counters["vouchers_written"] == 204
+
+
+async def test_create_with_output_partitions(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test that partitioned output writes the vouchers of the sample data into
+    the configured number of files.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=tmp_path / "output",
+        output_partitions=4,
+    )
+    extractor = VouchersExtractor.create(config, mock_logger)
+
+    await extractor.run()
+
+    assert isinstance(extractor._writers[1], PartitionedFileWriter)
+    (directory,) = (tmp_path / "output").iterdir()
+    manifest = json.loads((directory / "manifest.json").read_text())
+    assert manifest["vouchers"] == 204
+    assert len(manifest["files"]) == 4
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.metrics import Metrics
+
+
+async def test_metrics_stages_and_counters() -> None:
+    """
+    Test that stages accumulate time, also when their block fails, and that
+    counters and derived rates are reported.
+    """
+    metrics = Metrics()
+    for _ in range(2):
+        with metrics.stage("load"):
+            metrics.count("orders_stored", 10)
+            metrics.count("barcodes_stored", 30)
+    with pytest.raises(RuntimeError), metrics.stage("csv_read"):
+        metrics.count("bytes_read", 1_000)
+        raise RuntimeError
+    metrics.count("duplicate_barcodes")
+
+    result = metrics.to_dict()
+
+    assert set(result["stages"]) == {"load", "csv_read"}
+    assert result["counters"] == {
+        "orders_stored": 20,
+        "barcodes_stored": 60,
+        "bytes_read": 1_000,
+        "duplicate_barcodes": 1,
+    }
+    assert result["rates"]["rows_per_second"] == pytest.approx(
+        80 / result["stages"]["load"]["seconds"]
+    )
+    assert result["rates"]["bytes_read_per_second"] == pytest.approx(
+        1_000 / result["stages"]["csv_read"]["seconds"]
+    )
+    assert result["peak_rss_bytes"] > 1 << 20
+
+
+async def test_metrics_without_rows() -> None:
+    """
+    Test that rates are left out when nothing was loaded.
+    """
+    assert Metrics().to_dict()["rates"] == {}
+
+
+async def test_metrics_writes_json_and_prometheus(tmp_path: Path) -> None:
+    """
+    Test the JSON and Prometheus text outputs.
+    """
+    metrics = Metrics()
+    metrics.stages["write.FileWriter"] = 1.5
+    metrics.count("rows_parsed", 42)
+
+    metrics.write_json(tmp_path / "nested" / "metrics.json")
+    metrics.write_prometheus(tmp_path / "nested" / "metrics.prom")
+
+    written = json.loads((tmp_path / "nested" / "metrics.json").read_text())
+    assert written["stages"] == {"write.FileWriter": {"seconds": 1.5}}
+    assert written["counters"] == {"rows_parsed": 42}
+
+    lines = (tmp_path / "nested" / "metrics.prom").read_text().splitlines()
+    assert 'vouchers_stage_seconds{stage="write.FileWriter"} 1.5' in lines
+    assert "# TYPE vouchers_rows_parsed_total counter" in lines
+    assert "vouchers_rows_parsed_total 42" in lines
+    assert lines[-1].startswith("vouchers_peak_rss_bytes ")
@@ -0,0 +1,115 @@
+import logging
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.mmap_reader import MmapCSVReader, scan_chunk
+
+
+@pytest.mark.parametrize("chunk_size", [16, 1024, 1024 * 1024])
+async def test_mmap_reader_matches_csv_reader(
+    mock_logger: logging.Logger, chunk_size: int
+) -> None:
+    """
+    Test that MmapCSVReader yields the same columns as AsyncCSVReader for the
+    sample files, whatever the chunk size, and counts the same bytes and rows.
+    """
+    stream = AsyncCSVReader(mock_logger)
+    mapped = MmapCSVReader(mock_logger, chunk_size=chunk_size)
+
+    for method in ("iter_orders", "iter_barcodes"):
+        path = Path(
+            "data/orders.csv" if method == "iter_orders" else "data/barcodes.csv"
+        )
+        expected = [
+            list(zip(*columns, strict=True))
+            async for columns in getattr(stream, method)(path, 7)
+        ]
+        result = [
+            list(zip(*columns, strict=True))
+            async for columns in getattr(mapped, method)(path, 7)
+        ]
+        assert result == expected
+
+    assert mapped._metrics.counters == stream._metrics.counters
+
+
+async def test_mmap_reader_irregular_lines(
+    mock_logger: logging.Logger, tmp_path: Path
+) -> None:
+    """
+    Test CRLF line endings, blank lines, quoted fields, a missing trailing
+    newline and lines longer than a chunk.
+    """
+    file_path = tmp_path / "barcodes.csv"
+    file_path.write_bytes(
+        b"barcode,order_id\r\n"
+        b"11111111111,1\r\n"
+        b"\r\n"
+        b'"22,22",2\n'
+        b'"multi\nline",\n' + b"3" * 40 + b",3\n"
+        b"44444444444,"
+    )
+    reader = MmapCSVReader(mock_logger, chunk_size=16)
+
+    batches = [columns async for columns in reader.iter_barcodes(file_path, 2)]
+
+    assert [len(barcodes) for barcodes, _ in batches] == [2, 2, 1]
+    assert [row for columns in batches for row in zip(*columns, strict=True)] == [
+        ("11111111111", 1),
+        ("22,22", 2),
+        ("multi\nline", None),
+        ("3" * 40, 3),
+        ("44444444444", None),
+    ]
+
+
+@pytest.mark.parametrize("content", [b"", b"order_id,customer_id", b"header\n\n"])
+async def test_mmap_reader_without_rows(
+    mock_logger: logging.Logger, tmp_path: Path, content: bytes
+) -> None:
+    """
+    Test that empty and header-only files yield no batches.
+    """
+    file_path = tmp_path / "orders.csv"
+    file_path.write_bytes(content)
+    reader = MmapCSVReader(mock_logger)
+
+    assert [columns async for columns in reader.iter_orders(file_path)] == []
+
+
+async def test_mmap_reader_file_not_found(
+    mock_logger: logging.Logger, caplog: pytest.LogCaptureFixture
+) -> None:
+    """
+    Test that a missing file is logged and yields nothing.
+    """
+    reader = MmapCSVReader(mock_logger)
+
+    batches = [columns async for columns in reader.iter_orders(Path("missing.csv"))]
+
+    assert batches == []
+    assert "File not found: missing.csv" in caplog.text
+
+
+async def test_scan_chunk_splits_columns() -> None:
+    """
+    Test the byte-level fast path and its csv fallback.
+    """
+    assert scan_chunk(b"1,10\n2,20\n") == ([b"1", b"2"], [b"10", b"20"])
+    assert scan_chunk(b'"1",10\n') == ([b"1"], [b"10"])
+    assert scan_chunk(b"\n\n") == ([], [])
+    assert scan_chunk(b"1,10\n\n2,20") == ([b"1", b"2"], [b"10", b"20"])
+
+
+@pytest.mark.parametrize(
+    "chunk", [b"a,b,c\nd", b"1,10\n2\n3,30,4", b"1,10\n2", b'"1",10,5\n']
+)
+async def test_scan_chunk_rejects_ragged_rows(chunk: bytes) -> None:
+    """
+    Test that rows without exactly two fields raise instead of shifting the
+    columns, also when the chunk's total field count is even.
+    """
+    with pytest.raises(ValueError, match="Expected 2 fields"):
+        scan_chunk(chunk)
@@ -0,0 +1,168 @@
+import random
+from logging import Logger
+
+import pytest
+
+from vouchers_cli import numpy_storage
+from vouchers_cli.numpy_storage import NumpyOrderStorage
+from vouchers_cli.storage import OrderStorage
+
+
+async def test_numpy_storage_matches_order_storage(mock_logger: Logger) -> None:
+    """
+    Test that NumpyOrderStorage returns the same vouchers, in the same order,
+    and unused barcodes as OrderStorage.
+    """
+    rows = [
+        ("11111111111", "2"),
+        ("ABC-1", "1"),
+        ("00042", "2"),
+        ("11111111112", ""),
+        ("11111111111", "1"),  # Duplicate of a used barcode
+        ("11111111112", "1"),  # Duplicate of an unused barcode
+        ("11111111113", "3"),  # Unknown order
+        ("11111111113", "1"),  # Not a duplicate: the unknown-order row was dropped
+        ("11111111114", "4"),  # Customer 0 is treated as missing
+        ("11111111115", "2"),
+    ]
+
+    reference = OrderStorage(mock_logger)
+    vectorized = NumpyOrderStorage(mock_logger)
+    for storage in (reference, vectorized):
+        await storage.store_orders_bulk([(1, 100), (2, 200), (4, 0)])
+        await storage.store_barcodes_bulk(rows[:4])
+        await storage.store_barcodes_bulk(rows[4:])
+
+    vouchers = await vectorized.get_vouchers()
+    assert list(vouchers.items()) == list((await reference.get_vouchers()).items())
+    assert vouchers == {
+        (2, 200): ["11111111111", "00042", "11111111115"],
+        (1, 100): ["ABC-1", "11111111113"],
+    }
+    assert await vectorized.get_unused_barcodes() == {"11111111112"}
+    for customer_id in (0, 100, 200):
+        assert await vectorized.get_customer_vouchers(
+            customer_id
+        ) == await reference.get_customer_vouchers(customer_id)
+    assert await vectorized.get_customer_barcode_count(200) == 3
+
+
+async def test_numpy_storage_matches_random_loads(mock_logger: Logger) -> None:
+    """
+    Test NumpyOrderStorage against OrderStorage on random data with many
+    duplicates, unknown orders and re-stored orders.
+    """
+    rng = random.Random(7)
+    orders = [(rng.randrange(60), rng.randrange(1, 8)) for _ in range(50)]
+    rows = [
+        (str(rng.randrange(120)), "" if rng.random() < 0.2 else str(rng.randrange(70)))
+        for _ in range(500)
+    ]
+
+    reference = OrderStorage(mock_logger)
+    vectorized = NumpyOrderStorage(mock_logger)
+    for storage in (reference, vectorized):
+        await storage.store_orders_bulk(orders)
+        for start in range(0, len(rows), 64):
+            await storage.store_barcodes_bulk(rows[start : start + 64])
+
+    expected = await reference.get_vouchers()
+    assert list((await vectorized.get_vouchers()).items()) == list(expected.items())
+    assert (
+        await vectorized.get_unused_barcodes() == await reference.get_unused_barcodes()
+    )
+
+
+async def test_numpy_storage_rejoins_after_new_barcodes(mock_logger: Logger) -> None:
+    """
+    Test that barcodes stored after a read are included in the next join, and
+    that the typed column API is supported.
+    """
+    storage = NumpyOrderStorage(mock_logger)
+    assert await storage.get_vouchers() == {}
+    assert await storage.get_unused_barcodes() == set()
+
+    await storage.store_order(1, 100)
+    await storage.store_barcode("11111111111", "1")
+    assert await storage.get_vouchers() == {(1, 100): ["11111111111"]}
+    assert await storage.get_customer_vouchers(100) == {1: ["11111111111"]}
+
+    await storage.store_barcode_columns(["11111111112", "11111111111"], [None, 1])
+    await storage.store_barcode_columns([], [])
+    assert await storage.get_vouchers() == {(1, 100): ["11111111111"]}
+    await storage.store_barcode_columns(["11111111113"], [1])
+    assert await storage.get_customer_barcode_count(100) == 2
+    assert await storage.get_unused_barcodes() == {"11111111112"}
+
+
+async def test_numpy_storage_merge_barcodes(mock_logger: Logger) -> None:
+    """
+    Test that merged partial states are deduplicated against earlier barcodes.
+    """
+    storage = NumpyOrderStorage(mock_logger)
+    await storage.store_orders_bulk([(1, 100), (2, 200)])
+    await storage.merge_barcodes({(1, 100): ["A", "B"]}, {"A", "B"}, {"C"})
+    await storage.merge_barcodes({(2, 200): ["B", "D"]}, {"B", "D"}, {"C", "E"})
+
+    assert await storage.get_vouchers() == {(1, 100): ["A", "B"], (2, 200): ["D"]}
+    assert await storage.get_unused_barcodes() == {"C", "E"}
+
+
+async def test_numpy_storage_requires_numpy(
+    mock_logger: Logger, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that a clear error is raised when numpy is not installed.
+    """
+    monkeypatch.setattr(numpy_storage, "np", None)
+
+    with pytest.raises(ValueError, match="optional 'numpy' package"):
+        NumpyOrderStorage(mock_logger)
+
+
+async def test_numpy_storage_allocate_barcodes(mock_logger: Logger) -> None:
+    """
+    Test that allocations take the last unused barcodes of the join and are
+    appended to existing vouchers or start new ones.
+    """
+    storage = NumpyOrderStorage(mock_logger)
+    await storage.store_orders_bulk([(1, 100), (2, 200)])
+    await storage.store_barcodes_bulk(
+        [("11111111111", "1"), ("A", ""), ("B", ""), ("C", ""), ("A", "")]
+    )
+    assert await storage.get_customer_barcode_count(100) == 1
+
+    assert await storage.allocate_barcodes_bulk([(2, 1), (1, 1)]) == [["B"], ["C"]]
+    assert list((await storage.get_vouchers()).items()) == [
+        ((1, 100), ["11111111111", "C"]),
+        ((2, 200), ["B"]),
+    ]
+    assert await storage.get_customer_barcode_count(100) == 2
+    assert await storage.get_unused_barcodes() == {"A"}
+    assert await storage.allocate_barcodes(1, 1) == ["A"]
+    assert await storage.allocate_barcodes(1, 0) == []
+    assert await NumpyOrderStorage(mock_logger).allocate_barcodes_bulk([]) == []
+
+
+async def test_numpy_storage_reports_duplicates_once(mock_logger: Logger) -> None:
+    """
+    Test that joins after an allocation neither report duplicates again nor let
+    a dropped duplicate take the place of its allocated barcode.
+    """
+    reference = OrderStorage(mock_logger)
+    storage = NumpyOrderStorage(mock_logger)
+    for target in (reference, storage):
+        await target.store_orders_bulk([(1, 100), (2, 200)])
+        await target.store_barcodes_bulk([("A", ""), ("A", "1"), ("B", ""), ("C", "")])
+        assert await target.get_vouchers() == {}
+
+        for _ in range(3):
+            await target.allocate_barcodes(2, 1)
+            await target.get_vouchers()
+
+    vouchers = await storage.get_vouchers()
+    assert {key: sorted(codes) for key, codes in vouchers.items()} == {
+        (2, 200): ["A", "B", "C"]
+    }
+    assert await storage.get_unused_barcodes() == set()
+    assert storage.duplicate_count == reference.duplicate_count == 1
@@ -0,0 +1,220 @@
+import random
+from itertools import pairwise
+from logging import Logger
+from pathlib import Path
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.compact_storage import CompactOrderStorage
+from vouchers_cli.external_storage import ExternalSortStorage
+from vouchers_cli.numpy_storage import NumpyOrderStorage
+from vouchers_cli.parallel_loader import (
+    load_sharded,
+    parse_barcodes_shard,
+    parse_orders_shard,
+    shard_file,
+)
+from vouchers_cli.repository import Repository
+from vouchers_cli.storage import OrderStorage
+
+
+async def test_shard_file_splits_on_line_boundaries(tmp_path: Path) -> None:
+    """
+    Test that shards skip the header, cover every row once and end on newlines.
+    """
+    csv_path = tmp_path / "orders.csv"
+    content = "order_id,customer_id\n" + "".join(f"{i},{i}\n" for i in range(100))
+    csv_path.write_text(content)
+
+    shards = shard_file(csv_path, 7)
+
+    data = csv_path.read_bytes()
+    assert shards[0][0] == len(b"order_id,customer_id\n")
+    assert shards[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in pairwise(shards))
+    assert all(data[end - 1 : end] == b"\n" for _, end in shards)
+
+
+async def test_parse_shards_in_process(tmp_path: Path) -> None:
+    """
+    Test the worker functions directly: both files become typed columns in
+    file order.
+    """
+    orders_path = tmp_path / "orders.csv"
+    orders_path.write_text("order_id,customer_id\n1,10\n2,20\n")
+    barcodes_path = tmp_path / "barcodes.csv"
+    barcodes_path.write_text("barcode,order_id\nb1,1\nb2,\nb1,2\nb3,9\n")
+
+    (orders_shard,) = shard_file(orders_path, 1)
+    order_ids, customer_ids = parse_orders_shard(orders_path, *orders_shard)
+    assert list(order_ids) == [1, 2]
+    assert list(customer_ids) == [10, 20]
+
+    (barcodes_shard,) = shard_file(barcodes_path, 1)
+    barcodes, barcode_order_ids = parse_barcodes_shard(barcodes_path, *barcodes_shard)
+    assert barcodes == ["b1", "b2", "b1", "b3"]
+    assert barcode_order_ids == [1, None, 2, 9]
+
+
+async def test_merge_barcodes_drops_cross_shard_duplicates(
+    mock_logger: Logger,
+) -> None:
+    """
+    Test that merging partial states drops barcodes stored by earlier shards.
+    """
+    storage = OrderStorage(mock_logger)
+    await storage.store_orders_bulk([(1, 10), (2, 20)])
+    await storage.merge_barcodes({(1, 10): ["b1", "b2"]}, {"b1", "b2"}, {"b3"})
+
+    await storage.merge_barcodes(
+        {(2, 20): ["b1", "b4"]},
+        {"b1", "b4"},
+        {"b3", "b5"},
+        duplicate_barcodes=["b6", "b6"],
+    )
+
+    assert storage.customer_to_barcodes == {(1, 10): ["b1", "b2"], (2, 20): ["b4"]}
+    assert storage.used_barcodes == {"b1", "b2", "b4"}
+    assert storage.unused_barcodes == {"b3", "b5"}
+    # Two duplicates from inside the shard plus b1 and b3 across shards
+    assert storage.duplicate_count == 4
+
+
+async def test_load_sharded_matches_sequential_load(mock_logger: Logger) -> None:
+    """
+    Test that a multi-process load of the sample data matches a sequential load,
+    for both storage backends.
+    """
+    orders_path = Path("data/orders.csv")
+    barcodes_path = Path("data/barcodes.csv")
+
+    sequential = Repository(
+        orders_path,
+        barcodes_path,
+        mock_logger,
+        AsyncCSVReader(mock_logger),
+        OrderStorage(mock_logger),
+    )
+
+    for storage in (OrderStorage(mock_logger), CompactOrderStorage(mock_logger)):
+        # A tiny shard size forces many shards and cross-shard duplicates
+        await load_sharded(
+            orders_path, barcodes_path, storage, mock_logger, 2, shard_size=512
+        )
+
+        assert await storage.get_vouchers() == await sequential.get_vouchers()
+        assert (
+            await storage.get_unused_barcodes()
+            == await sequential.get_unused_barcodes()
+        )
+        assert await storage.get_top_customers(5) == (
+            await sequential.get_top_customers()
+        )
+
+
+async def test_load_sharded_external_matches_sequential_load(
+    mock_logger: Logger, tmp_path: Path
+) -> None:
+    """
+    Test that a multi-process load into the external sort storage, which keeps
+    no orders mapping for the workers, matches a sequential load.
+    """
+    sequential = Repository(
+        Path("data/orders.csv"),
+        Path("data/barcodes.csv"),
+        mock_logger,
+        AsyncCSVReader(mock_logger),
+        OrderStorage(mock_logger),
+    )
+    storage = ExternalSortStorage(mock_logger, temp_dir=tmp_path)
+
+    await load_sharded(
+        Path("data/orders.csv"),
+        Path("data/barcodes.csv"),
+        storage,
+        mock_logger,
+        2,
+        shard_size=512,
+    )
+
+    assert await storage.get_vouchers() == await sequential.get_vouchers()
+    assert await storage.get_unused_barcodes() == (
+        await sequential.get_unused_barcodes()
+    )
+    assert await storage.get_top_customers(5) == await sequential.get_top_customers()
+    assert storage.duplicate_count == sequential.duplicate_count
+
+
+async def test_load_sharded_matches_sequential_random_loads(
+    mock_logger: Logger, tmp_path: Path
+) -> None:
+    """
+    Test that sharded loads of random files, with barcodes repeated across
+    shards against used, unused and unknown orders and customer 0, match a
+    sequential load: vouchers in the same order, unused barcodes, top customers
+    and duplicate counts.
+    """
+    rng = random.Random(3)
+    orders_path = tmp_path / "orders.csv"
+    orders_path.write_text(
+        "order_id,customer_id\n"
+        + "".join(f"{rng.randint(1, 150)},{rng.randint(0, 40)}\n" for _ in range(200))
+    )
+    barcodes_path = tmp_path / "barcodes.csv"
+    barcodes_path.write_text(
+        "barcode,order_id\n"
+        + "".join(
+            f"{rng.randint(1, 300)},{rng.choice(['', rng.randint(1, 200)])}\n"
+            for _ in range(1_000)
+        )
+    )
+
+    def storages() -> list[OrderStorage]:
+        return [
+            OrderStorage(mock_logger),
+            CompactOrderStorage(mock_logger),
+            NumpyOrderStorage(mock_logger),
+            ExternalSortStorage(mock_logger, memory_limit=4_000, temp_dir=tmp_path),
+        ]
+
+    for sequential, sharded in zip(storages(), storages(), strict=True):
+        repository = Repository(
+            orders_path,
+            barcodes_path,
+            mock_logger,
+            AsyncCSVReader(mock_logger, chunk_size=256),
+            sequential,
+        )
+        await repository.get_vouchers()
+        # A tiny shard size forces many shards and cross-shard duplicates
+        await load_sharded(
+            orders_path, barcodes_path, sharded, mock_logger, 2, shard_size=256
+        )
+
+        assert list((await sharded.get_vouchers()).items()) == list(
+            (await sequential.get_vouchers()).items()
+        )
+        assert await sharded.get_unused_barcodes() == (
+            await sequential.get_unused_barcodes()
+        )
+        assert await sharded.get_top_customers(10) == (
+            await sequential.get_top_customers(10)
+        )
+        assert sharded.duplicate_count == sequential.duplicate_count > 0
+
+
+async def test_repository_with_workers(mock_logger: Logger) -> None:
+    """
+    Test that Repository switches to the sharded loader with several workers.
+    """
+    repository = Repository(
+        Path("data/orders.csv"),
+        Path("data/barcodes.csv"),
+        mock_logger,
+        AsyncCSVReader(mock_logger),
+        OrderStorage(mock_logger),
+        workers=2,
+    )
+
+    assert len(await repository.get_vouchers()) == 204
+    assert len(await repository.get_unused_barcodes()) == 98
+    assert repository.duplicate_count == 5
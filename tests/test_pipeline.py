@@ -0,0 +1,64 @@
+import asyncio
+from typing import AsyncIterator
+
+import pytest
+
+from vouchers_cli.pipeline import Prefetcher
+
+
+async def test_prefetcher_runs_ahead_with_backpressure() -> None:
+    """
+    Test that the producer starts before the first item is requested, runs
+    ahead of the consumer by at most the depth and yields every item in order.
+    """
+    produced: list[int] = []
+
+    async def source() -> AsyncIterator[int]:
+        for item in range(10):
+            produced.append(item)
+            yield item
+
+    prefetcher = Prefetcher(source(), depth=3)
+    await asyncio.sleep(0.01)
+    # Three items are queued and the producer waits to put the fourth
+    assert produced == [0, 1, 2, 3]
+
+    assert [item async for item in prefetcher] == list(range(10))
+
+
+async def test_prefetcher_raises_producer_errors() -> None:
+    """
+    Test that an error of the producer is raised to the consumer after the
+    items produced before it.
+    """
+
+    async def source() -> AsyncIterator[int]:
+        yield 1
+        raise FileNotFoundError("missing")
+
+    items = []
+    with pytest.raises(FileNotFoundError, match="missing"):
+        async for item in Prefetcher(source(), depth=2):
+            items.append(item)
+    assert items == [1]
+
+
+async def test_prefetcher_close_cancels_producer() -> None:
+    """
+    Test that closing a prefetcher early stops its producer.
+    """
+    closed = asyncio.Event()
+
+    async def source() -> AsyncIterator[int]:
+        try:
+            for item in range(100):
+                yield item
+        finally:
+            closed.set()
+
+    prefetcher = Prefetcher(source(), depth=1)
+    assert await anext(prefetcher) == 0
+    await prefetcher.aclose()
+
+    assert closed.is_set()
+    await prefetcher.aclose()  # Closing twice is harmless
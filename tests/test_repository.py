@@ -1,4 +1,13 @@
+import asyncio
+import logging
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from vouchers_cli.async_reader import AsyncCSVReader
 from vouchers_cli.repository import Repository
+from vouchers_cli.storage import OrderStorage
 
 
 async def test_get_vouchers(repository: Repository) -> None:
@@ -18,6 +27,7 @@ async def test_get_unused_barcodes(
     """
     result = await repository.get_unused_barcodes()
     assert len(result) == 103
+    assert await repository.get_unused_barcode_count() == 103
 
 
 async def test_get_top_customers(repository: Repository) -> None:
@@ -27,3 +37,85 @@ async def test_get_top_customers(repository: Repository) -> None:
     expected = [(456, 1), (101, 1)]  # Each customer placed 1 order in the test CSV
     result = await repository.get_top_customers()
     assert result == expected
+
+
+async def test_get_top_customers_with_custom_n(repository: Repository) -> None:
+    """
+    Test `get_top_customers` honours a custom number of customers.
+    """
+    result = await repository.get_top_customers(1)
+    assert result == [(456, 1)]
+
+
+async def test_get_customer_vouchers(repository: Repository) -> None:
+    """
+    Test per-customer lookups of vouchers and barcode counts.
+    """
+    assert await repository.get_customer_vouchers(456) == {
+        123: ["11111111232", "11111111549"]
+    }
+    assert await repository.get_customer_barcode_count(456) == 2
+    assert await repository.get_customer_vouchers(999) == {}
+    assert await repository.get_customer_barcode_count(999) == 0
+
+
+async def test_allocate_barcodes(repository: Repository) -> None:
+    """
+    Test that allocated barcodes leave the unused barcodes for the order's voucher.
+    """
+    unused = set(await repository.get_unused_barcodes())
+
+    allocated = await repository.allocate_barcodes(123, 3)
+
+    assert set(allocated) <= unused
+    assert len(await repository.get_unused_barcodes()) == len(unused) - 3
+    assert (await repository.get_customer_vouchers(456))[123][2:] == allocated
+
+
+async def test_pipelined_load_matches(
+    repository: Repository, csv_file_path: str, mock_logger: logging.Logger
+) -> None:
+    """
+    Test that loading through reader tasks and bounded queues stores the same
+    data, even with batches smaller than the files.
+    """
+    pipelined = Repository(
+        order_file_path=Path(csv_file_path),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        logger=mock_logger,
+        reader=AsyncCSVReader(mock_logger, chunk_size=64, pipeline_depth=2),
+        storage=OrderStorage(mock_logger),
+        batch_size=7,
+        pipeline_depth=2,
+    )
+
+    assert list((await pipelined.get_vouchers()).items()) == list(
+        (await repository.get_vouchers()).items()
+    )
+    assert await pipelined.get_unused_barcodes() == (
+        await repository.get_unused_barcodes()
+    )
+    assert await pipelined.get_top_customers() == await repository.get_top_customers()
+
+
+async def test_pipelined_load_stops_readers_on_error(
+    csv_file_path: str, mock_logger: logging.Logger
+) -> None:
+    """
+    Test that a failing store stops both reader tasks.
+    """
+    storage = OrderStorage(mock_logger)
+    storage.store_orders_bulk = AsyncMock(side_effect=RuntimeError)  # type: ignore[method-assign]
+    pipelined = Repository(
+        order_file_path=Path(csv_file_path),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        logger=mock_logger,
+        reader=AsyncCSVReader(mock_logger),
+        storage=storage,
+        pipeline_depth=1,
+    )
+
+    with pytest.raises(RuntimeError):
+        await pipelined.get_vouchers()
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    assert not [task for task in tasks if not task.done()]
@@ -1,9 +1,23 @@
+import gzip
+import sys
 from pathlib import Path
+from typing import AsyncIterator
 
 import pytest
 from pydantic import ValidationError
 
-from vouchers_cli.schemas import ExtractorConfig, OutputSchema, VoucherSchema
+from vouchers_cli.options import (
+    CSVReader,
+    OutputFormat,
+    StorageBackend,
+    check_option_combinations,
+)
+from vouchers_cli.schemas import (
+    ExtractorConfig,
+    OutputSchema,
+    Voucher,
+    VoucherSchema,
+)
 
 
 async def test_voucher_schema_valid() -> None:
@@ -38,21 +52,36 @@ async def test_output_schema_valid() -> None:
     """
     Test OutputSchema with valid data.
     """
+
+    async def vouchers() -> AsyncIterator[Voucher]:
+        yield Voucher(customer_id=1, order_id=100, barcodes=["barcode1", "barcode2"])
+
     output_data = {
         "top_customers": [(1, 5), (2, 3)],
-        "unused_barcodes": {"barcode1", "barcode2"},
-        "vouchers": [
-            {"customer_id": 1, "order_id": 100, "barcodes": ["barcode1", "barcode2"]}
-        ],
+        "unused_barcode_count": 2,
+        "vouchers": vouchers(),
     }
 
     output = OutputSchema(**output_data)  # type: ignore[arg-type]
+    parsed_vouchers = [voucher async for voucher in output.vouchers]
 
     # Assert the output data is correctly parsed
     assert output.top_customers == [(1, 5), (2, 3)]
-    assert output.unused_barcodes == {"barcode1", "barcode2"}
-    assert len(output.vouchers) == 1
-    assert output.vouchers[0].customer_id == 1
+    assert output.unused_barcode_count == 2
+    assert len(parsed_vouchers) == 1
+    assert parsed_vouchers[0].customer_id == 1
+
+
+async def test_output_schema_rejects_non_async_vouchers() -> None:
+    """
+    Test OutputSchema rejects vouchers that cannot be streamed asynchronously.
+    """
+    with pytest.raises(ValidationError):
+        OutputSchema(
+            top_customers=[],
+            unused_barcode_count=0,
+            vouchers=[],  # type: ignore[arg-type]
+        )
 
 
 async def test_extractor_config_valid() -> None:
@@ -65,7 +94,7 @@ async def test_extractor_config_valid() -> None:
         "output_dir": Path("output"),
     }
 
-    config = ExtractorConfig(**valid_config_data)
+    config = ExtractorConfig(**valid_config_data)  # type: ignore[arg-type]
 
     # Assert the config is parsed correctly
     assert config.orders_file_path == Path("data/orders.csv")
@@ -84,7 +113,7 @@ async def test_extractor_config_invalid_file() -> None:
     }
 
     with pytest.raises(ValueError, match="File not found: invalid/orders.csv"):
-        ExtractorConfig(**invalid_config_data)
+        ExtractorConfig(**invalid_config_data)  # type: ignore[arg-type]
 
 
 async def test_extractor_config_invalid_format(create_test_txt: object) -> None:
@@ -98,6 +127,280 @@ async def test_extractor_config_invalid_format(create_test_txt: object) -> None:
     }
 
     with pytest.raises(
-        ValueError, match="Invalid file format: data/orders.txt. Expected a CSV file."
+        ValueError,
+        match="Invalid file format: data/orders.txt. "
+        "Expected a CSV, Parquet or Arrow IPC file.",
     ):
-        ExtractorConfig(**invalid_config_data)
+        ExtractorConfig(**invalid_config_data)  # type: ignore[arg-type]
+
+
+async def test_extractor_config_accepts_columnar_files(tmp_path: Path) -> None:
+    """
+    Test ExtractorConfig accepts Parquet and Arrow IPC input files.
+    """
+    orders_path = tmp_path / "orders.parquet"
+    barcodes_path = tmp_path / "barcodes.arrow"
+    orders_path.touch()
+    barcodes_path.touch()
+
+    config = ExtractorConfig(
+        orders_file_path=orders_path,
+        barcodes_file_path=barcodes_path,
+        output_dir=Path("output"),
+    )
+
+    assert config.orders_file_path == orders_path
+
+
+async def test_extractor_config_rejects_mixed_formats(tmp_path: Path) -> None:
+    """
+    Test ExtractorConfig rejects a CSV file combined with a columnar file.
+    """
+    orders_path = tmp_path / "orders.parquet"
+    orders_path.touch()
+
+    with pytest.raises(ValueError, match="must both be CSV or both be"):
+        ExtractorConfig(
+            orders_file_path=orders_path,
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+        )
+
+
+async def test_extractor_config_rejects_parallel_columnar(tmp_path: Path) -> None:
+    """
+    Test ExtractorConfig rejects parallel loading of columnar files.
+    """
+    orders_path = tmp_path / "orders.parquet"
+    barcodes_path = tmp_path / "barcodes.parquet"
+    orders_path.touch()
+    barcodes_path.touch()
+
+    with pytest.raises(ValueError, match="only supports CSV input"):
+        ExtractorConfig(
+            orders_file_path=orders_path,
+            barcodes_file_path=barcodes_path,
+            output_dir=Path("output"),
+            workers=2,
+        )
+
+
+async def test_extractor_config_rejects_invalid_delta_mode(tmp_path: Path) -> None:
+    """
+    Test ExtractorConfig rejects delta mode for columnar or parallel loading.
+    """
+    orders_path = tmp_path / "orders.parquet"
+    barcodes_path = tmp_path / "barcodes.parquet"
+    orders_path.touch()
+    barcodes_path.touch()
+
+    with pytest.raises(ValueError, match="Delta mode .* only supports CSV input"):
+        ExtractorConfig(
+            orders_file_path=orders_path,
+            barcodes_file_path=barcodes_path,
+            output_dir=Path("output"),
+            delta_state=tmp_path / "state",
+        )
+
+    with pytest.raises(ValueError, match="cannot be combined with --workers"):
+        ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            delta_state=tmp_path / "state",
+            workers=2,
+        )
+
+
+async def test_extractor_config_rejects_invalid_sqlite_storage(tmp_path: Path) -> None:
+    """
+    Test ExtractorConfig rejects the sqlite storage with parallel loading or
+    delta mode.
+    """
+    with pytest.raises(ValueError, match="'sqlite' storage cannot be combined"):
+        ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            storage=StorageBackend.SQLITE,
+            workers=2,
+        )
+
+    with pytest.raises(ValueError, match="'sqlite' storage cannot be combined"):
+        ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            storage=StorageBackend.SQLITE,
+            delta_state=tmp_path / "state",
+        )
+
+
+async def test_extractor_config_rejects_external_storage_with_delta(
+    tmp_path: Path,
+) -> None:
+    """
+    Test ExtractorConfig rejects the external storage with delta mode and a
+    non-positive memory limit.
+    """
+    with pytest.raises(ValueError, match="'external' storage cannot be combined"):
+        ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            storage=StorageBackend.EXTERNAL,
+            delta_state=tmp_path / "state",
+        )
+
+    with pytest.raises(ValueError, match="memory_limit"):
+        ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            storage=StorageBackend.EXTERNAL,
+            memory_limit=0,
+        )
+
+
+async def test_extractor_config_rejects_partitioned_non_text_output() -> None:
+    """
+    Test ExtractorConfig rejects partitioned output in formats other than text.
+    """
+    with pytest.raises(ValueError, match="only supports the 'text' output format"):
+        ExtractorConfig(
+            orders_file_path=Path("data/orders.csv"),
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            output_format=OutputFormat.GZIP,
+            output_partitions=4,
+        )
+
+
+async def test_check_option_combinations_rejects_batch_server() -> None:
+    """
+    Test that batch mode cannot be combined with server mode, while either one
+    alone is accepted.
+    """
+    orders, barcodes = Path("data/orders.csv"), Path("data/barcodes.csv")
+    check_option_combinations(orders, barcodes, batch=Path("jobs.csv"))
+    check_option_combinations(orders, barcodes, serve=True)
+
+    with pytest.raises(ValueError, match="cannot be combined with --serve"):
+        check_option_combinations(orders, barcodes, batch=Path("jobs.csv"), serve=True)
+
+
+async def test_extractor_config_accepts_compressed_csv_files(tmp_path: Path) -> None:
+    """
+    Test ExtractorConfig accepts compressed CSV files but no other compressed
+    file.
+    """
+    orders_path = tmp_path / "orders.csv.gz"
+    barcodes_path = tmp_path / "barcodes.csv.bz2"
+    text_path = tmp_path / "orders.txt.gz"
+    for path in (orders_path, barcodes_path, text_path):
+        path.touch()
+
+    config = ExtractorConfig(
+        orders_file_path=orders_path,
+        barcodes_file_path=barcodes_path,
+        output_dir=Path("output"),
+    )
+
+    assert config.orders_file_path == orders_path
+    with pytest.raises(ValueError, match="Invalid file format"):
+        ExtractorConfig(
+            orders_file_path=text_path,
+            barcodes_file_path=barcodes_path,
+            output_dir=Path("output"),
+        )
+
+
+@pytest.mark.parametrize(
+    ("options", "message"),
+    [
+        ({"csv_reader": CSVReader.MMAP}, "only supported by the 'stream' CSV reader"),
+        ({"workers": 2}, "needs uncompressed input"),
+        ({"delta_state": Path("state")}, "needs uncompressed input"),
+    ],
+)
+async def test_extractor_config_rejects_compressed_input_options(
+    tmp_path: Path, options: dict[str, object], message: str
+) -> None:
+    """
+    Test ExtractorConfig rejects readers and modes that need random access to
+    compressed input, also when it is only recognized by its magic bytes.
+    """
+    orders_path = tmp_path / "orders.csv"
+    orders_path.write_bytes(gzip.compress(b"order_id,customer_id\n"))
+
+    with pytest.raises(ValueError, match=message):
+        ExtractorConfig(
+            orders_file_path=orders_path,
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+            **options,  # type: ignore[arg-type]
+        )
+
+
+async def test_extractor_config_requires_zstandard_for_zstd_input(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test ExtractorConfig points to the extra when zstandard is not installed.
+    """
+    orders_path = tmp_path / "orders.csv.zst"
+    orders_path.touch()
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+
+    with pytest.raises(ValueError, match="poetry install --extras zstd"):
+        ExtractorConfig(
+            orders_file_path=orders_path,
+            barcodes_file_path=Path("data/barcodes.csv"),
+            output_dir=Path("output"),
+        )
+
+
+async def test_extractor_config_from_options_matches_validation() -> None:
+    """
+    Test that the light path builds the same configuration as the validators.
+    """
+    values = {
+        "orders_file_path": Path("data/orders.csv"),
+        "barcodes_file_path": Path("data/barcodes.csv"),
+        "output_dir": Path("output"),
+        "storage": StorageBackend.COMPACT,
+        "workers": 2,
+        "pipeline_depth": 0,
+    }
+
+    config = ExtractorConfig.from_options(**values)
+
+    assert config == ExtractorConfig(**values)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize(
+    ("values", "message"),
+    [
+        ({"batch_size": 0}, "batch_size must be greater than 0"),
+        ({"pipeline_depth": -1}, "pipeline_depth must be at least 0"),
+        ({"orders_file_path": Path("invalid/orders.csv")}, "File not found"),
+        (
+            {"output_format": OutputFormat.ZSTD, "output_partitions": 2},
+            "only supports the 'text' output format",
+        ),
+    ],
+)
+async def test_extractor_config_from_options_rejects_invalid_values(
+    values: dict[str, object], message: str
+) -> None:
+    """
+    Test that the light path runs the bounds, file and combination checks.
+    """
+    options: dict[str, object] = {
+        "orders_file_path": Path("data/orders.csv"),
+        "barcodes_file_path": Path("data/barcodes.csv"),
+        "output_dir": Path("output"),
+    }
+
+    with pytest.raises(ValueError, match=message):
+        ExtractorConfig.from_options(**options | values)
@@ -0,0 +1,226 @@
+import asyncio
+from contextlib import asynccontextmanager
+from logging import Logger
+from pathlib import Path
+from typing import AsyncIterator
+
+import httpx
+import pytest
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import ExtractorConfig, ServerConfig
+from vouchers_cli.server import VoucherServer
+from vouchers_cli.storage import OrderStorage
+
+
+def make_server(logger: Logger) -> VoucherServer:
+    """
+    Build a server over the sample files.
+    """
+    repository = Repository(
+        Path("data/orders.csv"),
+        Path("data/barcodes.csv"),
+        logger,
+        AsyncCSVReader(logger),
+        OrderStorage(logger),
+    )
+    return VoucherServer(repository, logger)
+
+
+@asynccontextmanager
+async def running_server(logger: Logger) -> AsyncIterator[tuple[VoucherServer, str]]:
+    """
+    Run a server over the sample files on a free local port; yields the server
+    and its URL.
+    """
+    voucher_server = make_server(logger)
+    listening = await voucher_server.start(ServerConfig(port=0))
+    host, port = listening.sockets[0].getsockname()[:2]
+    async with listening:
+        yield voucher_server, f"http://{host}:{port}"
+
+
+async def test_server_answers_queries(mock_logger: Logger) -> None:
+    """
+    Test every endpoint over one keep-alive connection against the repository.
+    """
+    async with (
+        running_server(mock_logger) as (voucher_server, url),
+        httpx.AsyncClient(base_url=url) as client,
+    ):
+        repository = voucher_server._repository
+        vouchers = await repository.get_vouchers()
+        (order_id, customer_id), barcodes = next(iter(vouchers.items()))
+
+        assert (await client.get("/health")).json() == {"status": "ok"}
+
+        response = await client.get(f"/orders/{order_id}/vouchers")
+        assert response.status_code == 200
+        assert response.json() == {
+            "order_id": order_id,
+            "customer_id": customer_id,
+            "barcodes": barcodes,
+        }
+
+        response = await client.get(f"/customers/{customer_id}/vouchers")
+        assert response.json()["barcode_count"] == sum(
+            len(codes)
+            for (_, customer), codes in vouchers.items()
+            if customer == customer_id
+        )
+        assert response.json()["vouchers"] == [
+            {"order_id": order, "customer_id": customer, "barcodes": codes}
+            for (order, customer), codes in vouchers.items()
+            if customer == customer_id
+        ]
+
+        response = await client.get("/customers/top", params={"n": 3})
+        assert [
+            (customer["customer_id"], customer["orders"])
+            for customer in response.json()["top_customers"]
+        ] == await repository.get_top_customers(3)
+
+        unused = sorted(await repository.get_unused_barcodes())
+        response = await client.get("/barcodes/unused", params={"offset": 5})
+        assert response.json() == {
+            "count": len(unused),
+            "offset": 5,
+            "limit": 100,
+            "barcodes": unused[5:105],
+        }
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "status"),
+    [
+        ("GET", "/orders/0/vouchers", 404),
+        ("GET", "/orders/abc/vouchers", 404),
+        ("GET", "/unknown", 404),
+        ("POST", "/health", 405),
+        ("GET", "/customers/top?n=0", 400),
+        ("GET", "/customers/top?n=many", 400),
+        ("GET", "/barcodes/unused?offset=-1", 400),
+    ],
+)
+async def test_server_errors(
+    mock_logger: Logger, method: str, path: str, status: int
+) -> None:
+    """
+    Test that unknown resources, methods and invalid parameters are rejected
+    with a JSON error.
+    """
+    async with (
+        running_server(mock_logger) as (_, url),
+        httpx.AsyncClient(base_url=url) as client,
+    ):
+        response = await client.request(method, path, content=b"ignored")
+
+    assert response.status_code == status
+    assert "error" in response.json()
+
+
+@pytest.mark.parametrize(
+    ("request_head", "status"),
+    [
+        (b"GET /health HTTP/1.0\r\n", b"HTTP/1.1 200 OK"),
+        (b"garbage\r\n", b"HTTP/1.1 400 Bad Request"),
+        (b"GET /health HTTP/1.1\r\nno colon\r\n", b"HTTP/1.1 400 Bad Request"),
+        (
+            b"GET /health HTTP/1.1\r\nContent-Length: abc\r\n",
+            b"HTTP/1.1 400 Bad Request",
+        ),
+        (
+            b"GET /health HTTP/1.1\r\nContent-Length: -1\r\n",
+            b"HTTP/1.1 400 Bad Request",
+        ),
+        (
+            b"GET /health HTTP/1.1\r\nContent-Length: 1000000\r\n",
+            b"HTTP/1.1 413 Content Too Large",
+        ),
+        (
+            b"GET /health HTTP/1.1\r\nX-Long: " + b"a" * 70_000 + b"\r\n",
+            b"HTTP/1.1 431 Request Header Fields Too Large",
+        ),
+        (
+            b"GET /health HTTP/1.1\r\n" + b"X-Header: 1\r\n" * 101,
+            b"HTTP/1.1 431 Request Header Fields Too Large",
+        ),
+    ],
+)
+async def test_server_closes_connection(
+    mock_logger: Logger, request_head: bytes, status: bytes
+) -> None:
+    """
+    Test that HTTP/1.0 requests, malformed request lines and headers, too large
+    heads and too large bodies get an answer and a closed connection.
+    """
+    async with running_server(mock_logger) as (_, url):
+        host, port = url.removeprefix("http://").split(":")
+        reader, writer = await asyncio.open_connection(host, int(port))
+        writer.write(request_head + b"\r\n")
+
+        response = await reader.read()  # Read until the server closes
+        writer.close()
+
+    assert response.startswith(status)
+    assert b"Connection: close" in response
+
+
+async def test_server_handler_failure(
+    mock_logger: Logger, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    Test that an unexpected error in a handler is answered with 500 and keeps
+    the connection usable.
+    """
+
+    async def fail(customer_id: int) -> dict[int, list[str]]:
+        raise RuntimeError("storage failure")
+
+    async with (
+        running_server(mock_logger) as (voucher_server, url),
+        httpx.AsyncClient(base_url=url) as client,
+    ):
+        monkeypatch.setattr(voucher_server._repository, "get_customer_vouchers", fail)
+
+        response = await client.get("/customers/10/vouchers")
+        assert response.status_code == 500
+        assert response.json() == {"error": "Internal server error"}
+        assert (await client.get("/health")).status_code == 200
+
+
+async def test_server_create(mock_logger: Logger, tmp_path: Path) -> None:
+    """
+    Test the factory, which refuses delta mode.
+    """
+    config = ExtractorConfig(
+        orders_file_path=Path("data/orders.csv"),
+        barcodes_file_path=Path("data/barcodes.csv"),
+        output_dir=Path("output"),
+    )
+    assert isinstance(VoucherServer.create(config, mock_logger), VoucherServer)
+
+    config.delta_state = tmp_path / "state"
+    with pytest.raises(ValueError, match="cannot be combined with --delta-state"):
+        VoucherServer.create(config, mock_logger)
+
+
+async def test_server_serve_until_cancelled(mock_logger: Logger) -> None:
+    """
+    Test that `serve` answers queries until its task is cancelled.
+    """
+    voucher_server = make_server(mock_logger)
+    task = asyncio.create_task(voucher_server.serve(ServerConfig(port=18_765)))
+    async with httpx.AsyncClient(base_url="http://127.0.0.1:18765") as client:
+        for _ in range(100):
+            try:
+                response = await client.get("/health")
+                break
+            except httpx.ConnectError:
+                await asyncio.sleep(0.05)
+    task.cancel()
+
+    assert response.status_code == 200
+    with pytest.raises(asyncio.CancelledError):
+        await task
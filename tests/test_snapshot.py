@@ -0,0 +1,231 @@
+import os
+import shutil
+import struct
+from logging import Logger
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.async_reader import AsyncCSVReader
+from vouchers_cli.repository import Repository
+from vouchers_cli.snapshot import SnapshotCache, SnapshotStorage
+from vouchers_cli.storage import OrderStorage
+
+
+@pytest.fixture
+def input_files(tmp_path: Path) -> tuple[Path, Path]:
+    """
+    Copies of the sample input files that tests are free to modify.
+    """
+    orders = shutil.copy("data/orders.csv", tmp_path / "orders.csv")
+    barcodes = shutil.copy("data/barcodes.csv", tmp_path / "barcodes.csv")
+    # Age the files so their mtime is not within the racy window
+    for path in (orders, barcodes):
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    return Path(orders), Path(barcodes)
+
+
+def make_repository(
+    input_files: tuple[Path, Path],
+    cache_dir: Path,
+    logger: Logger,
+    rebuild_cache: bool = False,
+) -> Repository:
+    """
+    Build a repository over the input files with a snapshot cache.
+    """
+    return Repository(
+        *input_files,
+        logger,
+        AsyncCSVReader(logger),
+        OrderStorage(logger),
+        cache=SnapshotCache(cache_dir, logger),
+        rebuild_cache=rebuild_cache,
+    )
+
+
+async def read_all(
+    repository: Repository,
+) -> tuple[list[tuple[tuple[int, int], list[str]]], set[str], list[tuple[int, int]]]:
+    """
+    Read vouchers (in order), unused barcodes and the full customer ranking.
+    """
+    vouchers = [voucher async for voucher in repository.iter_vouchers()]
+    return (
+        vouchers,
+        await repository.get_unused_barcodes(),
+        await repository.get_top_customers(1_000),
+    )
+
+
+async def test_snapshot_round_trip(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a warm run is served from the snapshot with identical results.
+    """
+    cold = make_repository(input_files, tmp_path / "cache", mock_logger)
+    expected = await read_all(cold)
+    assert not isinstance(cold._storage, SnapshotStorage)
+
+    warm = make_repository(input_files, tmp_path / "cache", mock_logger)
+    assert await read_all(warm) == expected
+    assert isinstance(warm._storage, SnapshotStorage)
+    assert await warm.get_vouchers() == dict(expected[0])
+    assert await warm.get_top_customers(2) == expected[2][:2]
+    (order_id, customer_id), barcodes = expected[0][0]
+    assert await warm.get_order_voucher(order_id) == (customer_id, barcodes)
+    assert await warm.get_order_voucher(0) is None
+    for customer_id, _ in expected[2][:3] + [(0, 0)]:
+        assert await warm.get_customer_vouchers(
+            customer_id
+        ) == await cold.get_customer_vouchers(customer_id)
+        assert await warm.get_customer_barcode_count(
+            customer_id
+        ) == await cold.get_customer_barcode_count(customer_id)
+
+
+async def test_snapshot_reused_when_only_mtime_changes(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a touched but unchanged file is recognised by its content hash.
+    """
+    await read_all(make_repository(input_files, tmp_path / "cache", mock_logger))
+    os.utime(input_files[0], ns=(2_000_000_000, 2_000_000_000))
+
+    warm = make_repository(input_files, tmp_path / "cache", mock_logger)
+    await warm.get_unused_barcodes()
+    assert isinstance(warm._storage, SnapshotStorage)
+
+
+async def test_snapshot_invalidated_by_changed_input(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that changing an input file rebuilds the snapshot.
+    """
+    await read_all(make_repository(input_files, tmp_path / "cache", mock_logger))
+    with open(input_files[1], "a", encoding="utf-8") as file:
+        file.write("99999999999,\n")
+
+    changed = make_repository(input_files, tmp_path / "cache", mock_logger)
+    assert "99999999999" in await changed.get_unused_barcodes()
+    assert not isinstance(changed._storage, SnapshotStorage)
+
+    warm = make_repository(input_files, tmp_path / "cache", mock_logger)
+    assert "99999999999" in await warm.get_unused_barcodes()
+    assert isinstance(warm._storage, SnapshotStorage)
+
+
+async def test_snapshot_rebuild(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that `rebuild_cache` ignores a valid snapshot and rewrites it.
+    """
+    cache = SnapshotCache(tmp_path / "cache", mock_logger)
+    await read_all(make_repository(input_files, tmp_path / "cache", mock_logger))
+    snapshot_path = cache.snapshot_path(*input_files)
+    os.utime(snapshot_path, ns=(0, 0))
+
+    rebuilt = make_repository(
+        input_files, tmp_path / "cache", mock_logger, rebuild_cache=True
+    )
+    await rebuilt.get_unused_barcodes()
+    assert not isinstance(rebuilt._storage, SnapshotStorage)
+    assert snapshot_path.stat().st_mtime_ns > 0
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"short",
+        b"not a snapshot, wrong magic bytes",
+        b'{"version": 0}' + struct.pack("<Q8s", 14, b"VCHRSNP1"),
+    ],
+)
+async def test_unreadable_snapshot_is_ignored(
+    input_files: tuple[Path, Path],
+    tmp_path: Path,
+    mock_logger: Logger,
+    content: bytes,
+) -> None:
+    """
+    Test that empty, corrupt or incompatible snapshots count as a cache miss.
+    """
+    cache = SnapshotCache(tmp_path / "cache", mock_logger)
+    snapshot_path = cache.snapshot_path(*input_files)
+    snapshot_path.parent.mkdir()
+    snapshot_path.write_bytes(content)
+
+    assert cache.load(*input_files) is None
+
+
+async def test_failed_save_leaves_no_snapshot(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that a snapshot that fails to be written leaves no partial file behind.
+    """
+
+    class BrokenStorage(OrderStorage):
+        async def get_unused_barcodes(self) -> set[str]:
+            raise RuntimeError("boom")
+
+    cache = SnapshotCache(tmp_path / "cache", mock_logger)
+    inputs = cache.fingerprint_inputs(*input_files)
+
+    with pytest.raises(RuntimeError):
+        await cache.save(*input_files, inputs, BrokenStorage(mock_logger))
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+async def test_snapshot_restore_into(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that replaying a snapshot into an empty storage reproduces it.
+    """
+    expected = await read_all(
+        make_repository(input_files, tmp_path / "cache", mock_logger)
+    )
+    snapshot = SnapshotCache(tmp_path / "cache", mock_logger).load(*input_files)
+    assert snapshot is not None
+
+    storage = OrderStorage(mock_logger)
+    sizes = await snapshot.restore_into(storage)
+
+    assert sizes == {key: len(barcodes) for key, barcodes in expected[0]}
+    assert [voucher async for voucher in storage.iter_vouchers()] == expected[0]
+    assert await storage.get_unused_barcodes() == expected[1]
+    assert await storage.get_top_customers(1_000) == expected[2]
+
+
+async def test_allocation_restores_snapshot(
+    input_files: tuple[Path, Path], tmp_path: Path, mock_logger: Logger
+) -> None:
+    """
+    Test that the read-only snapshot refuses allocations, and that the
+    repository restores it into a writable storage to allocate.
+    """
+    vouchers, unused, _ = await read_all(
+        make_repository(input_files, tmp_path / "cache", mock_logger)
+    )
+    (order_id, customer_id), barcodes = vouchers[0]
+
+    warm = make_repository(input_files, tmp_path / "cache", mock_logger)
+    assert await warm.get_unused_barcodes() == unused
+    assert await warm.get_unused_barcode_count() == len(unused)
+    with pytest.raises(ValueError, match="read-only"):
+        await warm._storage.allocate_barcodes(order_id, 1)
+
+    allocated = await warm.allocate_barcodes(order_id, 2)
+
+    assert not isinstance(warm._storage, SnapshotStorage)
+    assert set(allocated) <= unused
+    assert (await warm.get_customer_vouchers(customer_id))[order_id] == [
+        *barcodes,
+        *allocated,
+    ]
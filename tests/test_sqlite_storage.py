@@ -0,0 +1,156 @@
+import asyncio
+import random
+from logging import Logger
+from pathlib import Path
+
+import pytest
+
+from vouchers_cli.sqlite_storage import SqliteOrderStorage
+from vouchers_cli.storage import OrderStorage
+
+
+async def test_sqlite_storage_matches_order_storage(
+    mock_logger: Logger, tmp_path: Path
+) -> None:
+    """
+    Test that SqliteOrderStorage returns the same vouchers, in the same order,
+    unused barcodes, top customers and customer lookups as OrderStorage.
+    """
+    rows = [
+        ("11111111111", "2"),
+        ("ABC-1", "1"),
+        ("00042", "2"),
+        ("11111111112", ""),
+        ("11111111111", "1"),  # Duplicate of a used barcode
+        ("11111111112", "1"),  # Duplicate of an unused barcode
+        ("11111111113", "3"),  # Unknown order
+        ("11111111113", "1"),  # Not a duplicate: the unknown-order row was dropped
+        ("11111111114", "4"),  # Customer 0 is treated as missing
+        ("11111111115", "2"),
+        ("11111111115", ""),  # Duplicate inside the batch
+    ]
+
+    reference = OrderStorage(mock_logger)
+    database = SqliteOrderStorage(mock_logger, tmp_path / "vouchers.sqlite3")
+    for storage in (reference, database):
+        await storage.store_orders_bulk([(1, 100), (2, 200), (4, 0), (5, 200)])
+        await storage.store_barcodes_bulk(rows[:4])
+        await storage.store_orders_bulk([(5, 100)])  # Moves order 5
+        await storage.store_barcodes_bulk(rows[4:])
+
+    vouchers = await database.get_vouchers()
+    assert list(vouchers.items()) == list((await reference.get_vouchers()).items())
+    assert vouchers == {
+        (2, 200): ["11111111111", "00042", "11111111115"],
+        (1, 100): ["ABC-1", "11111111113"],
+    }
+    assert await database.get_unused_barcodes() == {"11111111112"}
+    assert await database.get_top_customers(2) == [(100, 2), (200, 1)]
+    assert await database.get_top_customers(10) == await reference.get_top_customers(10)
+    for order_id in (1, 2, 3, 4, 5):
+        assert await database.get_order_voucher(
+            order_id
+        ) == await reference.get_order_voucher(order_id)
+    assert await database.get_order_voucher(2) == (
+        200,
+        ["11111111111", "00042", "11111111115"],
+    )
+    for customer_id in (0, 100, 200, 300):
+        assert await database.get_customer_vouchers(
+            customer_id
+        ) == await reference.get_customer_vouchers(customer_id)
+        assert await database.get_customer_barcode_count(
+            customer_id
+        ) == await reference.get_customer_barcode_count(customer_id)
+
+
+async def test_sqlite_storage_matches_random_loads(
+    mock_logger: Logger, tmp_path: Path
+) -> None:
+    """
+    Test SqliteOrderStorage against OrderStorage on random orders and barcodes
+    with many duplicates, unknown and re-assigned orders.
+    """
+    rng = random.Random(7)
+    orders = [(rng.randrange(40), rng.randrange(10)) for _ in range(60)]
+    rows = [
+        (str(rng.randrange(150)), str(rng.randrange(50)) if rng.random() < 0.8 else "")
+        for _ in range(300)
+    ]
+
+    reference = OrderStorage(mock_logger)
+    database = SqliteOrderStorage(mock_logger, tmp_path / "vouchers.sqlite3")
+    for storage in (reference, database):
+        await storage.store_orders_bulk(orders[:30])
+        await storage.store_barcodes_bulk(rows[:150])
+        await storage.store_orders_bulk([*orders[30:], (1_000, 9)])
+        await storage.merge_barcodes({(1_000, 9): ["x", "1"]}, {"x", "1"}, {"y"})
+        await storage.store_barcodes_bulk(rows[150:])
+
+    assert list((await database.get_vouchers()).items()) == list(
+        (await reference.get_vouchers()).items()
+    )
+    assert await database.get_unused_barcodes() == await reference.get_unused_barcodes()
+    assert await database.get_unused_barcode_count() == len(
+        await reference.get_unused_barcodes()
+    )
+    assert await database.get_top_customers(100) == await reference.get_top_customers(
+        100
+    )
+
+
+async def test_sqlite_storage_allocate_barcodes(
+    mock_logger: Logger, tmp_path: Path
+) -> None:
+    """
+    Test that allocations take the most recently stored unused barcodes, are
+    appended to the vouchers and never hand out a barcode twice.
+    """
+    storage = SqliteOrderStorage(mock_logger, tmp_path / "vouchers.sqlite3")
+    await storage.store_orders_bulk([(1, 100), (2, 200)])
+    await storage.store_barcodes_bulk(
+        [("A", ""), ("B", "2"), ("C", ""), ("D", "1"), ("E", "")]
+    )
+
+    assert await storage.allocate_barcodes_bulk([(2, 1), (1, 2)]) == [
+        ["E"],
+        ["A", "C"],
+    ]
+    assert list((await storage.get_vouchers()).items()) == [
+        ((2, 200), ["B", "E"]),
+        ((1, 100), ["D", "A", "C"]),
+    ]
+    assert await storage.get_unused_barcodes() == set()
+    assert await storage.get_unused_barcode_count() == 0
+    with pytest.raises(ValueError, match="Unknown order: 3"):
+        await storage.allocate_barcodes(3, 1)
+    with pytest.raises(ValueError, match="only 0 unused"):
+        await storage.allocate_barcodes(1, 1)
+
+    await storage.store_barcodes_bulk([(str(index), "") for index in range(100)])
+    allocations = await asyncio.gather(
+        *(storage.allocate_barcodes(1 + index % 2, 10) for index in range(10))
+    )
+    allocated = [barcode for barcodes in allocations for barcode in barcodes]
+    assert sorted(allocated) == sorted(str(index) for index in range(100))
+    assert await storage.get_customer_barcode_count(100) == 53
+
+
+async def test_sqlite_storage_replaces_database(
+    mock_logger: Logger, tmp_path: Path
+) -> None:
+    """
+    Test that the database runs in WAL mode and that a new storage starts from
+    an empty database file.
+    """
+    path = tmp_path / "nested" / "vouchers.sqlite3"
+    storage = SqliteOrderStorage(mock_logger, path)
+    await storage.store_orders_bulk([(1, 100)])
+    await storage.store_barcodes_bulk([("A", "1")])
+    assert await storage.get_vouchers() == {(1, 100): ["A"]}
+    (journal_mode,) = storage._connection.execute("PRAGMA journal_mode").fetchone()
+    assert journal_mode == "wal"
+
+    storage = SqliteOrderStorage(mock_logger, path)
+    assert await storage.get_vouchers() == {}
+    assert await storage.get_top_customers(1) == []
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+# Cumulative `python -X importtime` budget of `vouchers_cli.main`, in
+# microseconds; it took about 300 ms while every module was imported up front
+IMPORT_BUDGET_US = 150_000
+
+# Modules that `--help` must not load: they are only needed by a run
+HEAVY_MODULES = (
+    "aiofiles",
+    "numpy",
+    "pyarrow",
+    "pydantic",
+    "sqlite3",
+    "zstandard",
+    "vouchers_cli.extractor",
+    "vouchers_cli.schemas",
+)
+
+
+def import_times(*arguments: str) -> dict[str, int]:
+    """
+    Run the CLI in a new interpreter with `-X importtime` and return the
+    cumulative import time, in microseconds, of every module it imported.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "from vouchers_cli.main import entry; entry()",
+            *arguments,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # Lines read "import time: <self> | <cumulative> | <module>", the
+        # header reads "cumulative" instead of a number
+        columns = line.split("|")
+        if len(columns) == 3 and columns[1].strip().isdigit():
+            times[columns[2].strip()] = int(columns[1])
+    return times
+
+
+def test_help_does_not_import_heavy_modules() -> None:
+    """
+    Test that `--help` only imports the CLI parser and its option definitions.
+    """
+    times = import_times("--help")
+
+    assert "vouchers_cli.options" in times
+    assert [module for module in HEAVY_MODULES if module in times] == []
+
+
+def test_cold_start_import_time_within_budget() -> None:
+    """
+    Test that a cold start imports `vouchers_cli.main` within the budget; the
+    best of three runs is taken to leave out scheduling noise.
+    """
+    best = min(import_times("--help")["vouchers_cli.main"] for _ in range(3))
+
+    assert best < IMPORT_BUDGET_US, f"Importing took {best / 1000:.1f} ms"
@@ -1,6 +1,10 @@
 import asyncio
+import random
+from collections import Counter
 from logging import Logger
 
+import pytest
+
 from vouchers_cli.storage import OrderStorage
 
 
@@ -107,3 +111,170 @@ async def test_locking_in_storage(mock_logger: Logger) -> None:
     # Assert that the order is stored correctly without race conditions
     assert order_storage.orders_to_customers[1] == 100
     assert "barcode123" in order_storage.customer_to_barcodes[(1, 100)]
+
+
+async def test_store_orders_bulk(mock_logger: Logger) -> None:
+    """
+    Test that store_orders_bulk stores a whole batch of orders.
+    """
+    order_storage = OrderStorage(mock_logger)
+
+    await order_storage.store_orders_bulk([(1, 100), (2, 200), (3, 100)])
+
+    assert order_storage.orders_to_customers == {1: 100, 2: 200, 3: 100}
+
+
+async def test_store_barcodes_bulk(mock_logger: Logger) -> None:
+    """
+    Test that store_barcodes_bulk matches the per-row semantics, including
+    duplicates inside the same batch.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk([(1, 100), (2, 200)])
+
+    await order_storage.store_barcodes_bulk(
+        [
+            ("barcode1", "1"),
+            ("barcode2", "1"),
+            ("barcode3", ""),
+            ("barcode1", "2"),  # Duplicate of a used barcode
+            ("barcode3", "2"),  # Duplicate of an unused barcode
+            ("barcode4", "3"),  # Unknown order
+        ]
+    )
+
+    assert order_storage.customer_to_barcodes == {(1, 100): ["barcode1", "barcode2"]}
+    assert order_storage.used_barcodes == {"barcode1", "barcode2"}
+    assert order_storage.unused_barcodes == {"barcode3"}
+
+
+async def test_get_top_customers(mock_logger: Logger) -> None:
+    """
+    Test that top customers follow the order counts, with ties broken by the
+    order in which customers were first seen.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk(
+        [(1, 300), (2, 100), (3, 200), (4, 100), (5, 200), (6, 400)]
+    )
+
+    assert await order_storage.get_top_customers(2) == [(100, 2), (200, 2)]
+    assert await order_storage.get_top_customers(10) == [
+        (100, 2),
+        (200, 2),
+        (300, 1),
+        (400, 1),
+    ]
+
+
+async def test_get_top_customers_tracks_updates(mock_logger: Logger) -> None:
+    """
+    Test that the top customers index follows new and re-stored orders and
+    is not served stale from the cache.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk([(1, 100), (2, 100), (3, 200)])
+    assert await order_storage.get_top_customers(1) == [(100, 2)]
+
+    # Move both orders of customer 100 to customer 200
+    await order_storage.store_orders_bulk([(1, 200), (2, 200), (2, 200)])
+
+    assert await order_storage.get_top_customers(2) == [(200, 3)]
+    assert order_storage.customer_orders.counts == {200: 3}
+
+
+async def test_get_top_customers_after_restored_orders(mock_logger: Logger) -> None:
+    """
+    Test that orders stored again under another customer keep their position,
+    so ties follow the earliest current order of each customer as
+    `Counter.most_common` over the orders does.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk([(1, 300), (2, 200), (1, 100)])
+
+    assert await order_storage.get_top_customers(10) == [(100, 1), (200, 1)]
+
+    rng = random.Random(1)
+    for _ in range(20):
+        await order_storage.store_orders_bulk(
+            (rng.randint(1, 60), rng.randint(1, 15)) for _ in range(rng.randint(1, 30))
+        )
+        counter = Counter(order_storage.orders_to_customers.values())
+        assert await order_storage.get_top_customers(100) == counter.most_common()
+
+
+async def test_customer_vouchers_index(mock_logger: Logger) -> None:
+    """
+    Test that the customer index is kept during ingestion and merges, and that
+    lookups only return the vouchers of the requested customer.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk([(1, 100), (2, 200), (3, 100)])
+    await order_storage.store_barcodes_bulk(
+        [("barcode1", "1"), ("barcode2", "2"), ("barcode3", "1"), ("barcode4", "")]
+    )
+    await order_storage.merge_barcodes(
+        {(3, 100): ["barcode5"], (1, 100): ["barcode6"]}, {"barcode5"}, set()
+    )
+
+    assert await order_storage.get_customer_vouchers(100) == {
+        1: ["barcode1", "barcode3", "barcode6"],
+        3: ["barcode5"],
+    }
+    assert await order_storage.get_customer_vouchers(200) == {2: ["barcode2"]}
+    assert await order_storage.get_customer_barcode_count(100) == 4
+    assert await order_storage.get_customer_vouchers(300) == {}
+    assert await order_storage.get_customer_barcode_count(300) == 0
+
+
+async def test_allocate_barcodes(mock_logger: Logger) -> None:
+    """
+    Test that allocations move unused barcodes to the order's voucher and the
+    used set, and that invalid batches reserve nothing.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk([(1, 100), (2, 200)])
+    await order_storage.store_barcodes_bulk(
+        [("barcode1", "1"), ("barcode2", ""), ("barcode3", ""), ("barcode4", "")]
+    )
+
+    allocated = await order_storage.allocate_barcodes(1, 2)
+    assert len(allocated) == 2
+    assert set(allocated) <= {"barcode2", "barcode3", "barcode4"}
+    assert order_storage.customer_to_barcodes[(1, 100)] == ["barcode1", *allocated]
+    assert order_storage.used_barcodes == {"barcode1", *allocated}
+    assert await order_storage.get_customer_barcode_count(100) == 3
+
+    for requests, message in (
+        ([(2, 1), (3, 1)], "Unknown order: 3"),
+        ([(2, -1)], "Cannot allocate -1 barcodes"),
+        ([(2, 1), (2, 1)], "only 1 unused"),
+    ):
+        with pytest.raises(ValueError, match=message):
+            await order_storage.allocate_barcodes_bulk(requests)
+    assert len(order_storage.unused_barcodes) == 1
+
+    assert await order_storage.allocate_barcodes_bulk([(2, 1), (1, 0)]) == [
+        list(order_storage.customer_to_barcodes[(2, 200)]),
+        [],
+    ]
+    assert order_storage.unused_barcodes == set()
+
+
+async def test_allocate_barcodes_concurrently(mock_logger: Logger) -> None:
+    """
+    Test that concurrent allocations never hand out the same barcode twice.
+    """
+    order_storage = OrderStorage(mock_logger)
+    await order_storage.store_orders_bulk([(order_id, 1) for order_id in range(50)])
+    await order_storage.store_barcodes_bulk(
+        [(f"barcode{index}", "") for index in range(1_000)]
+    )
+
+    allocations = await asyncio.gather(
+        *(order_storage.allocate_barcodes(order_id, 20) for order_id in range(50))
+    )
+
+    allocated = [barcode for barcodes in allocations for barcode in barcodes]
+    assert len(set(allocated)) == 1_000
+    assert order_storage.unused_barcodes == set()
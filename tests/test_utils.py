@@ -2,6 +2,15 @@ import logging
 from pathlib import Path
 from unittest.mock import patch
 
+from vouchers_cli.options import (
+    DEFAULT_BATCH_WORKERS,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    CSVReader,
+    OutputFormat,
+    StorageBackend,
+)
 from vouchers_cli.utils import parse_arguments, setup_logger
 
 
@@ -58,3 +67,198 @@ async def test_parse_arguments_with_custom_files() -> None:
     assert args.orders_file == custom_orders
     assert args.barcodes_file == custom_barcodes
     assert args.output_dir == custom_output
+
+
+async def test_parse_arguments_with_batch_size() -> None:
+    """
+    Test parse_arguments with a custom batch size.
+    """
+    with patch("sys.argv", ["app", "--batch-size", "500"]):
+        args = parse_arguments("Test app")
+
+    assert args.batch_size == 500
+
+
+async def test_parse_arguments_with_storage() -> None:
+    """
+    Test parse_arguments with a non-default storage backend.
+    """
+    with patch("sys.argv", ["app", "--storage", "compact"]):
+        args = parse_arguments("Test app")
+
+    assert args.storage == StorageBackend.COMPACT
+
+
+async def test_parse_arguments_with_sqlite_storage() -> None:
+    """
+    Test parse_arguments with the sqlite storage and a custom database file.
+    """
+    with patch(
+        "sys.argv", ["app", "--storage", "sqlite", "--sqlite-path", "data.sqlite3"]
+    ):
+        args = parse_arguments("Test app")
+
+    assert args.storage == StorageBackend.SQLITE
+    assert args.sqlite_path == Path("data.sqlite3")
+
+
+async def test_parse_arguments_with_external_storage() -> None:
+    """
+    Test parse_arguments with the external storage and a memory limit.
+    """
+    with patch("sys.argv", ["app", "--storage", "external", "--memory-limit", "256"]):
+        args = parse_arguments("Test app")
+
+    assert args.storage == StorageBackend.EXTERNAL
+    assert args.memory_limit == 256
+
+
+async def test_parse_arguments_with_csv_reader() -> None:
+    """
+    Test parse_arguments with the memory-mapped CSV reader.
+    """
+    with patch("sys.argv", ["app", "--csv-reader", "mmap"]):
+        args = parse_arguments("Test app")
+
+    assert args.csv_reader == CSVReader.MMAP
+
+
+async def test_parse_arguments_with_top_customers() -> None:
+    """
+    Test parse_arguments with a custom number of top customers.
+    """
+    with patch("sys.argv", ["app", "--top-customers", "10"]):
+        args = parse_arguments("Test app")
+
+    assert args.top_customers == 10
+
+
+async def test_parse_arguments_with_workers() -> None:
+    """
+    Test parse_arguments with several workers.
+    """
+    with patch("sys.argv", ["app", "--workers", "4"]):
+        args = parse_arguments("Test app")
+
+    assert args.workers == 4
+
+
+async def test_parse_arguments_with_validate_output() -> None:
+    """
+    Test parse_arguments enables output validation on request.
+    """
+    with patch("sys.argv", ["app", "--validate-output"]):
+        args = parse_arguments("Test app")
+
+    assert args.validate_output is True
+
+
+async def test_parse_arguments_with_cache_options() -> None:
+    """
+    Test parse_arguments for the snapshot cache directory and forced rebuilds.
+    """
+    with patch("sys.argv", ["app"]):
+        args = parse_arguments("Test app")
+
+    assert args.cache_dir == DEFAULT_CACHE_DIR
+    assert args.no_cache is False
+
+    with patch("sys.argv", ["app", "--cache-dir", "/tmp/cache", "--no-cache"]):
+        args = parse_arguments("Test app")
+
+    assert args.cache_dir == Path("/tmp/cache")
+    assert args.no_cache is True
+
+
+async def test_parse_arguments_with_delta_state() -> None:
+    """
+    Test parse_arguments for the delta mode state file.
+    """
+    with patch("sys.argv", ["app"]):
+        args = parse_arguments("Test app")
+
+    assert args.delta_state is None
+
+    with patch("sys.argv", ["app", "--delta-state", "/tmp/state"]):
+        args = parse_arguments("Test app")
+
+    assert args.delta_state == Path("/tmp/state")
+
+
+async def test_parse_arguments_with_metrics_files() -> None:
+    """
+    Test parse_arguments with the JSON and Prometheus metrics files.
+    """
+    with patch(
+        "sys.argv",
+        ["app", "--metrics-json", "run.json", "--metrics-prometheus", "run.prom"],
+    ):
+        args = parse_arguments("Test app")
+
+    assert args.metrics_json == Path("run.json")
+    assert args.metrics_prometheus == Path("run.prom")
+
+
+async def test_parse_arguments_with_pipeline_depth() -> None:
+    """
+    Test parse_arguments with a pipeline depth.
+    """
+    with patch("sys.argv", ["app", "--pipeline-depth", "4"]):
+        args = parse_arguments("Test app")
+
+    assert args.pipeline_depth == 4
+
+
+async def test_parse_arguments_with_server_options() -> None:
+    """
+    Test parse_arguments for server mode and its listening address.
+    """
+    with patch("sys.argv", ["app"]):
+        args = parse_arguments("Test app")
+
+    assert (args.serve, args.host, args.port) == (False, DEFAULT_HOST, DEFAULT_PORT)
+
+    with patch("sys.argv", ["app", "--serve", "--host", "0.0.0.0", "--port", "9000"]):
+        args = parse_arguments("Test app")
+
+    assert (args.serve, args.host, args.port) == (True, "0.0.0.0", 9000)
+
+
+async def test_parse_arguments_with_batch_options() -> None:
+    """
+    Test parse_arguments for batch mode and its worker count.
+    """
+    with patch("sys.argv", ["app"]):
+        args = parse_arguments("Test app")
+
+    assert (args.batch, args.batch_workers) == (None, DEFAULT_BATCH_WORKERS)
+
+    with patch("sys.argv", ["app", "--batch", "jobs.csv", "--batch-workers", "3"]):
+        args = parse_arguments("Test app")
+
+    assert (args.batch, args.batch_workers) == (Path("jobs.csv"), 3)
+
+
+async def test_parse_arguments_with_output_format() -> None:
+    """
+    Test parse_arguments with an output format.
+    """
+    with patch("sys.argv", ["app"]):
+        args = parse_arguments("Test app")
+
+    assert args.output_format == OutputFormat.TEXT
+
+    with patch("sys.argv", ["app", "--output-format", "parquet"]):
+        args = parse_arguments("Test app")
+
+    assert args.output_format == OutputFormat.PARQUET
+
+
+async def test_parse_arguments_with_output_partitions() -> None:
+    """
+    Test parse_arguments with a number of output partitions.
+    """
+    with patch("sys.argv", ["app", "--output-partitions", "16"]):
+        args = parse_arguments("Test app")
+
+    assert args.output_partitions == 16
@@ -0,0 +1,122 @@
+import asyncio
+import importlib.util
+import os
+from logging import Logger
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from vouchers_cli.async_writer import AsyncWriter, output_file_name, write_behind
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.schemas import OutputSchema
+
+DEFAULT_ROW_GROUP_SIZE = 100_000  # Vouchers per Parquet row group
+
+
+class ParquetFileWriter(AsyncWriter[dict[str, list[Any]]]):
+    """
+    Asynchronous writer that writes the vouchers to a Parquet file, one row per
+    voucher keyed by customer and order, with its barcodes as a list column.
+
+    Vouchers are collected into columns of at most `row_group_size` rows on the
+    event loop; each batch is converted and written as a row group in a worker
+    thread while the next one is collected. Requires the optional `pyarrow`
+    package.
+    """
+
+    suffix = ".parquet"  # Suffix of the output file
+
+    def __init__(
+        self,
+        file_path: Path,
+        logger: Logger,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+        metrics: Metrics | None = None,
+    ):
+        """
+        :param file_path: Directory the output file is written to.
+        :param logger: Logger instance for logging messages.
+        :param row_group_size: Vouchers per row group, and per write.
+        :param metrics: Metrics receiving the `vouchers_written` counter.
+        """
+        # Fail before loading the input rather than when writing the output
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ValueError(
+                "Writing Parquet output requires the optional 'pyarrow' package "
+                "(poetry install --extras arrow)."
+            )
+        self._file_path = file_path
+        self._logger = logger
+        self._row_group_size = row_group_size
+        self._metrics = metrics or Metrics()
+
+    async def _serialize_output(
+        self, output: OutputSchema
+    ) -> AsyncIterator[dict[str, list[Any]]]:
+        """
+        Collect the vouchers into batches of columns.
+
+        :param output: The output data to be serialized.
+        :return: An async iterator over column name -> values mappings of at
+            most `row_group_size` rows.
+        """
+        customer_ids: list[int] = []
+        order_ids: list[int] = []
+        barcodes: list[list[str]] = []
+        async for voucher in output.vouchers:
+            customer_ids.append(voucher.customer_id)
+            order_ids.append(voucher.order_id)
+            barcodes.append(voucher.barcodes)
+            if len(customer_ids) >= self._row_group_size:
+                self._metrics.count("vouchers_written", len(customer_ids))
+                yield {
+                    "customer_id": customer_ids,
+                    "order_id": order_ids,
+                    "barcodes": barcodes,
+                }
+                customer_ids, order_ids, barcodes = [], [], []
+
+        if customer_ids:
+            self._metrics.count("vouchers_written", len(customer_ids))
+            yield {
+                "customer_id": customer_ids,
+                "order_id": order_ids,
+                "barcodes": barcodes,
+            }
+
+    def _get_file_name(self) -> str:
+        """
+        Generate a unique file name for the output file.
+        """
+        return output_file_name(self._file_path, self.suffix)
+
+    async def write(self, output: OutputSchema) -> None:
+        """
+        Write the vouchers to a Parquet file asynchronously.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        filename = self._get_file_name()
+
+        # Ensure the directory exists before writing
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        schema = pa.schema(
+            [
+                ("customer_id", pa.int64()),
+                ("order_id", pa.int64()),
+                ("barcodes", pa.list_(pa.string())),
+            ]
+        )
+        loop = asyncio.get_running_loop()
+        writer = await loop.run_in_executor(None, pq.ParquetWriter, filename, schema)
+        try:
+            await write_behind(
+                self._serialize_output(output),
+                lambda columns: writer.write_table(pa.table(columns, schema=schema)),
+            )
+        finally:
+            await loop.run_in_executor(None, writer.close)
+
+        self._logger.info("Vouchers were written to %s.", filename)
@@ -1,22 +1,73 @@
+import asyncio
+import bz2
 import csv
+import gzip
 from io import StringIO
 from logging import Logger
 from pathlib import Path
-from typing import Iterable, Protocol
+from typing import AsyncGenerator, AsyncIterator, Iterable, Protocol, Sequence
 
 import aiofiles
 
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.options import DEFAULT_BATCH_SIZE, Compression, compression_of
+from vouchers_cli.pipeline import Prefetcher
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # Bytes read from disk per chunk (1 MiB)
+
+# Typed column batches handed to the storage
+OrderColumns = tuple[Sequence[int], Sequence[int]]  # (order_ids, customer_ids)
+BarcodeColumns = tuple[Sequence[str], Sequence[int | None]]  # (barcodes, order_ids)
+
+
+class BinaryInput(Protocol):
+    """
+    Readable binary stream, such as a decompressing file object.
+    """
+
+    def read(self, size: int, /) -> bytes: ...
+
+    def close(self) -> None: ...
+
+
+def open_decompressed(file_path: Path, compression: Compression) -> BinaryInput:
+    """
+    Open a compressed file as a stream of its decompressed bytes. Concatenated
+    streams (gzip members, zstd frames, bz2 streams) are read one after another.
+    """
+    if compression == Compression.GZIP:
+        return gzip.open(file_path, "rb")
+    if compression == Compression.BZ2:
+        return bz2.open(file_path, "rb")
+    import zstandard
+
+    return zstandard.ZstdDecompressor().stream_reader(
+        open(file_path, "rb"), read_across_frames=True
+    )
+
 
 class FileReader(Protocol):
     """
-    Protocol for asynchronous CSV file readers.
-    Defines the expected method signature for reading CSV files.
+    Protocol for asynchronous order and barcode file readers.
+    Defines the expected method signatures for streaming typed column batches.
     """
 
-    async def read_csv(self, file_path: Path) -> Iterable[list[str]]:
+    def iter_orders(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[OrderColumns]:
         """
-        Asynchronously read a CSV file and return its contents as
-        an iterable of string lists.
+        Asynchronously stream an orders file as (order_ids, customer_ids) column
+        batches of at most `batch_size` rows.
+        """
+        ...
+
+    def iter_barcodes(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[BarcodeColumns]:
+        """
+        Asynchronously stream a barcodes file as (barcodes, order_ids) column
+        batches of at most `batch_size` rows; unused barcodes have a `None`
+        order id.
         """
         ...
 
@@ -24,26 +75,160 @@ class FileReader(Protocol):
 class AsyncCSVReader:
     """
     Asynchronous CSV file reader that reads and parses CSV files.
+
+    Files compressed with gzip, zstd or bz2, detected from their suffix or first
+    bytes, are decompressed as a stream: every chunk is read and decompressed in
+    a worker thread, so memory is bounded by the chunk size as for plain files.
     """
 
-    def __init__(self, logger: Logger):
+    def __init__(
+        self,
+        logger: Logger,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        metrics: Metrics | None = None,
+        pipeline_depth: int = 0,
+    ):
         """
         Initialize the CSV reader with a logger.
+
+        :param logger: Logger instance for logging messages.
+        :param chunk_size: Number of bytes read from disk at a time when streaming.
+        :param metrics: Metrics receiving the `csv_read` and `csv_parse` stage
+            timers and the `bytes_read` and `rows_parsed` counters.
+        :param pipeline_depth: Number of chunks read ahead of the parser in a
+            separate task, so disk reads overlap parsing; 0 reads on demand.
         """
         self._logger = logger
+        self._chunk_size = chunk_size
+        self._metrics = metrics or Metrics()
+        self._pipeline_depth = pipeline_depth
 
     async def read_csv(self, file_path: Path) -> Iterable[list[str]]:
         """
         Read a CSV file asynchronously and return its contents as
         an iterable of string lists.
         """
+        rows: list[list[str]] = []
+        async for batch in self.iter_batches(file_path):
+            rows.extend(batch)
+        return rows
+
+    async def _iter_chunks(self, file_path: Path) -> AsyncGenerator[bytes]:
+        """
+        Yield the content of the file in chunks of at most `chunk_size` bytes,
+        decompressed if the file is compressed.
+        """
+        compression = compression_of(file_path)
+        if compression is None:
+            async with aiofiles.open(file_path, mode="rb") as file:
+                while chunk := await file.read(self._chunk_size):
+                    yield chunk
+            return
+
+        loop = asyncio.get_running_loop()
+        stream = await loop.run_in_executor(
+            None, open_decompressed, file_path, compression
+        )
+        try:
+            while chunk := await loop.run_in_executor(
+                None, stream.read, self._chunk_size
+            ):
+                yield chunk
+        finally:
+            await loop.run_in_executor(None, stream.close)
+
+    async def _iter_buffers(self, file_path: Path) -> AsyncGenerator[bytes]:
+        """
+        Read stage: yield the file in fixed-size byte chunks cut after their
+        last line break. The trailing partial line of every chunk is carried
+        over to the next one.
+        """
+        metrics = self._metrics
+        chunks = self._iter_chunks(file_path)
+        try:
+            remainder = b""
+            while True:
+                with metrics.stage("csv_read"):
+                    chunk = await anext(chunks, b"")
+                metrics.count("bytes_read", len(chunk))
+                if not chunk:
+                    break
+                buffer = remainder + chunk
+                cut = buffer.rfind(b"\n") + 1
+                remainder = buffer[cut:]
+                if cut:
+                    yield buffer[:cut]
+
+            # End of file: whatever is left is the last line
+            if remainder:
+                yield remainder
+        finally:
+            await chunks.aclose()
+
+    async def iter_batches(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[list[list[str]]]:
+        """
+        Stream a CSV file in fixed-size byte chunks and yield its rows in batches.
+
+        Only complete lines are parsed, so peak memory is bounded by the chunk
+        and batch sizes (and the pipeline depth) rather than by the file size.
+
+        :param file_path: Path to the CSV file.
+        :param batch_size: Maximum number of rows per yielded batch.
+        """
         self._logger.debug(f"Reading from {file_path}")
+        metrics = self._metrics
+        buffers: AsyncGenerator[bytes] | Prefetcher[bytes]
+        buffers = self._iter_buffers(file_path)
+        if self._pipeline_depth:
+            buffers = Prefetcher(buffers, self._pipeline_depth)
+
+        batch: list[list[str]] = []
+        header_skipped = False
         try:
-            async with aiofiles.open(file_path, mode="r", encoding="utf-8") as file:
-                content = await file.read()
-                reader = csv.reader(StringIO(content))
-                next(reader, None)  # Skip header row
-                return list(reader)
+            async for buffer in buffers:
+                with metrics.stage("csv_parse"):
+                    reader = csv.reader(StringIO(buffer.decode("utf-8"), newline=""))
+                    if not header_skipped:
+                        next(reader, None)  # Skip header row
+                        header_skipped = True
+                    rows = [row for row in reader if row]  # Ignore blank lines
+                metrics.count("rows_parsed", len(rows))
+
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+
+            if batch:
+                yield batch
         except FileNotFoundError:
             self._logger.error(f"File not found: {file_path}")
-            return []
+        finally:
+            await buffers.aclose()
+
+    async def iter_orders(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[OrderColumns]:
+        """
+        Stream an orders CSV file as (order_ids, customer_ids) column batches.
+        """
+        async for rows in self.iter_batches(file_path, batch_size):
+            yield (
+                [int(order_id) for order_id, _ in rows],
+                [int(customer_id) for _, customer_id in rows],
+            )
+
+    async def iter_barcodes(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[BarcodeColumns]:
+        """
+        Stream a barcodes CSV file as (barcodes, order_ids) column batches.
+        """
+        async for rows in self.iter_batches(file_path, batch_size):
+            yield (
+                [barcode for barcode, _ in rows],
+                [int(order_id) if order_id else None for _, order_id in rows],
+            )
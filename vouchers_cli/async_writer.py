@@ -1,17 +1,93 @@
 import asyncio
+import gzip
+import hashlib
+import importlib.util
+import json
 import os
 import sys
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from logging import Logger
 from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Generic,
+    NamedTuple,
+    Protocol,
+    TypeVar,
+)
 
 import aiofiles
 
+from vouchers_cli.compact_storage import FIBONACCI_MULTIPLIER
+from vouchers_cli.metrics import Metrics
 from vouchers_cli.schemas import OutputSchema
 
+DEFAULT_WRITE_CHUNK_SIZE = 1024 * 1024  # Characters buffered per file write (1 MiB)
+DEFAULT_GZIP_LEVEL = 6  # zlib's default trade-off between speed and ratio
+DEFAULT_ZSTD_LEVEL = 3  # zstd's default trade-off between speed and ratio
+DEFAULT_PARTITION_CHUNK_SIZE = 256 * 1024  # Characters buffered per partition write
+MANIFEST_NAME = "manifest.json"  # Manifest of a partitioned output directory
+# Threads writing partition files; the default of ThreadPoolExecutor, as the
+# writes wait on the disk rather than the CPU
+DEFAULT_WRITE_THREADS = min(32, (os.cpu_count() or 1) + 4)
 
-class AsyncWriter(ABC):
+T = TypeVar("T")
+
+
+def output_file_name(directory: Path, suffix: str) -> str:
+    """
+    Generate a unique file name for an output file in `directory`.
+    """
+    return f"{directory}/output_{datetime.now().strftime('%Y-%m-%d-%H:%M:%S')}{suffix}"
+
+
+def partition_of(customer_id: int, partitions: int) -> int:
+    """
+    Return the partition of a customer: the id is mixed with a 64-bit Fibonacci
+    (multiplicative) hash, whose high bits are then scaled to [0, partitions),
+    so ids with a regular stride still spread over every partition.
+    """
+    mixed = (customer_id * FIBONACCI_MULTIPLIER) & 0xFFFF_FFFF_FFFF_FFFF
+    return (mixed * partitions) >> 64
+
+
+async def write_behind(chunks: AsyncIterable[T], write: Callable[[T], Any]) -> None:
+    """
+    Call the blocking `write` on every chunk in a worker thread, while the next
+    chunk is produced on the event loop. At most one write is in flight, so
+    chunks are written in order and memory stays bounded by two chunks.
+    """
+    loop = asyncio.get_running_loop()
+    pending: asyncio.Future[Any] | None = None
+    try:
+        async for chunk in chunks:
+            if pending is not None:
+                await pending
+            pending = loop.run_in_executor(None, write, chunk)
+        if pending is not None:
+            await pending
+    finally:
+        # Never let the caller close the file under a write still running
+        if pending is not None:
+            await asyncio.wait([pending])
+
+
+class BinaryOutput(Protocol):
+    """
+    Binary file, or stream over one, that output bytes are written to.
+    """
+
+    def write(self, data: bytes, /) -> int: ...
+
+    def close(self) -> None: ...
+
+
+class AsyncWriter(ABC, Generic[T]):
     """
     Abstract base class for asynchronous writers.
     Defines the interface for writing output data.
@@ -27,17 +103,18 @@ class AsyncWriter(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def _serialize_output(self, output: OutputSchema) -> str:
+    def _serialize_output(self, output: OutputSchema) -> AsyncIterator[T]:
         """
-        Serialize the output data to a string format.
+        Serialize the output data, as a stream of chunks.
 
         :param output: The output data to be serialized.
-        :return: A string representation of the output data.
+        :return: An async iterator over chunks of the serialized output, e.g.
+            strings of the text representation.
         """
         raise NotImplementedError
 
 
-class STDOutWriter(AsyncWriter):
+class STDOutWriter(AsyncWriter[str]):
     """
     Asynchronous writer that outputs data to standard output (stdout).
     """
@@ -45,19 +122,19 @@ class STDOutWriter(AsyncWriter):
     def __init__(self, logger: Logger):
         self._logger = logger
 
-    async def _serialize_output(self, output: OutputSchema) -> str:
+    async def _serialize_output(self, output: OutputSchema) -> AsyncIterator[str]:
         """
         Convert output data into a formatted string suitable for stdout.
 
         :param output: The output data to be serialized.
-        :return: A formatted string representing the output data.
+        :return: A single chunk with the formatted statistics.
         """
         top_customers = "\n".join(
             f"{customer_id}, {amount}" for customer_id, amount in output.top_customers
         )
-        return (
+        yield (
             f"Top customers:\n{top_customers}\n"
-            f"Unused barcodes: '{len(output.unused_barcodes)}'\n"
+            f"Unused barcodes: '{output.unused_barcode_count}'\n"
         )
 
     async def write(self, output: OutputSchema) -> None:
@@ -69,45 +146,78 @@ class STDOutWriter(AsyncWriter):
         self._logger.debug("Writing statistics to stdout:\n")
 
         loop = asyncio.get_event_loop()
-        encoded_output = await self._serialize_output(output)
-        await loop.run_in_executor(
-            None,
-            lambda content: sys.stdout.write(content) and sys.stdout.flush(),
-            encoded_output,
-        )
+        async for encoded_output in self._serialize_output(output):
+            await loop.run_in_executor(
+                None,
+                lambda content: sys.stdout.write(content) and sys.stdout.flush(),
+                encoded_output,
+            )
 
 
-class FileWriter(AsyncWriter):
+class FileWriter(AsyncWriter[str]):
     """
     Asynchronous writer that writes output data to a file.
     """
 
-    def __init__(self, file_path: Path, logger: Logger):
+    suffix = ".log"  # Suffix of the output file
+
+    def __init__(
+        self,
+        file_path: Path,
+        logger: Logger,
+        chunk_size: int = DEFAULT_WRITE_CHUNK_SIZE,
+        metrics: Metrics | None = None,
+    ):
+        """
+        :param file_path: Directory the output file is written to.
+        :param logger: Logger instance for logging messages.
+        :param chunk_size: Characters buffered per file write.
+        :param metrics: Metrics receiving the `vouchers_written` and
+            `chars_written` counters.
+        """
         self._file_path = file_path
         self._logger = logger
+        self._chunk_size = chunk_size
+        self._metrics = metrics or Metrics()
 
-    async def _serialize_output(self, output: OutputSchema) -> str:
+    async def _serialize_output(self, output: OutputSchema) -> AsyncIterator[str]:
         """
         Convert output data into a formatted string suitable for file storage.
 
+        Vouchers are pulled lazily and emitted in chunks of roughly `chunk_size`
+        characters, so memory use does not grow with the number of vouchers.
+
         :param output: The output data to be serialized.
-        :return: A formatted string representing the output data.
+        :return: An async iterator over newline-separated voucher lines.
         """
-        lines = []
-        for voucher in output.vouchers:
-            lines.append(
-                f"{voucher.customer_id},{voucher.order_id},[{','.join(voucher.barcodes)}]"
+        metrics = self._metrics
+        lines: list[str] = []
+        size = 0
+        separator = ""
+        async for voucher in output.vouchers:
+            line = (
+                f"{separator}{voucher.customer_id},{voucher.order_id},"
+                f"[{','.join(voucher.barcodes)}]"
             )
-        return "\n".join(lines)
+            separator = "\n"
+            lines.append(line)
+            size += len(line)
+            if size >= self._chunk_size:
+                metrics.count("vouchers_written", len(lines))
+                metrics.count("chars_written", size)
+                yield "".join(lines)
+                lines, size = [], 0
+
+        if lines:
+            metrics.count("vouchers_written", len(lines))
+            metrics.count("chars_written", size)
+            yield "".join(lines)
 
     def _get_file_name(self) -> str:
         """
         Generate a unique file name for the output file.
         """
-        return (
-            f"{self._file_path}/"
-            f"output_{datetime.now().strftime('%Y-%m-%d-%H:%M:%S')}.log"
-        )
+        return output_file_name(self._file_path, self.suffix)
 
     async def write(self, output: OutputSchema) -> None:
         """
@@ -120,6 +230,306 @@ class FileWriter(AsyncWriter):
             os.makedirs(os.path.dirname(filename), exist_ok=True)
 
         async with aiofiles.open(filename, mode="w") as file:
-            await file.write(await self._serialize_output(output))
+            async for chunk in self._serialize_output(output):
+                await file.write(chunk)
 
         self._logger.info("Vouchers were written to %s.", filename)
+
+
+class CompressedFileWriter(FileWriter):
+    """
+    Asynchronous writer that writes the text output of `FileWriter` to a
+    compressed file.
+
+    Chunks are compressed and written in a worker thread while the next chunk
+    is serialized on the event loop; zlib and zstd release the GIL while
+    compressing, so both overlap.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        logger: Logger,
+        chunk_size: int = DEFAULT_WRITE_CHUNK_SIZE,
+        metrics: Metrics | None = None,
+        level: int | None = None,
+    ):
+        """
+        :param level: Compression level; None uses the format's default.
+        """
+        super().__init__(file_path, logger, chunk_size, metrics)
+        self._level = level
+
+    @abstractmethod
+    def _open(self, filename: str) -> BinaryOutput:
+        """
+        Open `filename` as a compressing binary file.
+        """
+        raise NotImplementedError
+
+    async def write(self, output: OutputSchema) -> None:
+        """
+        Write the serialized output data to a compressed file asynchronously.
+        """
+        filename = self._get_file_name()
+
+        # Ensure the directory exists before writing
+        if os.path.dirname(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        loop = asyncio.get_running_loop()
+        file = await loop.run_in_executor(None, self._open, filename)
+        try:
+            await write_behind(
+                (chunk.encode() async for chunk in self._serialize_output(output)),
+                file.write,
+            )
+        finally:
+            await loop.run_in_executor(None, file.close)
+
+        self._logger.info("Vouchers were written to %s.", filename)
+
+
+class GzipFileWriter(CompressedFileWriter):
+    """
+    Asynchronous writer that writes the text output to a gzip file.
+    """
+
+    suffix = ".log.gz"
+
+    def _open(self, filename: str) -> BinaryOutput:
+        level = DEFAULT_GZIP_LEVEL if self._level is None else self._level
+        return gzip.open(filename, "wb", compresslevel=level)
+
+
+class ZstdFileWriter(CompressedFileWriter):
+    """
+    Asynchronous writer that writes the text output to a Zstandard file.
+    Requires the optional `zstandard` package.
+    """
+
+    suffix = ".log.zst"
+
+    def __init__(
+        self,
+        file_path: Path,
+        logger: Logger,
+        chunk_size: int = DEFAULT_WRITE_CHUNK_SIZE,
+        metrics: Metrics | None = None,
+        level: int | None = None,
+    ):
+        # Fail before loading the input rather than when writing the output
+        if importlib.util.find_spec("zstandard") is None:
+            raise ValueError(
+                "Writing zstd output requires the optional 'zstandard' package "
+                "(poetry install --extras zstd)."
+            )
+        super().__init__(file_path, logger, chunk_size, metrics, level)
+
+    def _open(self, filename: str) -> BinaryOutput:
+        import zstandard
+
+        level = DEFAULT_ZSTD_LEVEL if self._level is None else self._level
+        compressor = zstandard.ZstdCompressor(level=level)
+        return compressor.stream_writer(open(filename, "wb"))
+
+
+class PartitionChunk(NamedTuple):
+    """
+    Serialized vouchers of one partition, written with one file write.
+    """
+
+    partition: int
+    vouchers: int
+    text: str
+
+
+class _Partition:
+    """
+    One file of a partitioned output, written in order from worker threads
+    with at most one write in flight, while its checksum is updated.
+    """
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self.vouchers = 0
+        self.bytes = 0
+        self._sha256 = hashlib.sha256()
+        self._file: BinaryOutput | None = None
+        self._pending: asyncio.Future[None] | None = None
+
+    def _write(self, text: str) -> None:
+        data = text.encode()
+        if self._file is None:
+            self._file = open(self.file_path, "wb")
+        self._file.write(data)
+        self._sha256.update(data)
+        self.bytes += len(data)
+
+    def _close(self) -> None:
+        # Partitions without vouchers still get their (empty) file
+        if self._file is None:
+            self._file = open(self.file_path, "wb")
+        self._file.close()
+
+    async def submit(self, pool: ThreadPoolExecutor, chunk: PartitionChunk) -> None:
+        """
+        Write a chunk in `pool` once the previous write of this partition is
+        done; writes of other partitions keep running meanwhile.
+        """
+        if self._pending is not None:
+            await self._pending
+        self.vouchers += chunk.vouchers
+        loop = asyncio.get_running_loop()
+        self._pending = loop.run_in_executor(pool, self._write, chunk.text)
+
+    async def flush(self) -> None:
+        """
+        Wait for the write in flight, raising its error.
+        """
+        if self._pending is not None:
+            await self._pending
+
+    async def close(self, pool: ThreadPoolExecutor) -> None:
+        """
+        Close the file once no write is in flight.
+        """
+        if self._pending is not None:
+            await asyncio.wait([self._pending])
+        await asyncio.get_running_loop().run_in_executor(pool, self._close)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "file": self.file_path.name,
+            "vouchers": self.vouchers,
+            "bytes": self.bytes,
+            "sha256": self._sha256.hexdigest(),
+        }
+
+
+class PartitionedFileWriter(AsyncWriter[PartitionChunk]):
+    """
+    Asynchronous writer that hash-partitions the vouchers by customer into
+    `partitions` text files, so downstream consumers can process them in
+    parallel.
+
+    Vouchers are read in one pass; voucher lines (as written by `FileWriter`)
+    of customer `c` go to partition `partition_of(c, partitions)`, so all
+    vouchers of a customer land in the same file. Each partition buffers its
+    lines and hands full buffers to a thread pool, so the files are written in
+    parallel. A manifest lists the voucher count, size and SHA-256 checksum of
+    every file.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        logger: Logger,
+        partitions: int,
+        chunk_size: int = DEFAULT_PARTITION_CHUNK_SIZE,
+        metrics: Metrics | None = None,
+        threads: int = DEFAULT_WRITE_THREADS,
+    ):
+        """
+        :param file_path: Directory the output directory is created in.
+        :param logger: Logger instance for logging messages.
+        :param partitions: Number of output files.
+        :param chunk_size: Characters buffered per partition before a write.
+        :param metrics: Metrics receiving the `vouchers_written` and
+            `chars_written` counters.
+        :param threads: Threads writing the files, capped at `partitions`.
+        """
+        self._file_path = file_path
+        self._logger = logger
+        self._partitions = partitions
+        self._chunk_size = chunk_size
+        self._metrics = metrics or Metrics()
+        self._threads = threads
+
+    async def _serialize_output(
+        self, output: OutputSchema
+    ) -> AsyncIterator[PartitionChunk]:
+        """
+        Convert the vouchers into text lines, split by partition.
+
+        :param output: The output data to be serialized.
+        :return: An async iterator over chunks of roughly `chunk_size`
+            characters of one partition each.
+        """
+        metrics = self._metrics
+        partitions = self._partitions
+        buffers: list[list[str]] = [[] for _ in range(partitions)]
+        sizes = [0] * partitions
+        started = [False] * partitions
+
+        def chunk(index: int) -> PartitionChunk:
+            # Lines are separated, not terminated, by newlines as in FileWriter
+            text = "\n".join(buffers[index])
+            if started[index]:
+                text = "\n" + text
+            started[index] = True
+            metrics.count("vouchers_written", len(buffers[index]))
+            metrics.count("chars_written", len(text))
+            vouchers = len(buffers[index])
+            buffers[index], sizes[index] = [], 0
+            return PartitionChunk(index, vouchers, text)
+
+        async for voucher in output.vouchers:
+            index = partition_of(voucher.customer_id, partitions)
+            line = (
+                f"{voucher.customer_id},{voucher.order_id},"
+                f"[{','.join(voucher.barcodes)}]"
+            )
+            buffers[index].append(line)
+            sizes[index] += len(line)
+            if sizes[index] >= self._chunk_size:
+                yield chunk(index)
+
+        for index in range(partitions):
+            if buffers[index]:
+                yield chunk(index)
+
+    def _get_directory_name(self) -> str:
+        """
+        Generate a unique name for the output directory.
+        """
+        return output_file_name(self._file_path, "")
+
+    async def write(self, output: OutputSchema) -> None:
+        """
+        Write the vouchers to the partition files in parallel, then the
+        manifest.
+        """
+        directory = Path(self._get_directory_name())
+        directory.mkdir(parents=True, exist_ok=True)
+        partitions = [
+            _Partition(directory / f"part-{index:05d}.log")
+            for index in range(self._partitions)
+        ]
+
+        threads = min(self._threads, self._partitions)
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            try:
+                async for chunk in self._serialize_output(output):
+                    await partitions[chunk.partition].submit(pool, chunk)
+                await asyncio.gather(*(partition.flush() for partition in partitions))
+            finally:
+                await asyncio.gather(
+                    *(partition.close(pool) for partition in partitions)
+                )
+
+        files = [partition.to_dict() for partition in partitions]
+        manifest = {
+            "partitions": self._partitions,
+            "partition_key": (
+                f"((customer_id * {FIBONACCI_MULTIPLIER:#x}) mod 2**64 "
+                f"* {self._partitions}) >> 64"
+            ),
+            "vouchers": sum(file["vouchers"] for file in files),
+            "files": files,
+        }
+        (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n")
+
+        self._logger.info(
+            "Vouchers were written to %s partitions in %s.", self._partitions, directory
+        )
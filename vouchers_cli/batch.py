@@ -0,0 +1,262 @@
+import asyncio
+import csv
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from logging import Logger
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from vouchers_cli.metrics import peak_rss_bytes
+from vouchers_cli.options import DEFAULT_BATCH_WORKERS, StorageBackend
+
+# Columns of a manifest file, one job per row
+MANIFEST_COLUMNS = ("orders_file", "barcodes_file", "output_dir")
+
+# Logger set up once per worker process by the pool initializer
+_worker_logger_name = __name__
+
+
+class BatchJob(NamedTuple):
+    """
+    One (orders, barcodes, output_dir) triple of a manifest.
+    """
+
+    name: str  # Manifest line, e.g. "line 2", used in logs and the summary
+    orders_file_path: Path
+    barcodes_file_path: Path
+    output_dir: Path
+
+
+class JobResult(NamedTuple):
+    """
+    Outcome of one batch job.
+    """
+
+    name: str
+    exit_code: int  # 0 on success, 1 on failure, as for a single run
+    seconds: float
+    error: str | None
+    metrics: dict[str, Any]  # Metrics of the job (`Metrics.to_dict`)
+
+    @property
+    def rows(self) -> int:
+        counters = self.metrics.get("counters", {})
+        return int(
+            counters.get("orders_stored", 0) + counters.get("barcodes_stored", 0)
+        )
+
+
+def read_manifest(manifest_path: Path) -> list[BatchJob]:
+    """
+    Read a CSV manifest with `orders_file`, `barcodes_file` and `output_dir`
+    columns. Relative paths are resolved against the manifest's directory.
+
+    :raises ValueError: If a column is missing, a row is incomplete or two jobs
+        share an output directory.
+    """
+    base = manifest_path.parent
+    jobs: list[BatchJob] = []
+    output_dirs: dict[Path, str] = {}
+    with open(manifest_path, encoding="utf-8", newline="") as file:
+        reader = csv.DictReader(file)
+        missing = sorted(set(MANIFEST_COLUMNS) - set(reader.fieldnames or ()))
+        if missing:
+            raise ValueError(
+                f"Manifest {manifest_path} lacks the columns: {', '.join(missing)}"
+            )
+        for row in reader:
+            name = f"line {reader.line_num}"
+            if not all(row.get(column) for column in MANIFEST_COLUMNS):
+                raise ValueError(f"Manifest {manifest_path}, {name}: empty column")
+            orders, barcodes, output_dir = (
+                base / row[column] for column in MANIFEST_COLUMNS
+            )
+            # Output files are named by the second, so jobs must not share a directory
+            if output_dir in output_dirs:
+                raise ValueError(
+                    f"Manifest {manifest_path}, {name}: output directory "
+                    f"{output_dir} is also used by {output_dirs[output_dir]}"
+                )
+            output_dirs[output_dir] = name
+            jobs.append(BatchJob(name, orders, barcodes, output_dir))
+    return jobs
+
+
+def init_batch_worker(logger_name: str, log_level: int) -> None:
+    """
+    Pool initializer that sets up the logger of a spawned worker process.
+    """
+    global _worker_logger_name
+    _worker_logger_name = logger_name
+    # Imported here as the utils module builds on the CLI parser
+    from vouchers_cli.utils import setup_logger
+
+    setup_logger(logger_name, log_level)
+
+
+def run_job(job: BatchJob, options: dict[str, Any]) -> JobResult:
+    """
+    Run one `VouchersExtractor` job with the shared options, in its own event
+    loop. Any error fails this job only.
+    """
+    # Imported here so that the CLI process only loads them in the workers
+    from vouchers_cli.extractor import VouchersExtractor
+    from vouchers_cli.schemas import ExtractorConfig
+
+    logger = logging.getLogger(_worker_logger_name).getChild(job.name)
+    start = time.perf_counter()
+    try:
+        configs = ExtractorConfig(
+            orders_file_path=job.orders_file_path,
+            barcodes_file_path=job.barcodes_file_path,
+            output_dir=job.output_dir,
+            **options,
+        )
+        extractor = VouchersExtractor.create(configs, logger)
+        asyncio.run(extractor.run())
+    except Exception as e:  # Per-job isolation: report and carry on
+        logger.error(f"Job failed: {e}")
+        return JobResult(
+            job.name,
+            1,
+            time.perf_counter() - start,
+            str(e),
+            {"peak_rss_bytes": peak_rss_bytes()},
+        )
+    return JobResult(
+        job.name, 0, time.perf_counter() - start, None, extractor.metrics.to_dict()
+    )
+
+
+def summarize(results: list[JobResult], seconds: float) -> dict[str, Any]:
+    """
+    Return the outcome and throughput of every job and of the whole batch,
+    which took `seconds`, as a JSON-serializable mapping.
+    """
+    rows = sum(result.rows for result in results)
+    return {
+        "jobs": [
+            {
+                "name": result.name,
+                "exit_code": result.exit_code,
+                "error": result.error,
+                "seconds": result.seconds,
+                "rows": result.rows,
+                "rows_per_second": result.rows / result.seconds
+                if result.seconds
+                else 0.0,
+                "metrics": result.metrics,
+            }
+            for result in results
+        ],
+        "failed": sum(1 for result in results if result.exit_code),
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+    }
+
+
+class BatchRunner:
+    """
+    Runs the jobs of a manifest in a pool of worker processes.
+
+    Every worker pays interpreter startup and imports once and then runs job
+    after job, each in a fresh event loop with its own repository and writers,
+    so a failing job does not affect the others.
+    """
+
+    def __init__(
+        self,
+        jobs: list[BatchJob],
+        options: dict[str, Any],
+        logger: Logger,
+        workers: int = DEFAULT_BATCH_WORKERS,
+        summary_json: Path | None = None,
+    ):
+        """
+        :param jobs: Jobs to run, reported in this order.
+        :param options: `ExtractorConfig` options shared by every job, besides
+            the file paths.
+        :param logger: Logger instance for logging messages; workers log to a
+            child logger per job.
+        :param workers: Number of worker processes.
+        :param summary_json: File the batch summary, with the metrics of every
+            job, is written to as JSON.
+        """
+        self._jobs = jobs
+        self._options = options
+        self._logger = logger
+        self._workers = workers
+        self._summary_json = summary_json
+
+    @classmethod
+    def create(
+        cls,
+        manifest_path: Path,
+        options: dict[str, Any],
+        logger: Logger,
+        workers: int = DEFAULT_BATCH_WORKERS,
+        summary_json: Path | None = None,
+    ) -> "BatchRunner":
+        """
+        Factory method to create a runner over the jobs of a manifest file.
+
+        :raises ValueError: If the manifest is invalid, or the options write to
+            paths that concurrent jobs would share.
+        """
+        # Jobs would all read and write the same state or database file
+        if options.get("delta_state") is not None:
+            raise ValueError("Batch mode cannot be combined with --delta-state.")
+        if options.get("storage") == StorageBackend.SQLITE:
+            raise ValueError("Batch mode cannot be combined with the 'sqlite' storage.")
+        return cls(read_manifest(manifest_path), options, logger, workers, summary_json)
+
+    async def run(self) -> list[JobResult]:
+        """
+        Run every job and log a summary.
+
+        :return: The job results, in manifest order.
+        """
+        loop = asyncio.get_running_loop()
+        # Spawned workers are safe to start from the threaded event loop process
+        context = multiprocessing.get_context("spawn")
+        start = time.perf_counter()
+
+        with ProcessPoolExecutor(
+            max_workers=max(min(self._workers, len(self._jobs)), 1),
+            mp_context=context,
+            initializer=init_batch_worker,
+            initargs=(self._logger.name, self._logger.level),
+        ) as pool:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, run_job, job, self._options)
+                    for job in self._jobs
+                )
+            )
+
+        summary = summarize(results, time.perf_counter() - start)
+        self._log_summary(summary)
+        if self._summary_json is not None:
+            self._summary_json.parent.mkdir(parents=True, exist_ok=True)
+            self._summary_json.write_text(json.dumps(summary, indent=2) + "\n")
+            self._logger.info("Batch summary was written to %s.", self._summary_json)
+        return results
+
+    def _log_summary(self, summary: dict[str, Any]) -> None:
+        """
+        Log the outcome and throughput of every job and of the whole batch.
+        """
+        for job in summary["jobs"]:
+            status = "ok" if not job["exit_code"] else f"failed ({job['error']})"
+            self._logger.info(
+                f"{job['name']}: {status} in {job['seconds']:.2f}s, "
+                f"{job['rows']:,} rows, {job['rows_per_second']:,.0f} rows/s"
+            )
+        self._logger.info(
+            f"Batch of {len(summary['jobs'])} jobs ({summary['failed']} failed) in "
+            f"{summary['seconds']:.2f}s, {summary['rows_per_second']:,.0f} rows/s"
+        )
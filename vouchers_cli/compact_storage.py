@@ -0,0 +1,277 @@
+from array import array
+from logging import Logger
+from typing import AsyncIterator, Iterable, Sequence
+
+from vouchers_cli.storage import CustomerVouchers, OrderStorage, index_by_customer
+
+# Multiplier for Fibonacci hashing: the odd 64-bit integer closest to
+# 2**64 / golden ratio
+FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+_UINT64_MASK = 0xFFFFFFFFFFFFFFFF
+
+# Numeric barcodes up to this many digits always fit in a signed 64-bit int
+_MAX_NUMERIC_DIGITS = 18
+
+
+class Int64HashSet:
+    """
+    Open-addressing (linear probing) hash set of non-negative 64-bit integers,
+    backed by a single `array("q")` instead of boxed Python objects.
+    """
+
+    _EMPTY = -1
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize an empty set with room for at least `capacity` slots.
+        """
+        bits = max(capacity - 1, 1).bit_length()
+        self._table = array("q", [self._EMPTY]) * (1 << bits)
+        self._shift = 64 - bits
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, value: int) -> bool:
+        table = self._table
+        mask = len(table) - 1
+        slot = ((value * FIBONACCI_MULTIPLIER) & _UINT64_MASK) >> self._shift
+        while (current := table[slot]) != self._EMPTY:
+            if current == value:
+                return True
+            slot = (slot + 1) & mask
+        return False
+
+    def add(self, value: int) -> bool:
+        """
+        Add a non-negative value to the set.
+
+        :return: False if the value was already present, True otherwise.
+        """
+        table = self._table
+        mask = len(table) - 1
+        slot = ((value * FIBONACCI_MULTIPLIER) & _UINT64_MASK) >> self._shift
+        while (current := table[slot]) != self._EMPTY:
+            if current == value:
+                return False
+            slot = (slot + 1) & mask
+        table[slot] = value
+        self._size += 1
+
+        # Keep the load factor under 2/3 so probe sequences stay short
+        if self._size * 3 >= len(table) * 2:
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        """
+        Double the table size and re-insert every stored value.
+        """
+        old_table = self._table
+        bits = 64 - self._shift + 1
+        self._table = array("q", [self._EMPTY]) * (1 << bits)
+        self._shift = 64 - bits
+        self._size = 0
+        for value in old_table:
+            if value != self._EMPTY:
+                self.add(value)
+
+    def nbytes(self) -> int:
+        """
+        Return the size of the backing table in bytes.
+        """
+        return len(self._table) * self._table.itemsize
+
+
+class CompactOrderStorage(OrderStorage):
+    """
+    OrderStorage variant that keeps barcodes as 64-bit integers instead of
+    Python strings.
+
+    Canonical numeric barcodes (ASCII digits without a leading zero, at most
+    18 digits) are stored as non-negative codes in `array("q")` buffers, with an
+    `Int64HashSet` for duplicate checks. Any other barcode falls back to string
+    storage and is referenced by a negative code. The string containers of
+    `OrderStorage` (`used_barcodes`, `unused_barcodes`, `customer_to_barcodes`)
+    are left empty; barcodes are decoded back to strings on retrieval.
+    """
+
+    def __init__(self, logger: Logger) -> None:
+        """
+        Initializes the storage with empty barcode buffers and indexes.
+        """
+        super().__init__(logger)
+
+        self._numeric_index = Int64HashSet()
+        self._string_index: set[str] = set()
+        self._string_barcodes: list[str] = []  # code -n -> self._string_barcodes[n-1]
+
+        # Used barcodes as parallel (order_id, code) columns, in insertion order
+        self._used_orders = array("q")
+        self._used_codes = array("q")
+        self._unused_codes = array("q")
+        self._customer_index_cache: CustomerVouchers | None = None
+
+    @staticmethod
+    def _is_numeric(barcode: str) -> bool:
+        """
+        Check whether a barcode round-trips losslessly through `int`.
+        """
+        return (
+            barcode.isascii()
+            and barcode.isdigit()
+            and len(barcode) <= _MAX_NUMERIC_DIGITS
+            and (barcode[0] != "0" or barcode == "0")
+        )
+
+    def _decode(self, code: int) -> str:
+        """
+        Convert a stored code back into its barcode string.
+        """
+        return str(code) if code >= 0 else self._string_barcodes[-code - 1]
+
+    def _apply_barcodes(self, barcodes: Iterable[tuple[str, int | None]]) -> None:
+        """
+        Encode and apply (barcode, order_id) pairs in order, with the same
+        semantics as `OrderStorage._apply_barcodes`.
+        """
+        self._customer_index_cache = None
+        numeric_index = self._numeric_index
+        string_index = self._string_index
+        orders_to_customers = self.orders_to_customers
+
+        for barcode, order_id in barcodes:
+            numeric = self._is_numeric(barcode)
+            value = int(barcode) if numeric else 0
+
+            # If the barcode has already been seen, don't store it again
+            if (value in numeric_index) if numeric else (barcode in string_index):
+                self._log_duplicate(barcode)
+                continue
+
+            # Barcodes of unknown orders are dropped, as in OrderStorage
+            if order_id is not None and not orders_to_customers.get(order_id, None):
+                continue
+
+            if numeric:
+                numeric_index.add(value)
+                code = value
+            else:
+                string_index.add(barcode)
+                self._string_barcodes.append(barcode)
+                code = -len(self._string_barcodes)
+
+            if order_id is not None:
+                self._used_orders.append(order_id)
+                self._used_codes.append(code)
+            else:
+                self._unused_codes.append(code)
+
+    async def merge_barcodes(
+        self,
+        customer_to_barcodes: dict[tuple[int, int], list[str]],
+        used_barcodes: set[str],
+        unused_barcodes: set[str],
+        duplicate_barcodes: Sequence[str] = (),
+    ) -> None:
+        """
+        Merge the barcode state of a partial `OrderStorage` by re-encoding its
+        barcodes; duplicates are detected by `_apply_barcodes`.
+        """
+        async with self._lock:
+            self.duplicate_barcodes.extend(duplicate_barcodes)
+            self._apply_barcodes(
+                (barcode, order_id)
+                for (order_id, _), barcodes in customer_to_barcodes.items()
+                for barcode in barcodes
+            )
+            self._apply_barcodes((barcode, None) for barcode in unused_barcodes)
+
+    def _unused_count(self) -> int:
+        """
+        Return the number of unused barcodes. Callers must hold the lock.
+        """
+        return len(self._unused_codes)
+
+    def _allocate(self, requests: Sequence[tuple[int, int]]) -> list[list[str]]:
+        """
+        Move codes from the end of the unused buffer to the used columns of
+        validated requests, in O(count) per request. Callers must hold the lock.
+        """
+        unused_codes = self._unused_codes
+        allocations = []
+        for order_id, count in requests:
+            start = len(unused_codes) - count
+            codes = unused_codes[start:]
+            del unused_codes[start:]
+            self._used_orders.extend(array("q", [order_id]) * count)
+            self._used_codes.extend(codes)
+            allocations.append([self._decode(code) for code in codes])
+
+        self._customer_index_cache = None
+        return allocations
+
+    async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
+        """
+        Decode and group used barcodes into a mapping of
+        (order_id, customer_id) to barcodes, with async-safe access.
+        """
+        async with self._lock:
+            return {key: barcodes async for key, barcodes in self.iter_vouchers()}
+
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs, decoding one
+        voucher at a time. Intended to be consumed once loading has finished.
+
+        Codes are first grouped by order with a counting sort over integer
+        arrays, keeping orders in first-appearance order, so no strings are
+        created ahead of the voucher being yielded.
+        """
+        used_orders, used_codes = self._used_orders, self._used_codes
+
+        # Number the orders in first-appearance order
+        groups: dict[int, int] = {}
+        for order_id in used_orders:
+            groups.setdefault(order_id, len(groups))
+
+        # offsets[g]:offsets[g + 1] is the slice of `grouped` holding group g
+        offsets = array("q", bytes(8 * (len(groups) + 1)))
+        for order_id in used_orders:
+            offsets[groups[order_id] + 1] += 1
+        for index in range(1, len(offsets)):
+            offsets[index] += offsets[index - 1]
+
+        grouped = array("q", bytes(8 * len(used_codes)))
+        cursors = array("q", offsets)
+        for order_id, code in zip(used_orders, used_codes, strict=True):
+            group = groups[order_id]
+            grouped[cursors[group]] = code
+            cursors[group] += 1
+
+        orders_to_customers = self.orders_to_customers
+        for order_id, group in groups.items():
+            yield (
+                (order_id, orders_to_customers[order_id]),
+                [
+                    self._decode(code)
+                    for code in grouped[offsets[group] : offsets[group + 1]]
+                ],
+            )
+
+    async def _customer_index(self) -> CustomerVouchers:
+        """
+        Build the vouchers indexed by customer from the grouped vouchers on the
+        first lookup after barcodes were stored.
+        """
+        if self._customer_index_cache is None:
+            self._customer_index_cache = await index_by_customer(self.iter_vouchers())
+        return self._customer_index_cache
+
+    async def get_unused_barcodes(self) -> set[str]:
+        """
+        Decode unused barcodes, with async-safe access.
+        """
+        async with self._lock:
+            return {self._decode(code) for code in self._unused_codes}
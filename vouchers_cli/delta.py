@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+from itertools import compress
+from logging import Logger
+from pathlib import Path
+from typing import Any, Awaitable, Callable, NamedTuple, Sequence
+
+from vouchers_cli.async_reader import DEFAULT_CHUNK_SIZE
+from vouchers_cli.mmap_reader import barcode_columns, order_columns, scan_chunk
+from vouchers_cli.snapshot import SnapshotStorage, read_snapshot, write_snapshot
+from vouchers_cli.storage import OrderStorage
+
+
+class FileProgress(NamedTuple):
+    """
+    How far an input file has been ingested: the byte offset just after the
+    last complete line that was loaded, and the BLAKE2b hash of the bytes
+    before it.
+    """
+
+    path: str
+    offset: int
+    digest: str
+
+
+class DeltaState:
+    """
+    Incremental loading of append-only input files.
+
+    The state file is a snapshot (see `write_snapshot`) of the storage loaded
+    so far, with the progress of both input files in its footer. While both
+    files still start with the bytes that were loaded, the next run restores
+    the storage from the state file and only parses the lines appended since.
+    Any other change to an input file (or missing, unreadable state) falls
+    back to loading the files from scratch.
+
+    Barcode rows of orders that are not stored yet are kept in the state and
+    retried after the next orders tail, before the appended barcode lines.
+    """
+
+    def __init__(
+        self, state_path: Path, logger: Logger, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """
+        :param state_path: File the delta state is kept in.
+        :param logger: Logger instance for logging messages.
+        :param chunk_size: Number of bytes read and parsed at a time.
+        """
+        self._state_path = state_path
+        self._logger = logger
+        self._chunk_size = chunk_size
+        self._progress: dict[str, FileProgress] = {}
+        # (barcode, order_id) rows waiting for their order, in file order
+        self._pending: list[tuple[str, int]] = []
+
+    def _read_state(self) -> tuple[SnapshotStorage, dict[str, Any]] | None:
+        """
+        Open the state file, or return None if there is no usable state.
+        """
+        try:
+            buffer, footer = read_snapshot(self._state_path)
+        except FileNotFoundError:
+            self._logger.debug(f"No delta state at {self._state_path}")
+            return None
+        except ValueError as e:
+            self._logger.debug(f"Ignoring unreadable delta state: {e}")
+            return None
+        return SnapshotStorage(self._logger, buffer, footer["sections"]), footer
+
+    def _resume(self, file_path: Path, recorded: dict[str, Any]) -> Any | None:
+        """
+        Hash the prefix of a file that was loaded by the previous run.
+
+        :return: The hasher fed with the prefix, to be fed with the rest of the
+            file, or None if the prefix is not the one that was loaded.
+        """
+        if recorded["path"] != str(file_path.resolve()):
+            return None
+
+        hasher = hashlib.blake2b()
+        remaining = recorded["offset"]
+        with open(file_path, "rb") as file:
+            while remaining and (data := file.read(min(remaining, self._chunk_size))):
+                hasher.update(data)
+                remaining -= len(data)
+        if remaining or hasher.hexdigest() != recorded["digest"]:
+            return None
+        return hasher
+
+    async def _ingest(
+        self,
+        file_path: Path,
+        offset: int,
+        hasher: Any,
+        store: Callable[[bytes], Awaitable[None]],
+    ) -> FileProgress:
+        """
+        Load the complete lines of a file from `offset` on, in chunks that end
+        on line boundaries, skipping the header row when reading from the
+        start. A trailing line without a newline is left for the next run.
+        """
+        loop = asyncio.get_running_loop()
+        skip_header = offset == 0
+        pending = b""
+
+        with open(file_path, "rb") as file:
+            file.seek(offset)
+            while data := await loop.run_in_executor(None, file.read, self._chunk_size):
+                pending += data
+                end = pending.rfind(b"\n") + 1
+                if not end:
+                    continue
+                lines, pending = pending[:end], pending[end:]
+                hasher.update(lines)
+                offset += end
+
+                if skip_header:
+                    lines = lines[lines.find(b"\n") + 1 :]
+                    skip_header = False
+                if lines:
+                    await store(lines)
+
+        return FileProgress(str(file_path.resolve()), offset, hasher.hexdigest())
+
+    async def load(
+        self, order_file_path: Path, barcodes_file_path: Path, storage: OrderStorage
+    ) -> dict[tuple[int, int], int]:
+        """
+        Load the input files into an empty storage, restoring the previous run
+        and parsing only appended lines when possible.
+
+        Restored vouchers are not re-keyed: a restored order that is stored
+        again for another customer keeps its earlier barcodes. Retried rows are
+        stored after the rows already loaded, so they are duplicates if a later
+        row already used their barcode.
+
+        :return: Number of barcodes every voucher had after the previous run;
+            empty when the files were loaded from scratch.
+        """
+        hashers: dict[str, Any] = {}
+        offsets = {"orders": 0, "barcodes": 0}
+        voucher_sizes: dict[tuple[int, int], int] = {}
+        resumed = False
+
+        state = self._read_state()
+        if state is not None:
+            snapshot, footer = state
+            files = footer["files"]
+            for name, file_path in (
+                ("orders", order_file_path),
+                ("barcodes", barcodes_file_path),
+            ):
+                if (hasher := self._resume(file_path, files[name])) is None:
+                    self._logger.info(
+                        f"{file_path} changed before the delta offset, "
+                        "loading the input files from scratch"
+                    )
+                    break
+                hashers[name] = hasher
+                offsets[name] = files[name]["offset"]
+            else:
+                voucher_sizes = await snapshot.restore_into(storage)
+                self._pending = [
+                    (barcode, order_id)
+                    for barcode, order_id in footer.get("pending_barcodes", [])
+                ]
+                resumed = True
+                self._logger.debug(f"Restored delta state {self._state_path}")
+            del snapshot
+
+        if not resumed:
+            hashers = {name: hashlib.blake2b() for name in offsets}
+            offsets = dict.fromkeys(offsets, 0)
+            self._pending = []
+
+        async def store_orders(lines: bytes) -> None:
+            order_ids, customer_ids = order_columns(*scan_chunk(lines))
+            await storage.store_orders_bulk(zip(order_ids, customer_ids, strict=True))
+
+        async def store_barcodes(
+            barcodes: Sequence[str], order_ids: Sequence[int | None]
+        ) -> None:
+            # Rows of unknown orders wait for a later orders tail
+            orders = storage.orders_to_customers
+            known = [order_id is None or order_id in orders for order_id in order_ids]
+            if not all(known):
+                self._pending.extend(
+                    (barcode, order_id)
+                    for barcode, order_id in zip(barcodes, order_ids, strict=True)
+                    if order_id is not None and order_id not in orders
+                )
+                barcodes = list(compress(barcodes, known))
+                order_ids = list(compress(order_ids, known))
+            await storage.store_barcode_columns(barcodes, order_ids)
+
+        async def store_barcode_lines(lines: bytes) -> None:
+            await store_barcodes(*barcode_columns(*scan_chunk(lines)))
+
+        # Orders first, because barcodes are resolved against them
+        orders_progress = await self._ingest(
+            order_file_path, offsets["orders"], hashers["orders"], store_orders
+        )
+
+        # Rows left waiting by the previous run come before the appended lines
+        retried, self._pending = self._pending, []
+        if retried:
+            await store_barcodes(
+                [barcode for barcode, _ in retried],
+                [order_id for _, order_id in retried],
+            )
+
+        self._progress = {
+            "orders": orders_progress,
+            "barcodes": await self._ingest(
+                barcodes_file_path,
+                offsets["barcodes"],
+                hashers["barcodes"],
+                store_barcode_lines,
+            ),
+        }
+        return voucher_sizes
+
+    async def save(self, storage: OrderStorage) -> None:
+        """
+        Record the loaded storage and input file progress for the next run.
+        Must be called after `load`, once the output has been written.
+        """
+        await write_snapshot(
+            self._state_path,
+            storage,
+            {
+                "files": {
+                    name: progress._asdict()
+                    for name, progress in self._progress.items()
+                },
+                "pending_barcodes": self._pending,
+            },
+        )
+        self._logger.debug(f"Saved delta state {self._state_path}")
@@ -0,0 +1,456 @@
+import heapq
+import pickle
+import tempfile
+from itertools import groupby
+from logging import Logger
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator, Sequence
+
+from vouchers_cli.options import DEFAULT_MEMORY_LIMIT
+from vouchers_cli.storage import CustomerOrderIndex, OrderStorage
+
+# Rough in-memory size of a buffered row tuple of ints (tuple, ints, list slot),
+# and the extra size of a str field besides its characters
+_ROW_BYTES = 160
+_STR_BYTES = 50
+
+_BLOCK_ROWS = 4096  # Rows pickled together in a run file, read back at a time
+
+# Status of a barcode row once joined to its order
+_UNUSED = 0  # No order: an unused barcode
+_USED = 1  # Known order with a customer
+_DROPPED = 2  # Unknown order (or customer 0): dropped, never claims the barcode
+
+Row = tuple[Any, ...]
+
+
+class MemoryBudget:
+    """
+    Byte budget shared by the sorters of one storage. When buffered rows
+    exceed it, the sorters holding the most rows spill them to disk.
+    """
+
+    def __init__(self, limit: int):
+        """
+        :param limit: Bytes of rows buffered in memory across all sorters.
+        """
+        self.limit = limit
+        self.used = 0
+        self._sorters: list["ExternalSorter"] = []
+
+    def register(self, sorter: "ExternalSorter") -> None:
+        self._sorters.append(sorter)
+
+    def unregister(self, sorter: "ExternalSorter") -> None:
+        self._sorters.remove(sorter)
+
+    def charge(self, nbytes: int) -> None:
+        """
+        Account for newly buffered rows, spilling the largest buffers until the
+        budget holds again.
+        """
+        self.used += nbytes
+        while self.used > self.limit:
+            largest = max(self._sorters, key=lambda sorter: sorter.buffered_bytes)
+            if not largest.buffered_bytes:
+                break
+            largest.spill()
+
+
+class ExternalSorter:
+    """
+    Sorts rows (tuples compared field by field) that may not fit in memory.
+
+    Rows are buffered until the shared budget is exceeded, then sorted and
+    written to a run file on disk. Iterating merges the runs and the sorted
+    buffer in one streaming pass, holding one block of rows per run.
+    """
+
+    def __init__(self, directory: Path, budget: MemoryBudget):
+        """
+        :param directory: Directory the run files are written to.
+        :param budget: Memory budget shared with the other sorters.
+        """
+        self._directory = directory
+        self._budget = budget
+        self._buffer: list[Row] = []
+        self._runs: list[Path] = []
+        self.buffered_bytes = 0
+        budget.register(self)
+
+    def add(self, row: Row, nbytes: int) -> None:
+        """
+        Buffer one row of approximately `nbytes` bytes.
+        """
+        self._buffer.append(row)
+        self.buffered_bytes += nbytes
+        self._budget.charge(nbytes)
+
+    def extend(self, rows: Iterable[Row], nbytes: int) -> None:
+        """
+        Buffer a batch of rows of approximately `nbytes` bytes in total.
+        """
+        self._buffer.extend(rows)
+        self.buffered_bytes += nbytes
+        self._budget.charge(nbytes)
+
+    def spill(self) -> None:
+        """
+        Sort the buffered rows and write them to a new run file.
+        """
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        file_path = self._directory / f"run-{id(self)}-{len(self._runs)}"
+        with open(file_path, "wb") as file:
+            for start in range(0, len(self._buffer), _BLOCK_ROWS):
+                pickle.dump(
+                    self._buffer[start : start + _BLOCK_ROWS],
+                    file,
+                    pickle.HIGHEST_PROTOCOL,
+                )
+        self._runs.append(file_path)
+        self._budget.used -= self.buffered_bytes
+        self._buffer, self.buffered_bytes = [], 0
+
+    @staticmethod
+    def _read_run(file_path: Path) -> Iterator[Row]:
+        with open(file_path, "rb") as file:
+            while True:
+                try:
+                    yield from pickle.load(file)
+                except EOFError:
+                    return
+
+    def __iter__(self) -> Iterator[Row]:
+        self._buffer.sort()
+        if not self._runs:
+            return iter(self._buffer)
+        return heapq.merge(*map(self._read_run, self._runs), self._buffer)
+
+    def close(self) -> None:
+        """
+        Drop the buffered rows and delete the run files.
+        """
+        for file_path in self._runs:
+            file_path.unlink(missing_ok=True)
+        self._budget.used -= self.buffered_bytes
+        self._budget.unregister(self)
+        self._buffer, self.buffered_bytes, self._runs = [], 0, []
+
+
+class ExternalSortStorage(OrderStorage):
+    """
+    Out-of-core OrderStorage variant for inputs larger than memory.
+
+    Orders and barcodes are only buffered while loading and spilled to sorted
+    runs on disk whenever the memory limit is reached. On the first read, the
+    runs are processed in streaming merge passes:
+
+    1. Orders (sorted by order_id) are merge-joined with the barcodes sorted
+       by order_id, resolving each barcode's customer from the order's last
+       row, while orders per customer are counted.
+    2. Joined barcodes, sorted by barcode, are de-duplicated: the first row of
+       each barcode that is unused or has a known order wins, later rows are
+       logged as duplicates.
+    3. Winning barcodes, sorted by order, are grouped into vouchers, which are
+       sorted by their first barcode so they stream out in the same order as
+       from `OrderStorage`.
+
+    Results match `OrderStorage` as long as orders are stored before the
+    barcodes that reference them, which is how `Repository` loads data;
+    duplicates are logged in barcode order. Only the per-customer order counts
+    are kept in memory. Vouchers of one customer are found by scanning the
+    vouchers, and barcodes cannot be allocated.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        temp_dir: Path | None = None,
+    ):
+        """
+        :param logger: Logger instance for logging messages.
+        :param memory_limit: Bytes of rows buffered in memory before they are
+            spilled to runs on disk (plus one block per run while merging).
+        :param temp_dir: Directory for the run files; defaults to the system
+            temporary directory. Removed with the storage.
+        """
+        super().__init__(logger)
+        self._temp_dir = tempfile.TemporaryDirectory(
+            prefix="vouchers-sort-", dir=temp_dir
+        )
+        self._directory = Path(self._temp_dir.name)
+        self._budget = MemoryBudget(memory_limit)
+
+        # Loaded rows: (order_id, seq, customer_id), (order_id, seq, barcode)
+        # and unused barcodes as (barcode, seq, _UNUSED, 0, 0)
+        self._orders = ExternalSorter(self._directory, self._budget)
+        self._barcodes = ExternalSorter(self._directory, self._budget)
+        self._unused_rows = ExternalSorter(self._directory, self._budget)
+        self._order_seq = 0
+        self._barcode_seq = 0
+
+        # Results of the merge passes, rebuilt after more rows are stored
+        self._vouchers: ExternalSorter | None = None
+        self._unused: ExternalSorter | None = None
+        self._unused_total = 0  # Unused barcodes counted by the last pass 2
+
+    def _invalidate(self) -> None:
+        """
+        Drop the results of the merge passes after more rows were stored.
+        """
+        for sorter in (self._vouchers, self._unused):
+            if sorter is not None:
+                sorter.close()
+        self._vouchers = self._unused = None
+        self._top_customers_cache.clear()
+
+    async def store_orders_bulk(self, orders: Iterable[tuple[int, int]]) -> None:
+        """
+        Buffer a batch of (order_id, customer_id) pairs under a single lock
+        acquisition; the last row of an order wins.
+        """
+        async with self._lock:
+            rows = [
+                (order_id, seq, customer_id)
+                for seq, (order_id, customer_id) in enumerate(
+                    orders, start=self._order_seq
+                )
+            ]
+            self._order_seq += len(rows)
+            self._orders.extend(rows, len(rows) * _ROW_BYTES)
+            self._invalidate()
+
+    def _apply_barcodes(self, barcodes: Iterable[tuple[str, int | None]]) -> None:
+        """
+        Buffer (barcode, order_id) pairs in order; they are joined, de-duplicated
+        and grouped on the next read.
+        """
+        with_order: list[Row] = []
+        unused: list[Row] = []
+        for seq, (barcode, order_id) in enumerate(barcodes, start=self._barcode_seq):
+            if order_id is None:
+                unused.append((barcode, seq, _UNUSED, 0, 0))
+            else:
+                with_order.append((order_id, seq, barcode))
+        self._barcode_seq += len(with_order) + len(unused)
+
+        row_bytes = _ROW_BYTES + _STR_BYTES
+        self._barcodes.extend(
+            with_order, len(with_order) * row_bytes + sum(len(r[2]) for r in with_order)
+        )
+        self._unused_rows.extend(
+            unused, len(unused) * row_bytes + sum(len(r[0]) for r in unused)
+        )
+        self._invalidate()
+
+    async def merge_barcodes(
+        self,
+        customer_to_barcodes: dict[tuple[int, int], list[str]],
+        used_barcodes: set[str],
+        unused_barcodes: set[str],
+        duplicate_barcodes: Sequence[str] = (),
+    ) -> None:
+        """
+        Buffer the barcode state of a partial `OrderStorage`; duplicates are
+        detected by the merge passes.
+        """
+        async with self._lock:
+            self.duplicate_barcodes.extend(duplicate_barcodes)
+            self._apply_barcodes(
+                (barcode, order_id)
+                for (order_id, _), barcodes in customer_to_barcodes.items()
+                for barcode in barcodes
+            )
+            self._apply_barcodes((barcode, None) for barcode in unused_barcodes)
+
+    def _join_orders(self, joined: ExternalSorter) -> None:
+        """
+        Pass 1: merge-join orders and barcodes by order_id into `joined` rows of
+        (barcode, seq, status, order_id, customer_id), counting orders per
+        customer.
+        """
+        counts: dict[int, int] = {}
+        first_seen: dict[int, int] = {}  # customer_id -> seq of its earliest order
+
+        orders = groupby(self._orders, key=itemgetter(0))
+        order_id, customer_id = -1, 0
+        next_order = next(orders, None)
+
+        for barcode_order_id, seq, barcode in self._barcodes:
+            # Advance the orders up to this barcode's order
+            while next_order is not None and next_order[0] <= barcode_order_id:
+                order_id, rows = next_order
+                *_, (_, _, customer_id) = self._count_order(rows, counts, first_seen)
+                next_order = next(orders, None)
+
+            if order_id == barcode_order_id and customer_id:
+                row = (barcode, seq, _USED, order_id, customer_id)
+            else:
+                row = (barcode, seq, _DROPPED, 0, 0)
+            joined.add(row, _ROW_BYTES + _STR_BYTES + len(barcode))
+
+        # Count the orders without barcodes
+        while next_order is not None:
+            self._count_order(next_order[1], counts, first_seen)
+            next_order = next(orders, None)
+
+        self.customer_orders = CustomerOrderIndex()
+        self.customer_orders.restore(first_seen.items(), counts.items())
+
+    @staticmethod
+    def _count_order(
+        rows: Iterable[Row], counts: dict[int, int], first_seen: dict[int, int]
+    ) -> list[Row]:
+        """
+        Count one order, given all its rows in storage order, for the customer
+        of its last row; the order keeps the seq of its first row as position.
+        """
+        rows = list(rows)
+        seq, customer_id = rows[0][1], rows[-1][2]
+        counts[customer_id] = counts.get(customer_id, 0) + 1
+        if seq < first_seen.get(customer_id, seq + 1):
+            first_seen[customer_id] = seq
+        return rows
+
+    def _deduplicate(
+        self, joined: ExternalSorter, used: ExternalSorter, unused: ExternalSorter
+    ) -> None:
+        """
+        Pass 2: walk joined rows by barcode, in storage order within a barcode,
+        and keep the first row that is unused or has a known order, counting
+        the unused barcodes that win.
+        """
+        self._unused_total = 0
+        rows = heapq.merge(joined, self._unused_rows)
+        for barcode, group in groupby(rows, key=itemgetter(0)):
+            won = False
+            for _, seq, status, order_id, customer_id in group:
+                if won:
+                    self._log_duplicate(barcode)
+                elif status == _USED:
+                    won = True
+                    used.add(
+                        (order_id, customer_id, seq, barcode),
+                        _ROW_BYTES + _STR_BYTES + len(barcode),
+                    )
+                elif status == _UNUSED:
+                    won = True
+                    unused.add((barcode,), _ROW_BYTES + _STR_BYTES + len(barcode))
+                    self._unused_total += 1
+
+    def _group_vouchers(self, used: ExternalSorter, vouchers: ExternalSorter) -> None:
+        """
+        Pass 3: group winning barcodes by (order_id, customer_id) into voucher
+        rows keyed by the storage order of their first barcode.
+        """
+        for (order_id, customer_id), group in groupby(used, key=itemgetter(0, 1)):
+            rows = list(group)
+            barcodes = [barcode for *_, barcode in rows]
+            vouchers.add(
+                (rows[0][2], order_id, customer_id, barcodes),
+                _ROW_BYTES + sum(_STR_BYTES + len(barcode) for barcode in barcodes),
+            )
+
+    def _process(self) -> tuple[ExternalSorter, ExternalSorter]:
+        """
+        Run the merge passes once after loading, caching the vouchers and unused
+        barcodes until more rows are stored.
+        """
+        if self._vouchers is not None and self._unused is not None:
+            return self._vouchers, self._unused
+
+        joined = ExternalSorter(self._directory, self._budget)
+        self._join_orders(joined)
+
+        used = ExternalSorter(self._directory, self._budget)
+        unused = ExternalSorter(self._directory, self._budget)
+        self._deduplicate(joined, used, unused)
+        joined.close()
+
+        vouchers = ExternalSorter(self._directory, self._budget)
+        self._group_vouchers(used, vouchers)
+        used.close()
+
+        self._vouchers, self._unused = vouchers, unused
+        return vouchers, unused
+
+    async def allocate_barcodes_bulk(
+        self, requests: Sequence[tuple[int, int]]
+    ) -> list[list[str]]:
+        """
+        Refuse allocations: barcodes are only sorted on disk, not indexed.
+        """
+        raise ValueError("The 'external' storage does not support allocation.")
+
+    async def get_top_customers(self, n: int) -> list[tuple[int, int]]:
+        """
+        Retrieve the `n` customers with the most orders, counted by the merge
+        passes.
+        """
+        async with self._lock:
+            self._process()
+        return await super().get_top_customers(n)
+
+    async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
+        """
+        Retrieve a mapping of (order_id, customer_id) to barcodes.
+        """
+        async with self._lock:
+            return {key: barcodes async for key, barcodes in self.iter_vouchers()}
+
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs merged from the
+        sorted voucher runs. Intended to be consumed once loading has finished.
+        """
+        vouchers, _ = self._process()
+        for _, order_id, customer_id, barcodes in vouchers:
+            yield (order_id, customer_id), barcodes
+
+    async def get_customer_vouchers(self, customer_id: int) -> dict[int, list[str]]:
+        """
+        Retrieve the vouchers of one customer by scanning the voucher runs.
+        """
+        async with self._lock:
+            return {
+                order_id: barcodes
+                async for (order_id, customer), barcodes in self.iter_vouchers()
+                if customer == customer_id
+            }
+
+    async def get_order_voucher(self, order_id: int) -> tuple[int, list[str]] | None:
+        """
+        Retrieve the voucher of one order by scanning the voucher runs.
+        """
+        async with self._lock:
+            async for (order, customer_id), barcodes in self.iter_vouchers():
+                if order == order_id:
+                    return customer_id, barcodes
+            return None
+
+    async def get_customer_barcode_count(self, customer_id: int) -> int:
+        """
+        Count the barcodes of one customer's vouchers.
+        """
+        vouchers = await self.get_customer_vouchers(customer_id)
+        return sum(map(len, vouchers.values()))
+
+    def _unused_count(self) -> int:
+        """
+        Return the number of unused barcodes counted by the merge passes, running
+        them first if rows were stored since. Callers must hold the lock.
+        """
+        self._process()
+        return self._unused_total
+
+    async def get_unused_barcodes(self) -> set[str]:
+        """
+        Retrieve the unused barcodes kept by the merge passes.
+        """
+        async with self._lock:
+            _, unused = self._process()
+            return {barcode for (barcode,) in unused}
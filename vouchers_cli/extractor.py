@@ -1,12 +1,160 @@
 import asyncio
 from logging import Logger
+from pathlib import Path
+from typing import Any, AsyncIterator
 
-from vouchers_cli.async_reader import AsyncCSVReader
-from vouchers_cli.async_writer import AsyncWriter, FileWriter, STDOutWriter
+# The default reader, storage and writers are imported here; the others, and
+# their dependencies such as NumPy and sqlite3, only when they are configured
+from vouchers_cli.async_reader import AsyncCSVReader, FileReader
+from vouchers_cli.async_writer import (
+    AsyncWriter,
+    FileWriter,
+    GzipFileWriter,
+    STDOutWriter,
+    ZstdFileWriter,
+)
+from vouchers_cli.delta import DeltaState
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.options import (
+    DEFAULT_TOP_CUSTOMERS,
+    DISK_STORAGE_BACKENDS,
+    CSVReader,
+    OutputFormat,
+    StorageBackend,
+    is_columnar,
+)
 from vouchers_cli.repository import Repository
-from vouchers_cli.schemas import ExtractorConfig, OutputSchema, VoucherSchema
+from vouchers_cli.schemas import (
+    ExtractorConfig,
+    OutputSchema,
+    Voucher,
+    VoucherSchema,
+)
+from vouchers_cli.snapshot import SnapshotCache
 from vouchers_cli.storage import OrderStorage
 
+# Writer class behind every text output format
+TEXT_FILE_WRITERS: dict[OutputFormat, type[FileWriter]] = {
+    OutputFormat.TEXT: FileWriter,
+    OutputFormat.GZIP: GzipFileWriter,
+    OutputFormat.ZSTD: ZstdFileWriter,
+}
+
+
+def create_file_writer(
+    configs: ExtractorConfig, logger: Logger, metrics: Metrics | None = None
+) -> AsyncWriter[Any]:
+    """
+    Build the writer of the vouchers output file in the configured format, or
+    of the partition files when the output is partitioned.
+    """
+    if configs.output_partitions > 1:
+        from vouchers_cli.async_writer import PartitionedFileWriter
+
+        return PartitionedFileWriter(
+            configs.output_dir, logger, configs.output_partitions, metrics=metrics
+        )
+    if configs.output_format == OutputFormat.PARQUET:
+        from vouchers_cli.arrow_writer import ParquetFileWriter
+
+        return ParquetFileWriter(configs.output_dir, logger, metrics=metrics)
+    return TEXT_FILE_WRITERS[configs.output_format](
+        configs.output_dir, logger, metrics=metrics
+    )
+
+
+def create_repository(
+    configs: ExtractorConfig, logger: Logger, metrics: Metrics | None = None
+) -> Repository:
+    """
+    Build the repository described by the configuration: the reader for the
+    input format and the selected storage backend, snapshot cache and delta
+    state. The sqlite and external storages keep their data on disk and do not
+    use the snapshot cache, whose snapshots are built from in-memory indexes.
+    Loading and CSV reading report to `metrics` when given.
+    """
+    async_reader: FileReader
+    if is_columnar(configs.orders_file_path):
+        from vouchers_cli.arrow_reader import ArrowFileReader
+
+        async_reader = ArrowFileReader(logger, metrics=metrics)
+    elif configs.csv_reader == CSVReader.MMAP:
+        from vouchers_cli.mmap_reader import MmapCSVReader
+
+        async_reader = MmapCSVReader(logger, metrics=metrics)
+    else:
+        async_reader = AsyncCSVReader(
+            logger, metrics=metrics, pipeline_depth=configs.pipeline_depth
+        )
+    storage: OrderStorage
+    if configs.storage == StorageBackend.COMPACT:
+        from vouchers_cli.compact_storage import CompactOrderStorage
+
+        storage = CompactOrderStorage(logger)
+    elif configs.storage == StorageBackend.NUMPY:
+        from vouchers_cli.numpy_storage import NumpyOrderStorage
+
+        storage = NumpyOrderStorage(logger)
+    elif configs.storage == StorageBackend.SQLITE:
+        from vouchers_cli.sqlite_storage import SqliteOrderStorage
+
+        storage = SqliteOrderStorage(logger, configs.sqlite_path)
+    elif configs.storage == StorageBackend.EXTERNAL:
+        from vouchers_cli.external_storage import ExternalSortStorage
+
+        storage = ExternalSortStorage(logger, configs.memory_limit << 20)
+    else:
+        storage = OrderStorage(logger)
+    cache = None
+    if configs.cache_dir and configs.storage not in DISK_STORAGE_BACKENDS:
+        cache = SnapshotCache(configs.cache_dir, logger)
+    return Repository(
+        configs.orders_file_path,
+        configs.barcodes_file_path,
+        logger,
+        async_reader,
+        storage,
+        configs.batch_size,
+        configs.workers,
+        cache,
+        configs.rebuild_cache,
+        DeltaState(configs.delta_state, logger) if configs.delta_state else None,
+        metrics,
+        configs.pipeline_depth,
+    )
+
+
+class VoucherStream:
+    """
+    Re-iterable asynchronous view over the repository vouchers. Every iteration
+    pulls vouchers lazily from storage instead of materialising them in a list.
+    """
+
+    def __init__(self, repository: Repository, validate: bool = False):
+        """
+        :param repository: Repository the vouchers are pulled from.
+        :param validate: Validate every voucher with `VoucherSchema` instead of
+            building plain `Voucher` tuples.
+        """
+        self._repository = repository
+        self._validate = validate
+
+    async def __aiter__(self) -> AsyncIterator[Voucher]:
+        vouchers = self._repository.iter_vouchers()
+
+        if not self._validate:
+            async for (order_id, customer_id), barcodes in vouchers:
+                yield Voucher(customer_id, order_id, barcodes)
+            return
+
+        async for (order_id, customer_id), barcodes in vouchers:
+            schema = VoucherSchema(
+                customer_id=customer_id,
+                order_id=order_id,
+                barcodes=barcodes,
+            )
+            yield Voucher(schema.customer_id, schema.order_id, schema.barcodes)
+
 
 class VouchersExtractor:
     """
@@ -18,63 +166,108 @@ class VouchersExtractor:
         self,
         logger: Logger,
         repository: Repository,
-        writers: list[AsyncWriter],
+        writers: list[AsyncWriter[Any]],
+        top_customers: int = DEFAULT_TOP_CUSTOMERS,
+        validate_output: bool = False,
+        metrics: Metrics | None = None,
+        metrics_json: Path | None = None,
+        metrics_prometheus: Path | None = None,
     ):
         """
         Initialize the VouchersExtractor with necessary dependencies.
+
+        :param metrics: Metrics receiving the `extract` stage timer and one
+            `write.<writer>` stage timer per writer.
+        :param metrics_json: File the metrics are written to as JSON at exit.
+        :param metrics_prometheus: File the metrics are written to in the
+            Prometheus text format at exit.
         """
         self._logger = logger
         self._repository = repository
         self._writers = writers
+        self._top_customers = top_customers
+        self._validate_output = validate_output
+        self._metrics = metrics or Metrics()
+        self._metrics_json = metrics_json
+        self._metrics_prometheus = metrics_prometheus
 
     @classmethod
     def create(cls, configs: ExtractorConfig, logger: Logger) -> "VouchersExtractor":
         """
         Factory method to create an instance of VouchersExtractor.
         """
-        async_reader = AsyncCSVReader(logger)
-        storage = OrderStorage(logger)
-        repository = Repository(
-            configs.orders_file_path,
-            configs.barcodes_file_path,
+        metrics = Metrics()
+        repository = create_repository(configs, logger, metrics)
+        stdout_writer = STDOutWriter(logger)
+        file_writer = create_file_writer(configs, logger, metrics)
+
+        return cls(
             logger,
-            async_reader,
-            storage,
+            repository,
+            [stdout_writer, file_writer],
+            configs.top_customers,
+            configs.validate_output,
+            metrics,
+            configs.metrics_json,
+            configs.metrics_prometheus,
         )
-        stdout_writer = STDOutWriter(logger)
-        file_writer = FileWriter(configs.output_dir, logger)
 
-        return cls(logger, repository, [stdout_writer, file_writer])
+    @property
+    def metrics(self) -> Metrics:
+        """
+        Metrics collected by this extractor and its components.
+        """
+        return self._metrics
 
     async def _extract_data(self) -> OutputSchema:
         """
-        Extracts voucher-related data from the repository.
+        Extracts voucher-related data from the repository. Vouchers are not
+        materialised here; writers stream them from storage while writing.
         """
-        vouchers = [
-            VoucherSchema(
-                customer_id=customer_id,
-                order_id=order_id,
-                barcodes=barcodes,
+        with self._metrics.stage("extract"):
+            # Built from typed repository results: skip the pydantic validator
+            return OutputSchema.model_construct(
+                top_customers=await self._repository.get_top_customers(
+                    self._top_customers
+                ),
+                unused_barcode_count=await self._repository.get_unused_barcode_count(),
+                vouchers=VoucherStream(self._repository, self._validate_output),
             )
-            for (order_id, customer_id), barcodes in (
-                await self._repository.get_vouchers()
-            ).items()
-        ]
-
-        return OutputSchema(
-            top_customers=await self._repository.get_top_customers(),
-            unused_barcodes=await self._repository.get_unused_barcodes(),
-            vouchers=vouchers,
-        )
+
+    async def _write(self, writer: AsyncWriter[Any], output: OutputSchema) -> None:
+        """
+        Write the output with one writer, timed as its own stage.
+        """
+        with self._metrics.stage(f"write.{type(writer).__name__}"):
+            await writer.write(output)
+
+    def _dump_metrics(self) -> None:
+        """
+        Write the collected metrics to the configured files, if any.
+        """
+        self._metrics.count("duplicate_barcodes", self._repository.duplicate_count)
+        if self._metrics_json is not None:
+            self._metrics.write_json(self._metrics_json)
+            self._logger.info("Metrics were written to %s.", self._metrics_json)
+        if self._metrics_prometheus is not None:
+            self._metrics.write_prometheus(self._metrics_prometheus)
+            self._logger.info("Metrics were written to %s.", self._metrics_prometheus)
 
     async def run(self) -> None:
         """
         Run the extraction process and write output using all configured writers.
+        Metrics are written at exit, also when the run fails.
         """
-        # Extracting data from files
-        output = await self._extract_data()
+        try:
+            # Extracting data from files
+            output = await self._extract_data()
 
-        # Writing output using all writers
-        await asyncio.gather(
-            *[writer.write(output) for writer in self._writers],
-        )
+            # Writing output using all writers
+            await asyncio.gather(
+                *[self._write(writer, output) for writer in self._writers],
+            )
+
+            # Only advance the delta state once the output has been written
+            await self._repository.save_state()
+        finally:
+            self._dump_metrics()
@@ -1,14 +1,20 @@
 import asyncio
 import logging
+import sys
+from typing import Any
 
-from vouchers_cli.extractor import VouchersExtractor
-from vouchers_cli.schemas import ExtractorConfig
+# Only the CLI parser is imported up front: the modules of the batch runner,
+# the extractor and the server, with pydantic and the storage and writer
+# dependencies, are imported by the branch that uses them
+from vouchers_cli.options import check_option_combinations
 from vouchers_cli.utils import parse_arguments, setup_logger
 
 
-async def main() -> None:
+async def main() -> int:
     """
     Main entry point for the command-line tool that extracts voucher data.
+
+    :return: The exit status: 1 if the run, or any job of a batch, failed.
     """
     app_description = "Command-line tool for extracting vouchers data."
     args = parse_arguments(app_description)
@@ -17,21 +23,73 @@ async def main() -> None:
         log_level=logging.INFO if args.debug else logging.DEBUG,
     )
 
+    # Options shared by a single run and every job of a batch
+    options: dict[str, Any] = {
+        "batch_size": args.batch_size,
+        "storage": args.storage,
+        "csv_reader": args.csv_reader,
+        "top_customers": args.top_customers,
+        "workers": args.workers,
+        "validate_output": args.validate_output,
+        "cache_dir": args.cache_dir,
+        "rebuild_cache": args.no_cache,
+        "delta_state": args.delta_state,
+        "sqlite_path": args.sqlite_path,
+        "memory_limit": args.memory_limit,
+        "metrics_json": args.metrics_json,
+        "metrics_prometheus": args.metrics_prometheus,
+        "pipeline_depth": args.pipeline_depth,
+        "output_format": args.output_format,
+        "output_partitions": args.output_partitions,
+    }
+
     try:
-        configs = ExtractorConfig(
+        if args.batch is not None:
+            # The other options are checked for every job; --serve has no job
+            check_option_combinations(
+                args.orders_file, args.barcodes_file, batch=args.batch, serve=args.serve
+            )
+
+            from vouchers_cli.batch import BatchRunner
+
+            # Jobs report through the batch summary, not to shared metrics files
+            options.update(metrics_json=None, metrics_prometheus=None)
+            runner = BatchRunner.create(
+                args.batch, options, logger, args.batch_workers, args.metrics_json
+            )
+            results = await runner.run()
+            return int(any(result.exit_code for result in results))
+
+        from vouchers_cli.schemas import ExtractorConfig
+
+        # Arguments are already typed by the parser: skip the pydantic validator
+        configs = ExtractorConfig.from_options(
             orders_file_path=args.orders_file,
             barcodes_file_path=args.barcodes_file,
             output_dir=args.output_dir,
+            **options,
         )
 
+        if args.serve:
+            from vouchers_cli.schemas import ServerConfig
+            from vouchers_cli.server import VoucherServer
+
+            server = VoucherServer.create(configs, logger)
+            await server.serve(ServerConfig(host=args.host, port=args.port))
+            return 0
+
+        from vouchers_cli.extractor import VouchersExtractor
+
         extractor = VouchersExtractor.create(configs, logger)
         await extractor.run()
     except ValueError as e:
         logger.error(e)
+        return 1
+    return 0
 
 
 def entry() -> None:
     """
     Synchronous entry point for running the extraction process.
     """
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,122 @@
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+# Prefix of every metric name in the Prometheus text output
+PROMETHEUS_PREFIX = "vouchers"
+
+
+def peak_rss_bytes() -> int:
+    """
+    Return the peak resident set size of this process, in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+class Metrics:
+    """
+    Stage timers and counters collected during one run.
+
+    Stages accumulate wall-clock seconds and may be nested: the `load` stage
+    contains the `csv_read`, `csv_parse` and `store` stages, and `extract`
+    contains `load`. Counters only grow; they are updated once per batch, not
+    per row, to keep the overhead negligible.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes empty stage timers and counters.
+        """
+        self.stages: dict[str, float] = {}  # stage -> seconds
+        self.counters: dict[str, int] = {}  # counter -> total
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Add the wall-clock time spent in the block to the stage `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Add `value` to the counter `name`.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Return the stages, counters, derived rates and peak RSS as a
+        JSON-serializable mapping.
+        """
+        rates = {}
+        load_seconds = self.stages.get("load", 0.0)
+        rows = self.counters.get("orders_stored", 0) + self.counters.get(
+            "barcodes_stored", 0
+        )
+        if load_seconds and rows:
+            rates["rows_per_second"] = rows / load_seconds
+        read_seconds = self.stages.get("csv_read", 0.0)
+        if read_seconds and (bytes_read := self.counters.get("bytes_read", 0)):
+            rates["bytes_read_per_second"] = bytes_read / read_seconds
+
+        return {
+            "stages": {
+                name: {"seconds": seconds} for name, seconds in self.stages.items()
+            },
+            "counters": dict(self.counters),
+            "rates": rates,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        metrics = self.to_dict()
+        prefix = PROMETHEUS_PREFIX
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall-clock seconds spent in a stage.",
+            f"# TYPE {prefix}_stage_seconds gauge",
+        ]
+        lines += [
+            f'{prefix}_stage_seconds{{stage="{name}"}} {stage["seconds"]}'
+            for name, stage in metrics["stages"].items()
+        ]
+        for name, value in metrics["counters"].items():
+            lines += [
+                f"# TYPE {prefix}_{name}_total counter",
+                f"{prefix}_{name}_total {value}",
+            ]
+        for name, value in metrics["rates"].items():
+            lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value}"]
+        lines += [
+            f"# HELP {prefix}_peak_rss_bytes Peak resident set size of the process.",
+            f"# TYPE {prefix}_peak_rss_bytes gauge",
+            f"{prefix}_peak_rss_bytes {metrics['peak_rss_bytes']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, file_path: Path) -> None:
+        """
+        Write the metrics to `file_path` as JSON.
+        """
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(json.dumps(self.to_dict(), indent=2) + "\n")
+
+    def write_prometheus(self, file_path: Path) -> None:
+        """
+        Write the metrics to `file_path` in the Prometheus text format, e.g. for
+        the node exporter's textfile collector.
+        """
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(self.to_prometheus())
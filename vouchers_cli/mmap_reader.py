@@ -0,0 +1,184 @@
+import asyncio
+import csv
+import mmap
+from io import StringIO
+from logging import Logger
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, TypeVar
+
+from vouchers_cli.async_reader import (
+    DEFAULT_CHUNK_SIZE,
+    BarcodeColumns,
+    OrderColumns,
+)
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.options import DEFAULT_BATCH_SIZE
+
+Columns = TypeVar("Columns", OrderColumns, BarcodeColumns)
+
+# Every byte but the field and line separators, deleted to get a chunk's layout
+_NON_SEPARATORS = bytes(byte for byte in range(256) if byte not in b",\n")
+
+
+def scan_chunk(chunk: bytes) -> tuple[list[bytes], list[bytes]]:
+    """
+    Split a chunk of complete two-column CSV lines into its two byte columns.
+
+    Plain lines are split with two C-level passes over the whole chunk (newlines
+    turned into commas, then one split), without creating a line or `str`
+    object per row; a third pass checks that every line has exactly one comma.
+    Chunks with quoted fields, stray carriage returns, blank lines or another
+    number of fields per line fall back to `csv.reader`. Blank lines are
+    skipped.
+
+    :raises ValueError: If a row does not have exactly two fields.
+    """
+    text = chunk.replace(b"\r\n", b"\n") if b"\r" in chunk else chunk
+    text = text.strip(b"\n")
+    if not text:
+        return [], []
+
+    if b'"' not in text and b"\r" not in text:
+        # Separators alternate between a comma and a newline on plain lines
+        layout = text.translate(None, _NON_SEPARATORS)
+        if layout == b",\n" * text.count(b"\n") + b",":
+            fields = text.replace(b"\n", b",").split(b",")
+            return fields[0::2], fields[1::2]
+
+    rows = [row for row in csv.reader(StringIO(text.decode(), newline="")) if row]
+    for row in rows:
+        if len(row) != 2:
+            raise ValueError(f"Expected 2 fields in CSV row, got {len(row)}: {row}")
+    return [row[0].encode() for row in rows], [row[1].encode() for row in rows]
+
+
+def order_columns(order_ids: list[bytes], customer_ids: list[bytes]) -> OrderColumns:
+    """
+    Convert orders byte columns to integers; `int` parses bytes directly.
+    """
+    return list(map(int, order_ids)), list(map(int, customer_ids))
+
+
+def barcode_columns(barcodes: list[bytes], order_ids: list[bytes]) -> BarcodeColumns:
+    """
+    Convert barcodes byte columns. Barcodes are decoded with a single decode
+    and split over the whole column, so the only `str` objects created are
+    the barcodes themselves; an empty order id marks an unused barcode.
+    """
+    strings = b"\n".join(barcodes).decode().split("\n") if barcodes else []
+    if len(strings) != len(barcodes):
+        # A quoted barcode contained a newline
+        strings = [barcode.decode() for barcode in barcodes]
+    return strings, [int(order_id) if order_id else None for order_id in order_ids]
+
+
+class MmapCSVReader:
+    """
+    CSV reader for two-column files (orders and barcodes) that memory-maps the
+    file and scans it as bytes.
+
+    Unlike `AsyncCSVReader`, rows are never decoded into line strings and split
+    by `csv.reader`: ids are parsed into integers straight from the mapped
+    bytes and only barcodes become `str` objects.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        metrics: Metrics | None = None,
+    ):
+        """
+        Initialize the reader with a logger.
+
+        :param logger: Logger instance for logging messages.
+        :param chunk_size: Number of mapped bytes scanned at a time.
+        :param metrics: Metrics receiving the `bytes_read` and `rows_parsed`
+            counters.
+        """
+        self._logger = logger
+        self._chunk_size = chunk_size
+        self._metrics = metrics or Metrics()
+
+    def _read_columns(
+        self,
+        file_path: Path,
+        batch_size: int,
+        convert: Callable[[list[bytes], list[bytes]], Columns],
+    ) -> Iterator[Columns]:
+        """
+        Lazily scan a mapped CSV file in chunks that end on line boundaries and
+        yield converted column batches of at most `batch_size` rows. The header
+        row is skipped.
+        """
+        metrics = self._metrics
+        with open(file_path, "rb") as file:
+            if not file.seek(0, 2):
+                return  # Empty files cannot be mapped
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                first: list[bytes] = []
+                second: list[bytes] = []
+                size = len(mapped)
+                start = mapped.find(b"\n") + 1 or size  # Skip header row
+                metrics.count("bytes_read", start)
+
+                while start < size:
+                    end = mapped.rfind(b"\n", start, start + self._chunk_size) + 1
+                    if end <= start or start + self._chunk_size >= size:
+                        # No complete line in the window, or the final chunk
+                        line_end = mapped.find(b"\n", start + self._chunk_size)
+                        end = size if line_end < 0 else line_end + 1
+
+                    chunk_first, chunk_second = scan_chunk(mapped[start:end])
+                    metrics.count("bytes_read", end - start)
+                    metrics.count("rows_parsed", len(chunk_first))
+                    first += chunk_first
+                    second += chunk_second
+                    start = end
+
+                    while len(first) >= batch_size:
+                        yield convert(first[:batch_size], second[:batch_size])
+                        del first[:batch_size], second[:batch_size]
+
+                if first:
+                    yield convert(first, second)
+
+    async def _iter_columns(
+        self,
+        file_path: Path,
+        batch_size: int,
+        convert: Callable[[list[bytes], list[bytes]], Columns],
+    ) -> AsyncIterator[Columns]:
+        """
+        Stream column batches, scanning and converting each one in a worker
+        thread so the event loop is not blocked.
+        """
+        self._logger.debug(f"Reading from {file_path}")
+        if not file_path.exists():
+            self._logger.error(f"File not found: {file_path}")
+            return
+
+        loop = asyncio.get_running_loop()
+        batches = self._read_columns(file_path, batch_size, convert)
+        while (
+            batch := await loop.run_in_executor(None, next, batches, None)
+        ) is not None:
+            yield batch
+
+    async def iter_orders(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[OrderColumns]:
+        """
+        Stream an orders CSV file as (order_ids, customer_ids) column batches.
+        """
+        async for columns in self._iter_columns(file_path, batch_size, order_columns):
+            yield columns
+
+    async def iter_barcodes(
+        self, file_path: Path, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncIterator[BarcodeColumns]:
+        """
+        Stream a barcodes CSV file as (barcodes, order_ids) column batches.
+        """
+        async for columns in self._iter_columns(file_path, batch_size, barcode_columns):
+            yield columns
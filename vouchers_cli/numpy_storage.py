@@ -0,0 +1,319 @@
+from itertools import accumulate, pairwise
+from logging import Logger
+from typing import AsyncIterator, Iterable, NamedTuple, Sequence
+
+try:
+    import numpy as np
+    from numpy.typing import NDArray
+except ImportError:  # pragma: no cover - exercised only without the extra
+    np = None  # type: ignore[assignment]
+
+from vouchers_cli.storage import CustomerVouchers, OrderStorage, index_by_customer
+
+# Order id of pooled rows that were allocated and re-appended, and of reported
+# duplicates; never stored
+_DROPPED = -1
+
+
+class JoinResult(NamedTuple):
+    """
+    Vouchers and unused barcodes produced by one vectorized join.
+
+    Barcodes of voucher `i` are `barcodes[offsets[i]:offsets[i + 1]]`.
+    """
+
+    order_ids: "NDArray[np.int64]"
+    customer_ids: "NDArray[np.int64]"
+    offsets: "NDArray[np.int64]"
+    barcodes: "NDArray[np.str_]"
+    unused_barcodes: "NDArray[np.str_]"
+    unused_rows: "NDArray[np.int64]"
+
+
+class NumpyOrderStorage(OrderStorage):
+    """
+    OrderStorage variant that joins barcodes to orders with vectorized NumPy
+    operations instead of one dict lookup and set test per row.
+
+    Barcode rows are only buffered as column arrays while loading. The join runs
+    once, on the first read after loading: duplicates are found with `np.unique`,
+    orders are resolved with a sorted-key `searchsorted` lookup and barcodes are
+    grouped per order with a single stable argsort. The results are identical to
+    `OrderStorage` as long as orders are stored before they are read, which is
+    how `Repository` loads data. Orders and the top-customer index are handled
+    by `OrderStorage` unchanged. Requires the optional `numpy` package.
+    """
+
+    def __init__(self, logger: Logger) -> None:
+        """
+        Initializes the storage with empty barcode column buffers.
+        """
+        if np is None:
+            raise ValueError(
+                "The 'numpy' storage requires the optional 'numpy' package "
+                "(poetry install --extras numpy)."
+            )
+        super().__init__(logger)
+
+        self._barcode_chunks: list[NDArray[np.str_]] = []
+        self._order_id_chunks: list[NDArray[np.int64]] = []
+        self._has_order_chunks: list[NDArray[np.bool_]] = []
+        self._join_result: JoinResult | None = None
+        self._customer_index_cache: CustomerVouchers | None = None
+        # Unused rows of the last join not yet allocated: self._pool[:self._pool_size]
+        self._pool: NDArray[np.int64] | None = None
+        self._pool_size = 0
+        # Leading buffered rows whose duplicates were already reported by a join
+        self._checked_rows = 0
+
+    def _append_columns(
+        self, barcodes: Sequence[str], order_ids: Sequence[int | None]
+    ) -> None:
+        """
+        Buffer a batch of barcode columns for the next join.
+        """
+        if not len(barcodes):
+            return
+
+        order_id_objects = np.array(order_ids, dtype=object)
+        has_order = (order_id_objects != None).astype(np.bool_)  # noqa: E711
+        order_id_objects[~has_order] = 0
+
+        self._barcode_chunks.append(np.array(barcodes, dtype=np.str_))
+        self._order_id_chunks.append(order_id_objects.astype(np.int64))
+        self._has_order_chunks.append(has_order)
+        self._join_result = None
+        self._customer_index_cache = None
+        self._pool = None
+
+    def _apply_barcodes(self, barcodes: Iterable[tuple[str, int | None]]) -> None:
+        """
+        Buffer (barcode, order_id) pairs; they are joined on the next read.
+        """
+        rows = list(barcodes)
+        self._append_columns(
+            [barcode for barcode, _ in rows], [order_id for _, order_id in rows]
+        )
+
+    async def store_barcode_columns(
+        self, barcodes: Sequence[str], order_ids: Sequence[int | None]
+    ) -> None:
+        """
+        Buffer a batch of barcode columns under a single lock acquisition,
+        without a per-row loop.
+        """
+        async with self._lock:
+            self._append_columns(barcodes, order_ids)
+
+    async def merge_barcodes(
+        self,
+        customer_to_barcodes: dict[tuple[int, int], list[str]],
+        used_barcodes: set[str],
+        unused_barcodes: set[str],
+        duplicate_barcodes: Sequence[str] = (),
+    ) -> None:
+        """
+        Buffer the barcode state of a partial `OrderStorage`; duplicates across
+        partial states are detected by the join.
+        """
+        async with self._lock:
+            self.duplicate_barcodes.extend(duplicate_barcodes)
+            self._apply_barcodes(
+                (barcode, order_id)
+                for (order_id, _), barcodes in customer_to_barcodes.items()
+                for barcode in barcodes
+            )
+            self._apply_barcodes((barcode, None) for barcode in unused_barcodes)
+
+    def _unused_count(self) -> int:
+        """
+        Return the number of unused barcodes left in the pool, joining first if
+        barcodes were stored since. Callers must hold the lock.
+        """
+        if self._pool is None:
+            self._join()
+        return self._pool_size
+
+    def _allocate(self, requests: Sequence[tuple[int, int]]) -> list[list[str]]:
+        """
+        Move barcodes from the end of the unused pool to the orders of validated
+        requests, in O(count) per request. Callers must hold the lock.
+
+        The pooled rows are dropped in place by pointing them at a missing order,
+        and re-appended as a chunk with the requested orders, so the next join
+        groups them after the existing barcodes of each voucher.
+        """
+        assert self._pool is not None  # Filled by _unused_count
+        counts = [count for _, count in requests]
+        end = self._pool_size
+        self._pool_size -= sum(counts)
+        rows = self._pool[self._pool_size : end]
+        if not len(rows):
+            return [[] for _ in requests]
+
+        barcodes = self._barcode_chunks[0][rows]
+        self._order_id_chunks[0][rows] = _DROPPED
+        self._has_order_chunks[0][rows] = True
+        self._barcode_chunks.append(barcodes)
+        self._order_id_chunks.append(
+            np.repeat(
+                np.array([order_id for order_id, _ in requests], dtype=np.int64),
+                counts,
+            )
+        )
+        self._has_order_chunks.append(np.ones(len(rows), dtype=np.bool_))
+        self._join_result = None
+        self._customer_index_cache = None
+
+        bounds = accumulate(counts, initial=0)
+        return [barcodes[start:stop].tolist() for start, stop in pairwise(bounds)]
+
+    def _join(self) -> JoinResult:
+        """
+        Join the buffered barcodes to the stored orders, caching the result
+        until more barcodes are stored.
+        """
+        if self._join_result is not None:
+            return self._join_result
+
+        if not self._barcode_chunks:
+            empty_ints = np.zeros(0, dtype=np.int64)
+            empty_strings = np.zeros(0, dtype=np.str_)
+            self._join_result = JoinResult(
+                order_ids=empty_ints,
+                customer_ids=empty_ints,
+                offsets=np.zeros(1, dtype=np.int64),
+                barcodes=empty_strings,
+                unused_barcodes=empty_strings,
+                unused_rows=empty_ints,
+            )
+            self._pool, self._pool_size = empty_ints, 0
+            return self._join_result
+
+        # Consolidate the buffers so later joins do not concatenate them again
+        barcodes = np.concatenate(self._barcode_chunks)
+        order_ids = np.concatenate(self._order_id_chunks)
+        has_order = np.concatenate(self._has_order_chunks)
+        self._barcode_chunks = [barcodes]
+        self._order_id_chunks = [order_ids]
+        self._has_order_chunks = [has_order]
+        rows = np.arange(len(barcodes), dtype=np.int64)
+
+        # Resolve customers with a binary search over the sorted order ids
+        order_keys = np.fromiter(
+            self.orders_to_customers.keys(),
+            dtype=np.int64,
+            count=len(self.orders_to_customers),
+        )
+        order_values = np.fromiter(
+            self.orders_to_customers.values(),
+            dtype=np.int64,
+            count=len(self.orders_to_customers),
+        )
+        sorter = np.argsort(order_keys)
+        order_keys, order_values = order_keys[sorter], order_values[sorter]
+        customer_ids = np.zeros(len(barcodes), dtype=np.int64)
+        if len(order_keys):
+            positions = np.searchsorted(order_keys, order_ids)
+            positions = np.minimum(positions, len(order_keys) - 1)
+            found = has_order & (order_keys[positions] == order_ids)
+            customer_ids[found] = order_values[positions[found]]
+
+        # Barcodes of unknown orders are dropped, as in OrderStorage (which also
+        # treats customer 0 as missing), and never count as a first occurrence
+        kept = ~has_order | (customer_ids != 0)
+
+        # Number the distinct barcodes with a single sort over the strings, so
+        # the rest of the join only compares integers
+        distinct_barcodes, barcode_ids = np.unique(barcodes, return_inverse=True)
+
+        # The first kept occurrence of every barcode wins
+        kept_rows = rows[kept]
+        winner_ids, first_index = np.unique(barcode_ids[kept_rows], return_index=True)
+        winner_rows = kept_rows[first_index]
+
+        # Any later row whose barcode already won is a duplicate
+        first_rows = np.full(len(distinct_barcodes), len(barcodes), dtype=np.int64)
+        first_rows[winner_ids] = winner_rows
+        duplicate = first_rows[barcode_ids] < rows
+        # Only rows buffered since the last join are reported; they are dropped
+        # in place so they never win once the winner is allocated
+        duplicate[: self._checked_rows] = False
+        for barcode in barcodes[duplicate].tolist():
+            self._log_duplicate(barcode)
+        order_ids[duplicate] = _DROPPED
+        has_order[duplicate] = True
+        self._checked_rows = len(barcodes)
+
+        winner_rows.sort()
+        used_rows = winner_rows[has_order[winner_rows]]
+        unused_rows = winner_rows[~has_order[winner_rows]]
+
+        # Group used barcodes per order, with orders in first-appearance order
+        # and barcodes in file order, using one stable argsort over group ranks
+        used_order_ids = order_ids[used_rows]
+        group_order_ids, group_first, groups = np.unique(
+            used_order_ids, return_index=True, return_inverse=True
+        )
+        appearance = np.argsort(group_first)
+        group_rank = np.empty_like(appearance)
+        group_rank[appearance] = np.arange(len(appearance))
+        ranks = group_rank[groups]
+        grouped_rows = used_rows[np.argsort(ranks, kind="stable")]
+
+        group_sizes = np.bincount(ranks, minlength=len(appearance))
+        offsets = np.zeros(len(appearance) + 1, dtype=np.int64)
+        np.cumsum(group_sizes, out=offsets[1:])
+
+        self._join_result = JoinResult(
+            order_ids=group_order_ids[appearance],
+            customer_ids=customer_ids[used_rows[group_first[appearance]]],
+            offsets=offsets,
+            barcodes=barcodes[grouped_rows],
+            unused_barcodes=barcodes[unused_rows],
+            unused_rows=unused_rows,
+        )
+        # Rows of the consolidated buffers keep their index until more barcodes
+        # are stored, so allocations can take unused rows from the pool
+        self._pool, self._pool_size = unused_rows, len(unused_rows)
+        return self._join_result
+
+    async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
+        """
+        Join and group used barcodes into a mapping of
+        (order_id, customer_id) to barcodes, with async-safe access.
+        """
+        async with self._lock:
+            return {key: barcodes async for key, barcodes in self.iter_vouchers()}
+
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs from the joined
+        arrays, converting one voucher at a time to Python objects. Intended to
+        be consumed once loading has finished.
+        """
+        result = self._join()
+        offsets = result.offsets.tolist()
+        for index, (order_id, customer_id) in enumerate(
+            zip(result.order_ids.tolist(), result.customer_ids.tolist(), strict=True)
+        ):
+            yield (
+                (order_id, customer_id),
+                result.barcodes[offsets[index] : offsets[index + 1]].tolist(),
+            )
+
+    async def _customer_index(self) -> CustomerVouchers:
+        """
+        Build the vouchers indexed by customer from the grouped vouchers on the
+        first lookup after barcodes were stored.
+        """
+        if self._customer_index_cache is None:
+            self._customer_index_cache = await index_by_customer(self.iter_vouchers())
+        return self._customer_index_cache
+
+    async def get_unused_barcodes(self) -> set[str]:
+        """
+        Join and return unused barcodes, with async-safe access.
+        """
+        async with self._lock:
+            return set(self._join().unused_barcodes.tolist())
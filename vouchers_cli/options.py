@@ -0,0 +1,229 @@
+import importlib.util
+import os
+from enum import StrEnum
+from pathlib import Path
+
+# Only the standard library is imported here: the CLI parser and the light
+# config checks build on this module before any heavy dependency is loaded.
+
+DEFAULT_BATCH_SIZE = 10_000  # Rows handed to the consumer per batch
+DEFAULT_TOP_CUSTOMERS = 5  # Number of customers reported by get_top_customers
+DEFAULT_MEMORY_LIMIT = 1 << 30  # Bytes of buffered rows before runs are spilled
+DEFAULT_CACHE_DIR = Path(".vouchers-cache")  # Where the CLI keeps snapshots
+DEFAULT_DATABASE_PATH = DEFAULT_CACHE_DIR / "vouchers.sqlite3"
+DEFAULT_BATCH_WORKERS = os.cpu_count() or 1  # Jobs run at the same time
+DEFAULT_HOST = "127.0.0.1"  # Interface the query server listens on
+DEFAULT_PORT = 8080  # Port the query server listens on
+
+PARQUET_SUFFIXES = frozenset({".parquet", ".pq"})
+ARROW_IPC_SUFFIXES = frozenset({".arrow", ".feather", ".ipc"})
+COLUMNAR_SUFFIXES = PARQUET_SUFFIXES | ARROW_IPC_SUFFIXES
+
+
+class StorageBackend(StrEnum):
+    """
+    Storage backends that can hold the loaded orders and barcodes.
+    """
+
+    MEMORY = "memory"  # Plain dicts and sets of strings (OrderStorage)
+    COMPACT = "compact"  # Integer-encoded barcodes (CompactOrderStorage)
+    NUMPY = "numpy"  # Vectorized NumPy join (NumpyOrderStorage)
+    SQLITE = "sqlite"  # Local SQLite database file (SqliteOrderStorage)
+    EXTERNAL = "external"  # Sorted runs on disk (ExternalSortStorage)
+
+
+# Backends keeping their data on disk; they bypass the snapshot cache and delta
+# state, which are built from in-memory indexes
+DISK_STORAGE_BACKENDS = frozenset({StorageBackend.SQLITE, StorageBackend.EXTERNAL})
+
+
+class CSVReader(StrEnum):
+    """
+    Readers that can parse CSV input files.
+    """
+
+    STREAM = "stream"  # Chunked reads parsed by csv.reader (AsyncCSVReader)
+    MMAP = "mmap"  # Memory-mapped byte scanning (MmapCSVReader)
+
+
+class OutputFormat(StrEnum):
+    """
+    Formats the vouchers output file can be written in.
+    """
+
+    TEXT = "text"  # Plain text lines (FileWriter)
+    GZIP = "gzip"  # Gzip-compressed text lines (GzipFileWriter)
+    ZSTD = "zstd"  # Zstandard-compressed text lines (ZstdFileWriter)
+    PARQUET = "parquet"  # One row per voucher, barcodes as a list (ParquetFileWriter)
+
+
+class Compression(StrEnum):
+    """
+    Compressions of CSV input files, decompressed while they are streamed.
+    """
+
+    GZIP = "gzip"  # gzip module
+    ZSTD = "zstd"  # Optional zstandard package
+    BZ2 = "bz2"  # bz2 module
+
+
+COMPRESSION_SUFFIXES = {
+    ".gz": Compression.GZIP,
+    ".zst": Compression.ZSTD,
+    ".bz2": Compression.BZ2,
+}
+
+# Leading bytes of every stream in each compression; plain CSV files start with
+# a text header, which none of them is
+COMPRESSION_MAGIC = {
+    b"\x1f\x8b": Compression.GZIP,
+    b"\x28\xb5\x2f\xfd": Compression.ZSTD,
+    b"BZh": Compression.BZ2,
+}
+
+
+def compression_of(file_path: Path) -> Compression | None:
+    """
+    Detect the compression of an input file from its suffix or, for files
+    without a compression suffix, from its first bytes.
+
+    :return: The compression, or None for an uncompressed (or missing) file.
+    """
+    compression = COMPRESSION_SUFFIXES.get(file_path.suffix.lower())
+    if compression is None and file_path.is_file():
+        with open(file_path, "rb") as file:
+            head = file.read(4)
+        for magic, candidate in COMPRESSION_MAGIC.items():
+            if head.startswith(magic):
+                return candidate
+    return compression
+
+
+def is_columnar(file_path: Path) -> bool:
+    """
+    Check whether a file is a Parquet or Arrow IPC file, based on its suffix.
+    """
+    return file_path.suffix.lower() in COLUMNAR_SUFFIXES
+
+
+def check_input_file(file_path: Path) -> Path:
+    """
+    Check that an input file exists and is in CSV, Parquet or Arrow IPC format.
+    CSV files may be compressed with gzip, zstd or bz2.
+
+    :raises ValueError: If the file is missing, has another format or needs
+        a missing optional package.
+    """
+    # Check if the file exists
+    if not file_path.exists():
+        raise ValueError(f"File not found: {file_path}")
+
+    # Ensure the file has a .csv or columnar extension, after any compression one
+    csv_path = file_path
+    if file_path.suffix.lower() in COMPRESSION_SUFFIXES:
+        csv_path = file_path.with_suffix("")
+    if csv_path.suffix.lower() != ".csv" and not is_columnar(file_path):
+        raise ValueError(
+            f"Invalid file format: {file_path}. "
+            "Expected a CSV, Parquet or Arrow IPC file; CSV files may be "
+            "compressed with gzip, zstd or bz2 (.gz, .zst, .bz2)."
+        )
+
+    if (
+        compression_of(file_path) == Compression.ZSTD
+        and importlib.util.find_spec("zstandard") is None
+    ):
+        raise ValueError(
+            "Reading zstd-compressed input requires the optional 'zstandard' "
+            "package (poetry install --extras zstd)."
+        )
+
+    return file_path
+
+
+def _check_compressed_input(
+    csv_reader: CSVReader, workers: int, delta_state: Path | None
+) -> None:
+    """
+    Check the options of a run over compressed input, which can only be
+    decompressed from the start as one stream: no memory mapping, byte-range
+    shards or delta offsets.
+    """
+    if csv_reader == CSVReader.MMAP:
+        raise ValueError(
+            "Compressed input is only supported by the 'stream' CSV reader."
+        )
+    if workers > 1:
+        raise ValueError("Parallel loading (--workers) needs uncompressed input.")
+    if delta_state is not None:
+        raise ValueError("Delta mode (--delta-state) needs uncompressed input.")
+
+
+def _check_storage_backend(
+    storage: StorageBackend, workers: int, delta_state: Path | None
+) -> None:
+    """
+    Check the options of a run with one of the on-disk storages: the SQLite
+    storage does not support parallel loading and neither supports delta mode.
+    """
+    if storage == StorageBackend.SQLITE and workers > 1:
+        raise ValueError("The 'sqlite' storage cannot be combined with --workers.")
+
+    if storage in DISK_STORAGE_BACKENDS and delta_state is not None:
+        raise ValueError(
+            f"The '{storage}' storage cannot be combined with --delta-state."
+        )
+
+
+def check_option_combinations(
+    orders_file_path: Path,
+    barcodes_file_path: Path,
+    storage: StorageBackend = StorageBackend.MEMORY,
+    csv_reader: CSVReader = CSVReader.STREAM,
+    workers: int = 1,
+    delta_state: Path | None = None,
+    output_format: OutputFormat = OutputFormat.TEXT,
+    output_partitions: int = 1,
+    batch: Path | None = None,
+    serve: bool = False,
+) -> None:
+    """
+    Check that batch mode is not combined with server mode, that both input
+    files share one format, that sharded parallel loading and delta mode are
+    only requested for CSV input, that compressed input is only read by the
+    stream reader, that the on-disk storages are not combined with delta mode
+    and that partitioned output is only requested for text output.
+
+    :raises ValueError: On the first unsupported combination.
+    """
+    if batch is not None and serve:
+        raise ValueError("Batch mode (--batch) cannot be combined with --serve.")
+
+    columnar = is_columnar(orders_file_path)
+    if columnar != is_columnar(barcodes_file_path):
+        raise ValueError(
+            "Orders and barcodes files must both be CSV or both be "
+            "Parquet/Arrow IPC files."
+        )
+
+    if columnar and workers > 1:
+        raise ValueError("Parallel loading (--workers) only supports CSV input.")
+
+    if delta_state is not None:
+        if columnar:
+            raise ValueError("Delta mode (--delta-state) only supports CSV input.")
+        if workers > 1:
+            raise ValueError(
+                "Delta mode (--delta-state) cannot be combined with --workers."
+            )
+
+    if compression_of(orders_file_path) or compression_of(barcodes_file_path):
+        _check_compressed_input(csv_reader, workers, delta_state)
+
+    _check_storage_backend(storage, workers, delta_state)
+
+    if output_partitions > 1 and output_format != OutputFormat.TEXT:
+        raise ValueError(
+            "Partitioned output (--output-partitions) only supports the "
+            "'text' output format."
+        )
@@ -0,0 +1,139 @@
+import asyncio
+import csv
+import multiprocessing
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from itertools import pairwise
+from logging import Logger
+from pathlib import Path
+from typing import Iterator
+
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.storage import OrderStorage
+
+DEFAULT_SHARD_SIZE = 64 * 1024 * 1024  # Upper bound of bytes parsed per task
+
+
+def shard_file(file_path: Path, shards: int) -> list[tuple[int, int]]:
+    """
+    Split a CSV file into at most `shards` byte ranges that start and end on
+    line boundaries. The header row is excluded from every range.
+
+    :return: List of (start, end) byte offsets, in file order.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        file.readline()  # Skip header row
+        offsets = [file.tell()]
+        for index in range(1, shards):
+            position = max(size * index // shards, offsets[-1])
+            file.seek(position)
+            file.readline()  # Move to the start of the next line
+            offsets.append(min(file.tell(), size))
+        offsets.append(size)
+
+    return [(start, end) for start, end in pairwise(offsets) if start < end]
+
+
+def _read_rows(file_path: Path, start: int, end: int) -> Iterator[list[str]]:
+    """
+    Return a CSV reader over the rows stored in the [start, end) byte range.
+    """
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        content = file.read(end - start)
+    return csv.reader(StringIO(content.decode("utf-8"), newline=""))
+
+
+def parse_orders_shard(
+    file_path: Path, start: int, end: int
+) -> tuple[array[int], array[int]]:
+    """
+    Parse one shard of the orders file into (order_ids, customer_ids) columns.
+    """
+    order_ids, customer_ids = array("q"), array("q")
+    for row in _read_rows(file_path, start, end):
+        if row:
+            order_ids.append(int(row[0]))
+            customer_ids.append(int(row[1]))
+    return order_ids, customer_ids
+
+
+def parse_barcodes_shard(
+    file_path: Path, start: int, end: int
+) -> tuple[list[str], list[int | None]]:
+    """
+    Parse one shard of the barcodes file into (barcodes, order_ids) columns, in
+    file order, where a `None` order id marks an unused barcode.
+    """
+    barcodes: list[str] = []
+    order_ids: list[int | None] = []
+    for row in _read_rows(file_path, start, end):
+        if row:
+            barcodes.append(row[0])
+            order_ids.append(int(row[1]) if row[1] else None)
+    return barcodes, order_ids
+
+
+async def load_sharded(
+    order_file_path: Path,
+    barcodes_file_path: Path,
+    storage: OrderStorage,
+    logger: Logger,
+    workers: int,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    metrics: Metrics | None = None,
+) -> None:
+    """
+    Load orders and barcodes into storage by parsing byte-range shards of both
+    files in a process pool.
+
+    Both files are parsed in the workers and their columns are stored in file
+    order, so every barcode row is replayed against the complete orders mapping
+    and duplicates, unknown orders and voucher order come out exactly as in a
+    sequential load.
+
+    :param metrics: Metrics receiving the `store` stage timer and the
+        `bytes_read`, `rows_parsed`, `orders_stored` and `barcodes_stored`
+        counters.
+    """
+    metrics = metrics or Metrics()
+    loop = asyncio.get_running_loop()
+    # Spawned workers are safe to start from the threaded event loop process
+    context = multiprocessing.get_context("spawn")
+
+    def shards_of(file_path: Path) -> list[tuple[int, int]]:
+        count = max(workers, -(-os.path.getsize(file_path) // shard_size))
+        return shard_file(file_path, count)
+
+    logger.debug(f"Reading from {order_file_path} with {workers} workers")
+    metrics.count("bytes_read", os.path.getsize(order_file_path))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        order_futures = [
+            loop.run_in_executor(pool, parse_orders_shard, order_file_path, *shard)
+            for shard in shards_of(order_file_path)
+        ]
+        for order_future in order_futures:
+            order_ids, customer_ids = await order_future
+            metrics.count("rows_parsed", len(order_ids))
+            with metrics.stage("store"):
+                await storage.store_orders_bulk(
+                    zip(order_ids, customer_ids, strict=True)
+                )
+            metrics.count("orders_stored", len(order_ids))
+
+    logger.debug(f"Reading from {barcodes_file_path} with {workers} workers")
+    metrics.count("bytes_read", os.path.getsize(barcodes_file_path))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        barcode_futures = [
+            loop.run_in_executor(pool, parse_barcodes_shard, barcodes_file_path, *shard)
+            for shard in shards_of(barcodes_file_path)
+        ]
+        for barcode_future in barcode_futures:
+            barcodes, barcode_order_ids = await barcode_future
+            metrics.count("rows_parsed", len(barcodes))
+            with metrics.stage("store"):
+                await storage.store_barcode_columns(barcodes, barcode_order_ids)
+            metrics.count("barcodes_stored", len(barcodes))
@@ -0,0 +1,72 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from typing import AsyncIterator, Generic, TypeVar
+
+DEFAULT_PIPELINE_DEPTH = 4  # Items buffered between two pipeline stages
+
+T = TypeVar("T")
+
+
+class _End:
+    """
+    Marks the end of a stage's output, carrying the error it failed with.
+    """
+
+    def __init__(self, error: BaseException | None = None):
+        self.error = error
+
+
+class Prefetcher(Generic[T]):
+    """
+    Pipeline stage that runs an async iterator in its own task, as soon as it
+    is created, and hands its items over through a bounded queue.
+
+    The producer runs ahead of the consumer by at most `depth` items and then
+    waits (backpressure), so memory stays bounded while the producer's awaits,
+    such as disk reads in a thread, overlap with the consumer's work. Errors of
+    the producer are raised to the consumer; closing the prefetcher early
+    cancels the producer.
+    """
+
+    def __init__(self, source: AsyncIterator[T], depth: int = DEFAULT_PIPELINE_DEPTH):
+        """
+        :param source: Iterator of the upstream stage.
+        :param depth: Maximum number of items buffered ahead of the consumer.
+        """
+        self._queue: asyncio.Queue[T | _End] = asyncio.Queue(maxsize=depth)
+        self._task = asyncio.create_task(self._produce(source))
+
+    async def _produce(self, source: AsyncIterator[T]) -> None:
+        try:
+            async for item in source:
+                await self._queue.put(item)
+        except Exception as e:
+            await self._queue.put(_End(e))
+        else:
+            await self._queue.put(_End())
+        finally:
+            # Release the source (e.g. its open file) when stopped early
+            if isinstance(source, AsyncGenerator):
+                await source.aclose()
+
+    def __aiter__(self) -> "Prefetcher[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        item = await self._queue.get()
+        if isinstance(item, _End):
+            await self._task
+            if item.error is not None:
+                raise item.error
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self) -> None:
+        """
+        Stop the producer, e.g. when the consumer gives up early.
+        """
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
@@ -1,9 +1,14 @@
-import asyncio
-from collections import Counter
 from logging import Logger
 from pathlib import Path
+from typing import Any, AsyncIterator, Sequence
 
-from vouchers_cli.async_reader import FileReader
+from vouchers_cli.async_reader import BarcodeColumns, FileReader, OrderColumns
+from vouchers_cli.delta import DeltaState
+from vouchers_cli.metrics import Metrics
+from vouchers_cli.options import DEFAULT_BATCH_SIZE, DEFAULT_TOP_CUSTOMERS
+from vouchers_cli.parallel_loader import load_sharded
+from vouchers_cli.pipeline import Prefetcher
+from vouchers_cli.snapshot import SnapshotCache, SnapshotStorage
 from vouchers_cli.storage import OrderStorage
 
 
@@ -20,6 +25,13 @@ class Repository:
         logger: Logger,
         reader: FileReader,
         storage: OrderStorage,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int = 1,
+        cache: SnapshotCache | None = None,
+        rebuild_cache: bool = False,
+        delta: DeltaState | None = None,
+        metrics: Metrics | None = None,
+        pipeline_depth: int = 0,
     ):
         """
         Initialize the repository with file paths, logger, data reader, and storage.
@@ -27,40 +39,137 @@ class Repository:
         :param order_file_path: Path to the orders CSV file.
         :param barcodes_file_path: Path to the barcodes CSV file.
         :param logger: Logger instance for logging messages.
-        :param reader: FileReader instance for reading CSV files asynchronously.
+        :param reader: FileReader instance for streaming the input files.
         :param storage: OrderStorage instance for managing orders and barcodes.
+        :param batch_size: Number of rows streamed from the reader at a time.
+        :param workers: Number of processes parsing the files; with more than one,
+            the files are split into shards and parsed in a process pool.
+        :param cache: Snapshot cache used to skip parsing unchanged input files.
+        :param rebuild_cache: Ignore an existing snapshot and replace it with one
+            built from the input files.
+        :param delta: Delta state used to load only the lines appended to the
+            input files since the previous run; takes precedence over `cache`.
+            Vouchers then only hold the barcodes added by this run.
+        :param metrics: Metrics receiving the `load` and `store` stage timers and
+            the `orders_stored` and `barcodes_stored` counters.
+        :param pipeline_depth: Number of parsed batches of each file buffered
+            ahead of the storage by reader tasks, so the barcodes file is read
+            and parsed while orders are stored; 0 reads on demand.
         """
         self._order_file_path = order_file_path
         self._barcodes_file_path = barcodes_file_path
+        self._batch_size = batch_size
+        self._workers = workers
+        self._cache = cache
+        self._rebuild_cache = rebuild_cache
+        self._delta = delta
+        self._metrics = metrics or Metrics()
+        self._pipeline_depth = pipeline_depth
+        self._previous_sizes: dict[tuple[int, int], int] = {}
 
         # Injected dependencies
         self._logger = logger
         self._reader = reader
         self._storage = storage
+        self._writable_storage = storage
 
         self._loaded = False
 
     async def _load_data(self) -> None:
         """
-        Load data from CSV files into storage if not already loaded.
+        Load data into storage if not already loaded, timed as the `load` stage.
         """
         if self._loaded:
             return
 
-        orders, barcodes = await asyncio.gather(
-            self._reader.read_csv(self._order_file_path),
-            self._reader.read_csv(self._barcodes_file_path),
+        with self._metrics.stage("load"):
+            await self._load_sources()
+        self._loaded = True
+
+    async def _load_sources(self) -> None:
+        """
+        Load data into storage from a snapshot of the input files when a valid
+        one is cached, otherwise from the files themselves (refreshing the
+        snapshot).
+        """
+        if self._delta is not None:
+            self._previous_sizes = await self._delta.load(
+                self._order_file_path, self._barcodes_file_path, self._storage
+            )
+            return
+
+        if self._cache is None:
+            await self._load_files()
+            return
+
+        if not self._rebuild_cache:
+            snapshot = self._cache.load(self._order_file_path, self._barcodes_file_path)
+            if snapshot is not None:
+                self._storage = snapshot
+                return
+
+        inputs = self._cache.fingerprint_inputs(
+            self._order_file_path, self._barcodes_file_path
+        )
+        await self._load_files()
+        await self._cache.save(
+            self._order_file_path, self._barcodes_file_path, inputs, self._storage
         )
 
-        # Store orders in storage asynchronously
-        for order_id, customer_id in orders:
-            await self._storage.store_order(int(order_id), int(customer_id))
+    async def _load_files(self) -> None:
+        """
+        Load the input files into storage.
 
-        # Store barcodes in storage asynchronously
-        for barcode, order_id in barcodes:
-            await self._storage.store_barcode(barcode, order_id)
+        Both files are streamed batch by batch, so only one batch of rows (per
+        pipeline stage) is held in memory at a time. Orders are stored first
+        because barcodes are resolved against them; with a pipeline depth, the
+        barcodes file is already read and parsed meanwhile, up to the depth.
+        """
+        if self._workers > 1:
+            await load_sharded(
+                self._order_file_path,
+                self._barcodes_file_path,
+                self._storage,
+                self._logger,
+                self._workers,
+                metrics=self._metrics,
+            )
+            return
 
-        self._loaded = True
+        metrics = self._metrics
+        order_batches: AsyncIterator[OrderColumns] = self._reader.iter_orders(
+            self._order_file_path, self._batch_size
+        )
+        barcode_batches: AsyncIterator[BarcodeColumns] = self._reader.iter_barcodes(
+            self._barcodes_file_path, self._batch_size
+        )
+        prefetchers: list[Prefetcher[Any]] = []
+        if self._pipeline_depth:
+            # Both files start streaming now, each bounded by the depth
+            order_batches = Prefetcher(order_batches, self._pipeline_depth)
+            barcode_batches = Prefetcher(barcode_batches, self._pipeline_depth)
+            prefetchers = [order_batches, barcode_batches]
+
+        try:
+            # Store orders in storage asynchronously, one batch per lock acquisition
+            async for order_ids, customer_ids in order_batches:
+                with metrics.stage("store"):
+                    await self._storage.store_orders_bulk(
+                        zip(order_ids, customer_ids, strict=True)
+                    )
+                metrics.count("orders_stored", len(order_ids))
+
+            # Store barcodes in storage asynchronously, one batch per lock
+            # acquisition
+            async for barcodes, barcode_order_ids in barcode_batches:
+                with metrics.stage("store"):
+                    await self._storage.store_barcode_columns(
+                        barcodes, barcode_order_ids
+                    )
+                metrics.count("barcodes_stored", len(barcodes))
+        finally:
+            for prefetcher in prefetchers:
+                await prefetcher.aclose()
 
     async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
         """
@@ -69,7 +178,106 @@ class Repository:
         :return: Dictionary mapping order-customer pairs to lists of barcodes.
         """
         await self._load_data()
-        return await self._storage.get_vouchers()
+        if not self._previous_sizes:
+            return await self._storage.get_vouchers()
+        return {key: barcodes async for key, barcodes in self.iter_vouchers()}
+
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs from storage.
+        In delta mode, only vouchers that gained barcodes are yielded, with
+        just the new barcodes.
+        """
+        await self._load_data()
+        previous_sizes = self._previous_sizes
+        async for key, barcodes in self._storage.iter_vouchers():
+            if previous_size := previous_sizes.get(key, 0):
+                barcodes = barcodes[previous_size:]
+                if not barcodes:
+                    continue
+            yield key, barcodes
+
+    @property
+    def duplicate_count(self) -> int:
+        """
+        Number of duplicate barcodes dropped by the storage so far.
+        """
+        return self._storage.duplicate_count
+
+    async def save_state(self) -> None:
+        """
+        Record the delta state once the output of this run has been written,
+        so the next run resumes after the lines loaded by this one. Does
+        nothing outside delta mode.
+        """
+        if self._delta is not None and self._loaded:
+            await self._delta.save(self._storage)
+
+    async def get_order_voucher(self, order_id: int) -> tuple[int, list[str]] | None:
+        """
+        Retrieve the voucher of one order.
+
+        :return: The order's (customer_id, barcodes), or None without a voucher.
+        """
+        await self._load_data()
+        return await self._storage.get_order_voucher(order_id)
+
+    async def get_customer_vouchers(self, customer_id: int) -> dict[int, list[str]]:
+        """
+        Retrieve the vouchers of one customer as a mapping of order_id to
+        barcodes, without scanning the vouchers of other customers. In delta
+        mode, only the barcodes added by this run are returned.
+        """
+        await self._load_data()
+        vouchers = await self._storage.get_customer_vouchers(customer_id)
+        if not self._previous_sizes:
+            return vouchers
+        return {
+            order_id: new_barcodes
+            for order_id, barcodes in vouchers.items()
+            if (
+                new_barcodes := barcodes[
+                    self._previous_sizes.get((order_id, customer_id), 0) :
+                ]
+            )
+        }
+
+    async def get_customer_barcode_count(self, customer_id: int) -> int:
+        """
+        Count the barcodes of one customer's vouchers. In delta mode, only the
+        barcodes added by this run are counted.
+        """
+        await self._load_data()
+        if self._previous_sizes:
+            vouchers = await self.get_customer_vouchers(customer_id)
+            return sum(map(len, vouchers.values()))
+        return await self._storage.get_customer_barcode_count(customer_id)
+
+    async def allocate_barcodes(self, order_id: int, count: int) -> list[str]:
+        """
+        Reserve `count` unused barcodes for an order, moving them to its voucher.
+
+        :return: The reserved barcodes.
+        :raises ValueError: If the order is unknown or not enough unused
+            barcodes are left.
+        """
+        return (await self.allocate_barcodes_bulk([(order_id, count)]))[0]
+
+    async def allocate_barcodes_bulk(
+        self, requests: Sequence[tuple[int, int]]
+    ) -> list[list[str]]:
+        """
+        Reserve unused barcodes for a batch of (order_id, count) requests, all or
+        nothing. Data served from a read-only snapshot is first restored into
+        the configured storage.
+
+        :return: The reserved barcodes of every request, in request order.
+        """
+        await self._load_data()
+        if isinstance(self._storage, SnapshotStorage):
+            await self._storage.restore_into(self._writable_storage)
+            self._storage = self._writable_storage
+        return await self._storage.allocate_barcodes_bulk(requests)
 
     async def get_unused_barcodes(self) -> set[str]:
         """
@@ -80,10 +288,22 @@ class Repository:
         await self._load_data()
         return await self._storage.get_unused_barcodes()
 
-    async def get_top_customers(self) -> list[tuple[int, int]]:
+    async def get_unused_barcode_count(self) -> int:
+        """
+        Count the unused barcodes without collecting them.
+
+        :return: Number of unused barcodes.
         """
-        Retrieve the top 5 customers based on the number of orders placed.
+        await self._load_data()
+        return await self._storage.get_unused_barcode_count()
+
+    async def get_top_customers(
+        self, n: int = DEFAULT_TOP_CUSTOMERS
+    ) -> list[tuple[int, int]]:
+        """
+        Retrieve the top `n` customers based on the number of orders placed.
+
+        :return: List of (customer_id, order count) pairs, most orders first.
         """
         await self._load_data()
-        customer_order_count = Counter(self._storage.orders_to_customers.values())
-        return customer_order_count.most_common(5)
+        return await self._storage.get_top_customers(n)
@@ -1,6 +1,42 @@
+from collections.abc import AsyncIterable
 from pathlib import Path
+from typing import Any, NamedTuple
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    NonNegativeInt,
+    PositiveInt,
+    field_validator,
+    model_validator,
+)
+
+from vouchers_cli.options import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_DATABASE_PATH,
+    DEFAULT_HOST,
+    DEFAULT_MEMORY_LIMIT,
+    DEFAULT_PORT,
+    DEFAULT_TOP_CUSTOMERS,
+    CSVReader,
+    OutputFormat,
+    StorageBackend,
+    check_input_file,
+    check_option_combinations,
+)
+
+
+class Voucher(NamedTuple):
+    """
+    Lightweight, unvalidated voucher record consumed by the writers.
+    Used on the output fast path instead of constructing a `VoucherSchema`
+    per voucher.
+    """
 
-from pydantic import BaseModel, field_validator
+    customer_id: int
+    order_id: int
+    barcodes: list[str]
 
 
 class VoucherSchema(BaseModel):
@@ -13,6 +49,8 @@ class VoucherSchema(BaseModel):
         barcodes (list[str]): List of barcodes associated with the voucher.
     """
 
+    model_config = ConfigDict(defer_build=True)
+
     customer_id: int
     order_id: int
     barcodes: list[str]
@@ -21,18 +59,21 @@ class VoucherSchema(BaseModel):
 class OutputSchema(BaseModel):
     """
     Schema for the output data, which includes top customers,
-    unused barcodes, and vouchers.
+    the unused barcode count, and vouchers.
 
     Attributes:
         top_customers (list[tuple[int, int]]): List of tuples with customer IDs
             and their corresponding order counts.
-        unused_barcodes (set[str]): Set of barcodes that were not used.
-        vouchers (list[VoucherSchema]): List of vouchers as defined in `VoucherSchema`.
+        unused_barcode_count (int): Number of barcodes that were not used.
+        vouchers (AsyncIterable[Voucher]): Lazily produced vouchers; writers pull
+            them while writing.
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True, defer_build=True)
+
     top_customers: list[tuple[int, int]]
-    unused_barcodes: set[str]
-    vouchers: list[VoucherSchema]
+    unused_barcode_count: NonNegativeInt
+    vouchers: AsyncIterable[Voucher]
 
 
 class ExtractorConfig(BaseModel):
@@ -41,27 +82,131 @@ class ExtractorConfig(BaseModel):
     barcodes, and the output directory.
 
     Attributes:
-        orders_file_path (Path): The file path to the orders CSV file.
-        barcodes_file_path (Path): The file path to the barcodes CSV file.
+        orders_file_path (Path): The file path to the orders CSV (optionally
+            gzip, zstd or bz2 compressed), Parquet or Arrow IPC file.
+        barcodes_file_path (Path): The file path to the barcodes CSV (optionally
+            gzip, zstd or bz2 compressed), Parquet or Arrow IPC file.
         output_dir (Path): The directory where output will be saved.
+        batch_size (int): Number of CSV rows streamed into storage at a time.
+        storage (StorageBackend): Backend used to hold orders and barcodes.
+        csv_reader (CSVReader): Reader used for CSV input files.
+        top_customers (int): Number of top customers to report.
+        workers (int): Number of processes used to parse the input files.
+        validate_output (bool): Validate every voucher with `VoucherSchema`
+            before writing it.
+        cache_dir (Path | None): Directory holding snapshots of loaded input
+            files; None disables the snapshot cache.
+        rebuild_cache (bool): Rebuild the snapshot even if a valid one exists.
+        delta_state (Path | None): State file of delta mode, which only loads
+            lines appended to the input files since the previous run; None
+            disables delta mode.
+        sqlite_path (Path): Database file of the sqlite storage backend.
+        memory_limit (int): Megabytes of rows the external storage backend
+            buffers before spilling sorted runs to disk.
+        metrics_json (Path | None): File the run metrics are written to as JSON;
+            None disables it.
+        metrics_prometheus (Path | None): File the run metrics are written to in
+            the Prometheus text format; None disables it.
+        pipeline_depth (int): Chunks and batches read ahead of the parser and
+            the storage by reader tasks; 0 disables pipelined loading.
+        output_format (OutputFormat): Format of the vouchers output file.
+        output_partitions (int): Number of text files the vouchers are
+            hash-partitioned into by customer; 1 writes a single file.
     """
 
+    model_config = ConfigDict(defer_build=True)
+
     orders_file_path: Path
     barcodes_file_path: Path
     output_dir: Path
+    batch_size: PositiveInt = DEFAULT_BATCH_SIZE
+    storage: StorageBackend = StorageBackend.MEMORY
+    csv_reader: CSVReader = CSVReader.STREAM
+    top_customers: PositiveInt = DEFAULT_TOP_CUSTOMERS
+    workers: PositiveInt = 1
+    validate_output: bool = False
+    cache_dir: Path | None = None
+    rebuild_cache: bool = False
+    delta_state: Path | None = None
+    sqlite_path: Path = DEFAULT_DATABASE_PATH
+    memory_limit: PositiveInt = DEFAULT_MEMORY_LIMIT >> 20
+    metrics_json: Path | None = None
+    metrics_prometheus: Path | None = None
+    pipeline_depth: NonNegativeInt = 0
+    output_format: OutputFormat = OutputFormat.TEXT
+    output_partitions: PositiveInt = 1
 
     @field_validator("orders_file_path", "barcodes_file_path")
     @classmethod
     def validate_file_exists(cls, file_path: Path) -> Path:
         """
-        Validates that the provided file paths exist and are in CSV format.
+        Validates that the provided file paths exist and are in CSV, Parquet or
+        Arrow IPC format.
+        """
+        return check_input_file(file_path)
+
+    @model_validator(mode="after")
+    def validate_input_formats(self) -> "ExtractorConfig":
+        """
+        Validates that both input files share one format, that sharded
+        parallel loading and delta mode are only requested for CSV input,
+        that compressed input is only read by the stream reader, that the
+        on-disk storages are not combined with delta mode and that partitioned
+        output is only requested for text output.
         """
-        # Check if the file exists
-        if not file_path.exists():
-            raise ValueError(f"File not found: {file_path}")
+        self._check_option_combinations()
+        return self
+
+    def _check_option_combinations(self) -> None:
+        """
+        Run `check_option_combinations` on the options of this configuration.
+        """
+        check_option_combinations(
+            self.orders_file_path,
+            self.barcodes_file_path,
+            self.storage,
+            self.csv_reader,
+            self.workers,
+            self.delta_state,
+            self.output_format,
+            self.output_partitions,
+        )
+
+    @classmethod
+    def from_options(cls, **values: Any) -> "ExtractorConfig":
+        """
+        Light path for already-typed values, such as parsed CLI arguments: runs
+        the same checks as the validators as plain functions and constructs the
+        model without building its pydantic validator, which is only built on
+        the first regular instantiation.
+
+        :raises ValueError: If a value is out of range, an input file is
+            invalid or the options cannot be combined.
+        """
+        for name, value in values.items():
+            for constraint in cls.model_fields[name].metadata:
+                # PositiveInt and NonNegativeInt carry a Gt(gt=0) or Ge(ge=0) bound
+                if hasattr(constraint, "gt") and value <= constraint.gt:
+                    raise ValueError(f"{name} must be greater than {constraint.gt}")
+                if hasattr(constraint, "ge") and value < constraint.ge:
+                    raise ValueError(f"{name} must be at least {constraint.ge}")
+        configs = cls.model_construct(**values)
+        check_input_file(configs.orders_file_path)
+        check_input_file(configs.barcodes_file_path)
+        configs._check_option_combinations()
+        return configs
+
+
+class ServerConfig(BaseModel):
+    """
+    Configuration for the voucher query server.
+
+    Attributes:
+        host (str): Interface the server listens on.
+        port (int): TCP port the server listens on; 0 picks a free port.
+    """
 
-        # Ensure the file has a .csv extension
-        if file_path.suffix.lower() != ".csv":
-            raise ValueError(f"Invalid file format: {file_path}. Expected a CSV file.")
+    model_config = ConfigDict(defer_build=True)
 
-        return file_path
+    host: str = DEFAULT_HOST
+    port: int = Field(default=DEFAULT_PORT, ge=0, le=65535)
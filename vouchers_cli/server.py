@@ -0,0 +1,304 @@
+import asyncio
+import json
+import re
+from logging import Logger
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from vouchers_cli.extractor import create_repository
+from vouchers_cli.options import DEFAULT_TOP_CUSTOMERS
+from vouchers_cli.repository import Repository
+from vouchers_cli.schemas import ExtractorConfig, ServerConfig
+
+DEFAULT_PAGE_SIZE = 100  # Unused barcodes returned per page
+MAX_PAGE_SIZE = 10_000  # Largest page (or number of top customers) served
+MAX_HEADER_LINES = 100  # Header lines accepted per request
+MAX_BODY_SIZE = 64 * 1024  # Largest request body read (and ignored)
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    """
+    Error answered to the client with the given status code.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _int_param(
+    query: dict[str, list[str]], name: str, default: int, minimum: int, maximum: int
+) -> int:
+    """
+    Read an integer query parameter within [minimum, maximum].
+    """
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer") from None
+    if not minimum <= value <= maximum:
+        raise HTTPError(400, f"'{name}' must be between {minimum} and {maximum}")
+    return value
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[bytes, list[bytes]]:
+    """
+    Read the request line and header lines of the next request.
+
+    :return: The request line, empty at the end of the connection, and the
+        header lines.
+    :raises HTTPError: With status 431 if a line is longer than the stream
+        limit or there are too many header lines.
+    """
+    header_lines: list[bytes] = []
+    try:
+        request_line = await reader.readline()
+        if request_line:
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                if len(header_lines) == MAX_HEADER_LINES:
+                    raise HTTPError(431, "Too many header lines")
+                header_lines.append(line)
+    except ValueError:
+        # readline turns the stream's LimitOverrunError into a ValueError
+        raise HTTPError(431, "Request line or header line too long") from None
+    return request_line, header_lines
+
+
+def _parse_request(
+    request_line: bytes, header_lines: list[bytes]
+) -> tuple[str, str, str, dict[str, str], int]:
+    """
+    Parse the request line and header lines of a request.
+
+    :return: The request's (method, target, version, headers, content_length).
+    :raises HTTPError: With status 400 if the request line, a header line or
+        the Content-Length header is malformed, or 413 if the body is larger
+        than `MAX_BODY_SIZE`.
+    """
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line") from None
+
+    headers: dict[str, str] = {}
+    for line in header_lines:
+        name, colon, value = line.decode("latin-1").partition(":")
+        if not colon or not name.strip():
+            raise HTTPError(400, "Malformed header line")
+        headers[name.strip().lower()] = value.strip()
+
+    content_length = headers.get("content-length", "0")
+    # int() would also accept signs, spaces and underscores
+    if not content_length.isascii() or not content_length.isdigit():
+        raise HTTPError(400, "Malformed Content-Length header")
+    if int(content_length) > MAX_BODY_SIZE:
+        raise HTTPError(413, f"Request bodies are limited to {MAX_BODY_SIZE} bytes")
+
+    return method, target, version, headers, int(content_length)
+
+
+class VoucherServer:
+    """
+    Long-running HTTP/1.1 JSON API over the loaded vouchers.
+
+    The input files are loaded once, through the repository, when the server
+    starts, and every query is answered from the loaded storage. Endpoints (GET only):
+
+    - `/health`: readiness check.
+    - `/orders/{order_id}/vouchers`: the voucher of an order.
+    - `/customers/{customer_id}/vouchers`: the vouchers of a customer.
+    - `/customers/top?n=5`: the customers with the most orders.
+    - `/barcodes/unused?offset=0&limit=100`: the number of unused barcodes and
+      a page of them, in sorted order.
+    """
+
+    def __init__(self, repository: Repository, logger: Logger):
+        """
+        :param repository: Repository the vouchers are loaded from.
+        :param logger: Logger instance for logging messages.
+        """
+        self._repository = repository
+        self._logger = logger
+
+        self._unused_barcodes: list[str] = []
+
+        self._routes: list[tuple[re.Pattern[str], Callable[..., Awaitable[Any]]]] = [
+            (re.compile(r"/health"), self._health),
+            (re.compile(r"/orders/(\d+)/vouchers"), self._order_vouchers),
+            (re.compile(r"/customers/top"), self._top_customers),
+            (re.compile(r"/customers/(\d+)/vouchers"), self._customer_vouchers),
+            (re.compile(r"/barcodes/unused"), self._unused),
+        ]
+
+    @classmethod
+    def create(cls, configs: ExtractorConfig, logger: Logger) -> "VoucherServer":
+        """
+        Factory method to create a server over the configured input files.
+        """
+        if configs.delta_state is not None:
+            raise ValueError("Server mode cannot be combined with --delta-state.")
+        return cls(create_repository(configs, logger), logger)
+
+    async def load(self) -> None:
+        """
+        Load the input files and sort the unused barcodes for paging.
+        """
+        self._unused_barcodes = sorted(await self._repository.get_unused_barcodes())
+        self._logger.info(f"Loaded {len(self._unused_barcodes)} unused barcodes")
+
+    async def _health(self, query: dict[str, list[str]]) -> dict[str, Any]:
+        return {"status": "ok"}
+
+    async def _order_vouchers(
+        self, query: dict[str, list[str]], order_id: str
+    ) -> dict[str, Any]:
+        voucher = await self._repository.get_order_voucher(int(order_id))
+        if voucher is None:
+            raise HTTPError(404, f"No vouchers for order {order_id}")
+        customer_id, barcodes = voucher
+        return {
+            "order_id": int(order_id),
+            "customer_id": customer_id,
+            "barcodes": barcodes,
+        }
+
+    async def _customer_vouchers(
+        self, query: dict[str, list[str]], customer_id: str
+    ) -> dict[str, Any]:
+        vouchers = await self._repository.get_customer_vouchers(int(customer_id))
+        return {
+            "customer_id": int(customer_id),
+            "barcode_count": sum(map(len, vouchers.values())),
+            "vouchers": [
+                {
+                    "order_id": order_id,
+                    "customer_id": int(customer_id),
+                    "barcodes": codes,
+                }
+                for order_id, codes in vouchers.items()
+            ],
+        }
+
+    async def _top_customers(self, query: dict[str, list[str]]) -> dict[str, Any]:
+        n = _int_param(query, "n", DEFAULT_TOP_CUSTOMERS, 1, MAX_PAGE_SIZE)
+        top_customers = await self._repository.get_top_customers(n)
+        return {
+            "top_customers": [
+                {"customer_id": customer_id, "orders": count}
+                for customer_id, count in top_customers
+            ]
+        }
+
+    async def _unused(self, query: dict[str, list[str]]) -> dict[str, Any]:
+        count = len(self._unused_barcodes)
+        offset = _int_param(query, "offset", 0, 0, count)
+        limit = _int_param(query, "limit", DEFAULT_PAGE_SIZE, 0, MAX_PAGE_SIZE)
+        return {
+            "count": count,
+            "offset": offset,
+            "limit": limit,
+            "barcodes": self._unused_barcodes[offset : offset + limit],
+        }
+
+    async def _dispatch(self, method: str, target: str) -> tuple[int, Any]:
+        """
+        Answer a request with a status code and a JSON-serializable body.
+        """
+        url = urlsplit(target)
+        for pattern, handler in self._routes:
+            if not (match := pattern.fullmatch(url.path)):
+                continue
+            if method != "GET":
+                return 405, {"error": f"Method {method} not allowed"}
+            try:
+                return 200, await handler(parse_qs(url.query), *match.groups())
+            except HTTPError as e:
+                return e.status, {"error": e.message}
+            except Exception:
+                self._logger.exception(f"Failed to answer {method} {target}")
+                return 500, {"error": "Internal server error"}
+
+        return 404, {"error": f"Unknown path {url.path}"}
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Serve the requests of one connection, keeping it open between requests
+        unless the client asks otherwise.
+        """
+        try:
+            while True:
+                try:
+                    request_line, header_lines = await _read_head(reader)
+                    if not request_line:
+                        break
+                    method, target, version, headers, content_length = _parse_request(
+                        request_line, header_lines
+                    )
+                except HTTPError as e:
+                    # The end of a malformed request is unknown: close after it
+                    status, body = e.status, {"error": e.message}
+                    version, headers = "HTTP/1.1", {"connection": "close"}
+                else:
+                    # Request bodies are not used, but must not be read as requests
+                    await reader.readexactly(content_length)
+                    status, body = await self._dispatch(method, target)
+
+                keep_alive = headers.get("connection", "").lower() != "close" and (
+                    version != "HTTP/1.0"
+                    or headers.get("connection", "").lower() == "keep-alive"
+                )
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n".encode()
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # Client went away mid-request
+        finally:
+            writer.close()
+
+    async def start(self, configs: ServerConfig) -> asyncio.Server:
+        """
+        Load the data, then start accepting connections.
+
+        :return: The listening server; its sockets give the bound address.
+        """
+        await self.load()
+        server = await asyncio.start_server(
+            self._handle_connection, configs.host, configs.port
+        )
+        for sock in server.sockets:
+            host, port = sock.getsockname()[:2]
+            self._logger.info(f"Serving vouchers on http://{host}:{port}")
+        return server
+
+    async def serve(self, configs: ServerConfig) -> None:
+        """
+        Load the data and answer queries until cancelled.
+        """
+        server = await self.start(configs)
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,506 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from itertools import accumulate, pairwise
+from logging import Logger
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, NamedTuple, Sequence
+
+from vouchers_cli.storage import OrderStorage, first_positions
+
+SNAPSHOT_VERSION = 4
+
+# Every snapshot ends with <footer length: uint64><magic>
+_MAGIC = b"VCHRSNP1"
+_TRAILER = struct.Struct("<Q8s")
+
+# A file modified this close to its fingerprint may change again without its
+# size or mtime changing, so its content hash is checked as well
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class FileFingerprint(NamedTuple):
+    """
+    Identity of an input file: cheap size/mtime check plus a content hash.
+    """
+
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+def file_digest(file_path: Path) -> str:
+    """
+    Return the BLAKE2b content hash of a file as a hex string.
+    """
+    with open(file_path, "rb") as file:
+        return hashlib.file_digest(file, "blake2b").hexdigest()
+
+
+def fingerprint(file_path: Path) -> FileFingerprint:
+    """
+    Take the fingerprint of a file, hashing its whole content.
+    """
+    stat = os.stat(file_path)
+    return FileFingerprint(stat.st_size, stat.st_mtime_ns, file_digest(file_path))
+
+
+class InputFingerprints(NamedTuple):
+    """
+    Fingerprints of both input files, taken before they are loaded.
+    """
+
+    orders: FileFingerprint
+    barcodes: FileFingerprint
+    taken_ns: int  # Wall clock time the fingerprints were taken at
+
+
+def read_snapshot(file_path: Path) -> tuple[mmap.mmap, dict[str, Any]]:
+    """
+    Memory-map a snapshot file and parse its footer.
+
+    :return: The mapping and the footer, which holds the section table and
+        the metadata the snapshot was written with.
+    :raises FileNotFoundError: If the file does not exist.
+    :raises ValueError: If the file is not a snapshot of the current version.
+    """
+    with open(file_path, "rb") as file:
+        if not file.seek(0, 2):
+            raise ValueError("empty file")
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        footer_length, magic = _TRAILER.unpack_from(buffer, len(buffer) - _TRAILER.size)
+        if magic != _MAGIC:
+            raise ValueError("bad magic")
+        footer_start = len(buffer) - _TRAILER.size - footer_length
+        footer = json.loads(buffer[footer_start : footer_start + footer_length])
+        if footer["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"version {footer['version']}")
+    except (struct.error, ValueError, KeyError) as e:
+        buffer.close()
+        raise ValueError(str(e)) from e
+
+    return buffer, footer
+
+
+async def write_snapshot(
+    file_path: Path, storage: OrderStorage, metadata: dict[str, Any]
+) -> None:
+    """
+    Write a snapshot of a fully loaded storage, with JSON `metadata` stored in
+    its footer.
+
+    The snapshot is written to a temporary file and moved into place, so a
+    reader never sees a partial snapshot.
+    """
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.tmp")
+    sections: dict[str, list[int]] = {}
+
+    def write_section(file: BinaryIO, name: str, data: bytes | array[int]) -> None:
+        # Keep integer sections 8-byte aligned inside the mapping
+        file.write(b"\0" * (-file.tell() % 8))
+        sections[name] = [file.tell(), memoryview(data).nbytes]
+        file.write(data)
+
+    try:
+        with open(temp_path, "wb") as file:
+            voucher_orders, voucher_customers = array("q"), array("q")
+            voucher_offsets, used_offsets = array("q", [0]), array("q", [0])
+
+            # Stream the used barcodes straight to disk, voucher by voucher
+            sections["used_blob"] = [file.tell(), 0]
+            async for (order_id, customer_id), barcodes in storage.iter_vouchers():
+                voucher_orders.append(order_id)
+                voucher_customers.append(customer_id)
+                encoded = [barcode.encode() for barcode in barcodes]
+                file.write(b"".join(encoded))
+                end = used_offsets[-1]
+                used_offsets.extend(
+                    end + size for size in accumulate(map(len, encoded))
+                )
+                voucher_offsets.append(len(used_offsets) - 1)
+            sections["used_blob"][1] = used_offsets[-1]
+
+            unused_offsets = array("q", [0])
+            unused_blob = bytearray()
+            for barcode in await storage.get_unused_barcodes():
+                unused_blob += barcode.encode()
+                unused_offsets.append(len(unused_blob))
+            write_section(file, "unused_blob", bytes(unused_blob))
+
+            # Duplicates dropped while loading, so warm runs report them too
+            duplicate_offsets = array("q", [0])
+            duplicate_blob = bytearray()
+            for barcode in storage.duplicate_barcodes:
+                duplicate_blob += barcode.encode()
+                duplicate_offsets.append(len(duplicate_blob))
+            write_section(file, "duplicate_blob", bytes(duplicate_blob))
+            write_section(file, "duplicate_offsets", duplicate_offsets)
+
+            ranking = await storage.get_top_customers(
+                len(storage.customer_orders.counts)
+            )
+            write_section(file, "ranked_customers", array("q", [c for c, _ in ranking]))
+            write_section(file, "ranked_counts", array("q", [n for _, n in ranking]))
+            write_section(file, "voucher_orders", voucher_orders)
+            write_section(file, "voucher_customers", voucher_customers)
+            write_section(file, "voucher_offsets", voucher_offsets)
+            write_section(file, "used_offsets", used_offsets)
+            write_section(file, "unused_offsets", unused_offsets)
+
+            # Orders in storage order, so the storage and its ranks can be restored
+            orders_to_customers = storage.orders_to_customers
+            write_section(file, "order_ids", array("q", orders_to_customers.keys()))
+            write_section(
+                file, "order_customers", array("q", orders_to_customers.values())
+            )
+
+            footer = json.dumps(
+                {"version": SNAPSHOT_VERSION, "sections": sections, **metadata}
+            ).encode()
+            file.write(footer)
+            file.write(_TRAILER.pack(len(footer), _MAGIC))
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+class SnapshotStorage(OrderStorage):
+    """
+    Read-only storage backed by a memory-mapped snapshot.
+
+    Nothing is decoded up front: top customers, vouchers and unused barcodes are
+    read from the mapped integer columns and UTF-8 blobs when they are asked
+    for, so opening a snapshot costs the same whatever the input size.
+    """
+
+    def __init__(self, logger: Logger, buffer: mmap.mmap, sections: dict[str, Any]):
+        """
+        :param logger: Logger instance for logging messages.
+        :param buffer: Memory-mapped snapshot file.
+        :param sections: Section name -> [offset, length] in bytes.
+        """
+        super().__init__(logger)
+        self._buffer = buffer
+        view = memoryview(buffer)
+
+        def section(name: str) -> memoryview:
+            offset, length = sections[name]
+            return view[offset : offset + length]
+
+        self._ranked_customers = section("ranked_customers").cast("q")
+        self._ranked_counts = section("ranked_counts").cast("q")
+        self._voucher_orders = section("voucher_orders").cast("q")
+        self._voucher_customers = section("voucher_customers").cast("q")
+        self._voucher_offsets = section("voucher_offsets").cast("q")
+        self._used_offsets = section("used_offsets").cast("q")
+        self._used_blob = section("used_blob")
+        self._unused_offsets = section("unused_offsets").cast("q")
+        self._unused_blob = section("unused_blob")
+        self._order_ids = section("order_ids").cast("q")
+        self._order_customers = section("order_customers").cast("q")
+        self._duplicate_offsets = section("duplicate_offsets").cast("q")
+        self._duplicate_blob = section("duplicate_blob")
+        self._customer_rows: dict[int, list[int]] | None = None
+        self._order_rows: dict[int, int] | None = None
+
+    @staticmethod
+    def _decode(
+        blob: memoryview, offsets: memoryview, start: int, end: int
+    ) -> list[str]:
+        """
+        Decode the strings `start` to `end` of a blob.
+        """
+        return [
+            str(blob[offsets[index] : offsets[index + 1]], "utf-8")
+            for index in range(start, end)
+        ]
+
+    @staticmethod
+    def _decode_all(blob: memoryview, offsets: memoryview) -> list[str]:
+        """
+        Decode every string of a blob. ASCII blobs, where byte offsets are also
+        character offsets, are decoded with a single decode.
+        """
+        text = str(blob, "utf-8")
+        if len(text) != len(blob):
+            return SnapshotStorage._decode(blob, offsets, 0, len(offsets) - 1)
+        return [text[start:end] for start, end in pairwise(offsets.tolist())]
+
+    def replay_duplicates(self) -> None:
+        """
+        Log and record the duplicate barcodes dropped when the snapshot was
+        built, as the load that built it did.
+        """
+        for barcode in self._decode_all(self._duplicate_blob, self._duplicate_offsets):
+            self._log_duplicate(barcode)
+
+    async def restore_into(self, storage: OrderStorage) -> dict[tuple[int, int], int]:
+        """
+        Restore the snapshot into an empty, writable storage in bulk: orders and
+        customer counts are copied and the ranks rebuilt from the orders, then all
+        barcodes are merged at once.
+
+        :return: Number of barcodes of every restored voucher.
+        """
+        storage.orders_to_customers.update(
+            zip(self._order_ids.tolist(), self._order_customers.tolist(), strict=True)
+        )
+        storage.customer_orders.restore(
+            first_positions(self._order_customers).items(),
+            zip(self._ranked_customers, self._ranked_counts, strict=True),
+        )
+
+        used_barcodes = self._decode_all(self._used_blob, self._used_offsets)
+        vouchers = {
+            (order_id, customer_id): used_barcodes[start:end]
+            for order_id, customer_id, (start, end) in zip(
+                self._voucher_orders.tolist(),
+                self._voucher_customers.tolist(),
+                pairwise(self._voucher_offsets.tolist()),
+                strict=True,
+            )
+        }
+        await storage.merge_barcodes(
+            vouchers,
+            set(used_barcodes),
+            await self.get_unused_barcodes(),
+            self.duplicate_barcodes,
+        )
+        return {key: len(barcodes) for key, barcodes in vouchers.items()}
+
+    async def allocate_barcodes_bulk(
+        self, requests: Sequence[tuple[int, int]]
+    ) -> list[list[str]]:
+        """
+        Refuse allocations: the snapshot is read-only and must be restored into
+        a writable storage first.
+        """
+        raise ValueError("Snapshot storage is read-only; restore it to allocate.")
+
+    async def get_top_customers(self, n: int) -> list[tuple[int, int]]:
+        """
+        Retrieve the `n` customers with the most orders as (customer_id, count)
+        pairs from the stored ranking.
+        """
+        return list(
+            zip(
+                self._ranked_customers[:n].tolist(),
+                self._ranked_counts[:n].tolist(),
+                strict=True,
+            )
+        )
+
+    async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
+        """
+        Decode a mapping of (order_id, customer_id) to barcodes.
+        """
+        return {key: barcodes async for key, barcodes in self.iter_vouchers()}
+
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs, decoding one
+        voucher at a time.
+        """
+        offsets = self._voucher_offsets
+        for index, (order_id, customer_id) in enumerate(
+            zip(self._voucher_orders, self._voucher_customers, strict=True)
+        ):
+            yield (
+                (order_id, customer_id),
+                self._decode(
+                    self._used_blob,
+                    self._used_offsets,
+                    offsets[index],
+                    offsets[index + 1],
+                ),
+            )
+
+    def _rows_of(self, customer_id: int) -> list[int]:
+        """
+        Return the voucher rows of a customer, from an index of the voucher
+        customer column built on first use.
+        """
+        if self._customer_rows is None:
+            self._customer_rows = {}
+            for row, row_customer in enumerate(self._voucher_customers.tolist()):
+                self._customer_rows.setdefault(row_customer, []).append(row)
+        return self._customer_rows.get(customer_id, [])
+
+    async def get_order_voucher(self, order_id: int) -> tuple[int, list[str]] | None:
+        """
+        Decode the voucher of one order, found through an index of the voucher
+        order column built on first use.
+        """
+        if self._order_rows is None:
+            self._order_rows = {
+                order: row for row, order in enumerate(self._voucher_orders.tolist())
+            }
+        row = self._order_rows.get(order_id)
+        if row is None:
+            return None
+        offsets = self._voucher_offsets
+        return self._voucher_customers[row], self._decode(
+            self._used_blob, self._used_offsets, offsets[row], offsets[row + 1]
+        )
+
+    async def get_customer_vouchers(self, customer_id: int) -> dict[int, list[str]]:
+        """
+        Decode the vouchers of one customer as a mapping of order_id to barcodes.
+        """
+        offsets = self._voucher_offsets
+        return {
+            self._voucher_orders[row]: self._decode(
+                self._used_blob, self._used_offsets, offsets[row], offsets[row + 1]
+            )
+            for row in self._rows_of(customer_id)
+        }
+
+    async def get_customer_barcode_count(self, customer_id: int) -> int:
+        """
+        Count the barcodes of one customer's vouchers without decoding them.
+        """
+        offsets = self._voucher_offsets
+        return sum(
+            offsets[row + 1] - offsets[row] for row in self._rows_of(customer_id)
+        )
+
+    async def get_unused_barcodes(self) -> set[str]:
+        """
+        Decode the unused barcodes.
+        """
+        return set(
+            self._decode(
+                self._unused_blob,
+                self._unused_offsets,
+                0,
+                len(self._unused_offsets) - 1,
+            )
+        )
+
+    async def get_unused_barcode_count(self) -> int:
+        """
+        Count the unused barcodes without decoding them.
+        """
+        return len(self._unused_offsets) - 1
+
+
+class SnapshotCache:
+    """
+    Directory of binary snapshots of fully loaded storages, one per pair of
+    input files, so unchanged inputs are not parsed again.
+
+    A snapshot is reused when both input files still have the size and mtime
+    recorded in it. When only the mtime differs (e.g. the file was copied or
+    touched), or the file was modified around the time it was fingerprinted,
+    the content hash decides.
+    """
+
+    def __init__(self, cache_dir: Path, logger: Logger):
+        """
+        :param cache_dir: Directory holding the snapshots; created on first save.
+        :param logger: Logger instance for logging messages.
+        """
+        self._cache_dir = cache_dir
+        self._logger = logger
+
+    def snapshot_path(self, order_file_path: Path, barcodes_file_path: Path) -> Path:
+        """
+        Return the snapshot file used for a pair of input files.
+        """
+        key = hashlib.sha256(
+            f"{order_file_path.resolve()}\0{barcodes_file_path.resolve()}".encode()
+        ).hexdigest()[:32]
+        return self._cache_dir / f"{key}.snapshot"
+
+    @staticmethod
+    def _matches(file_path: Path, recorded: dict[str, Any], taken_ns: int) -> bool:
+        """
+        Check whether a file is unchanged since its fingerprint was recorded.
+        """
+        stat = os.stat(file_path)
+        if stat.st_size != recorded["size"]:
+            return False
+        racy = stat.st_mtime_ns + _RACY_WINDOW_NS >= taken_ns
+        if stat.st_mtime_ns == recorded["mtime_ns"] and not racy:
+            return True
+        return file_digest(file_path) == str(recorded["digest"])
+
+    def load(
+        self, order_file_path: Path, barcodes_file_path: Path
+    ) -> SnapshotStorage | None:
+        """
+        Open the snapshot of the input files if it is still valid.
+
+        :return: Storage mapped from the snapshot, or None on a cache miss.
+        """
+        path = self.snapshot_path(order_file_path, barcodes_file_path)
+        try:
+            buffer, footer = read_snapshot(path)
+        except FileNotFoundError:
+            self._logger.debug(f"No snapshot at {path}")
+            return None
+        except ValueError as e:
+            self._logger.debug(f"Ignoring unreadable snapshot {path}: {e}")
+            return None
+
+        files = footer["files"]
+        if not (
+            self._matches(order_file_path, files["orders"], footer["taken_ns"])
+            and self._matches(barcodes_file_path, files["barcodes"], footer["taken_ns"])
+        ):
+            self._logger.debug(f"Snapshot {path} is stale")
+            buffer.close()
+            return None
+
+        self._logger.debug(f"Loaded snapshot {path}")
+        storage = SnapshotStorage(self._logger, buffer, footer["sections"])
+        storage.replay_duplicates()
+        return storage
+
+    @staticmethod
+    def fingerprint_inputs(
+        order_file_path: Path, barcodes_file_path: Path
+    ) -> InputFingerprints:
+        """
+        Fingerprint both input files. Must be called before they are loaded, so
+        a file changing while it is loaded invalidates the snapshot.
+        """
+        taken_ns = time.time_ns()
+        return InputFingerprints(
+            fingerprint(order_file_path), fingerprint(barcodes_file_path), taken_ns
+        )
+
+    async def save(
+        self,
+        order_file_path: Path,
+        barcodes_file_path: Path,
+        inputs: InputFingerprints,
+        storage: OrderStorage,
+    ) -> None:
+        """
+        Write a snapshot of a fully loaded storage for the given input files.
+
+        :param inputs: Fingerprints of the input files taken before loading.
+        """
+        path = self.snapshot_path(order_file_path, barcodes_file_path)
+        await write_snapshot(
+            path,
+            storage,
+            {
+                "taken_ns": inputs.taken_ns,
+                "files": {
+                    "orders": inputs.orders._asdict(),
+                    "barcodes": inputs.barcodes._asdict(),
+                },
+            },
+        )
+        self._logger.debug(f"Saved snapshot {path}")
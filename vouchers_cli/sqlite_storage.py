@@ -0,0 +1,333 @@
+import sqlite3
+import weakref
+from itertools import groupby
+from logging import Logger
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Sequence
+
+from vouchers_cli.options import DEFAULT_DATABASE_PATH
+from vouchers_cli.storage import OrderStorage
+
+_SCHEMA = """
+-- Orders keep the position of their first store, to break ties between top customers
+CREATE TABLE orders (
+    order_id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    position INTEGER NOT NULL
+);
+-- Vouchers in first-appearance order; barcodes reference them by key
+CREATE TABLE vouchers (
+    voucher_id INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL,
+    customer_id INTEGER NOT NULL,
+    UNIQUE (order_id, customer_id)
+);
+-- Barcodes in storage order; a NULL order marks an unused barcode
+CREATE TABLE barcodes (
+    seq INTEGER PRIMARY KEY,
+    barcode TEXT NOT NULL,
+    order_id INTEGER,
+    customer_id INTEGER
+);
+CREATE INDEX idx_orders_customer ON orders (customer_id);
+CREATE INDEX idx_vouchers_customer ON vouchers (customer_id);
+CREATE UNIQUE INDEX idx_barcodes_barcode ON barcodes (barcode);
+CREATE INDEX idx_barcodes_order ON barcodes (order_id, customer_id, seq);
+CREATE INDEX idx_barcodes_unused ON barcodes (seq) WHERE order_id IS NULL;
+
+-- One batch of incoming (barcode, order_id) rows
+CREATE TEMP TABLE staging (
+    seq INTEGER PRIMARY KEY,
+    barcode TEXT NOT NULL,
+    order_id INTEGER
+);
+CREATE INDEX temp.idx_staging_barcode ON staging (barcode);
+"""
+
+_UPSERT_ORDER = """
+INSERT INTO orders (order_id, customer_id, position) VALUES (?, ?, ?)
+ON CONFLICT (order_id) DO UPDATE SET customer_id = excluded.customer_id
+"""
+
+# Rows whose barcode is already stored, or kept from an earlier row of the batch.
+# Rows of unknown orders (or customer 0) are dropped and never stored.
+_DUPLICATES = """
+SELECT row.barcode FROM staging AS row
+WHERE EXISTS (SELECT 1 FROM barcodes WHERE barcodes.barcode = row.barcode)
+   OR EXISTS (
+       SELECT 1 FROM staging AS earlier
+       LEFT JOIN orders ON orders.order_id = earlier.order_id
+       WHERE earlier.barcode = row.barcode AND earlier.seq < row.seq
+         AND (earlier.order_id IS NULL OR orders.customer_id != 0)
+   )
+ORDER BY row.seq
+"""
+
+_INSERT_BARCODES = """
+INSERT INTO barcodes (barcode, order_id, customer_id)
+SELECT staging.barcode, staging.order_id, orders.customer_id
+FROM staging LEFT JOIN orders ON orders.order_id = staging.order_id
+WHERE staging.order_id IS NULL OR orders.customer_id != 0
+ORDER BY staging.seq
+ON CONFLICT (barcode) DO NOTHING
+"""
+
+_INSERT_VOUCHERS = """
+INSERT OR IGNORE INTO vouchers (order_id, customer_id)
+SELECT order_id, customer_id FROM barcodes
+WHERE seq > ? AND order_id IS NOT NULL
+ORDER BY seq
+"""
+
+_TOP_CUSTOMERS = """
+SELECT customer_id, COUNT(*) AS orders FROM orders
+GROUP BY customer_id
+ORDER BY orders DESC, MIN(position)
+LIMIT ?
+"""
+
+_VOUCHERS = """
+SELECT vouchers.order_id, vouchers.customer_id, barcodes.barcode
+FROM vouchers JOIN barcodes
+  ON barcodes.order_id = vouchers.order_id
+ AND barcodes.customer_id = vouchers.customer_id
+{where}
+ORDER BY vouchers.voucher_id, barcodes.seq
+"""
+
+
+class SqliteOrderStorage(OrderStorage):
+    """
+    OrderStorage variant backed by a local SQLite database file, for inputs
+    that do not fit in memory.
+
+    Rows are inserted with `executemany` into a staging table and moved into
+    the indexed tables with set-based SQL, all in one transaction that is
+    committed on the first read. The database runs in WAL mode. Vouchers,
+    unused barcodes, top customers and per-customer lookups are SQL queries;
+    vouchers are streamed from a cursor. The in-memory containers of
+    `OrderStorage` are left empty. The database file is replaced on every run.
+    """
+
+    def __init__(self, logger: Logger, database_path: Path = DEFAULT_DATABASE_PATH):
+        """
+        :param logger: Logger instance for logging messages.
+        :param database_path: SQLite file holding the data; an existing file
+            (and its WAL) is replaced.
+        """
+        super().__init__(logger)
+
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{database_path}{suffix}").unlink(missing_ok=True)
+
+        self._connection = sqlite3.connect(database_path)
+        # Close the connection with the storage, as there is no explicit close
+        weakref.finalize(self, self._connection.close)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.execute("PRAGMA cache_size = -65536")
+        self._connection.execute("PRAGMA temp_store = MEMORY")
+        self._connection.executescript(_SCHEMA)
+
+        self._last_seq = 0  # Highest barcode seq stored so far
+        self._order_positions = 0  # Order rows stored so far, numbering new orders
+        self._unused = 0  # Number of unused barcodes
+
+    def _commit(self) -> None:
+        """
+        Commit the loading transaction, if one is open, before reading.
+        """
+        if self._connection.in_transaction:
+            self._connection.commit()
+
+    async def store_orders_bulk(self, orders: Iterable[tuple[int, int]]) -> None:
+        """
+        Upsert a batch of (order_id, customer_id) pairs under a single lock
+        acquisition; a re-stored order moves to its new customer.
+        """
+        async with self._lock:
+            rows = [
+                (order_id, customer_id, self._order_positions + position)
+                for position, (order_id, customer_id) in enumerate(orders)
+            ]
+            self._order_positions += len(rows)
+            self._connection.executemany(_UPSERT_ORDER, rows)
+            self._top_customers_cache.clear()
+
+    def _apply_barcodes(self, barcodes: Iterable[tuple[str, int | None]]) -> None:
+        """
+        Stage (barcode, order_id) pairs and move them into the barcodes table,
+        with the same semantics as `OrderStorage._apply_barcodes`.
+        """
+        connection = self._connection
+        connection.execute("DELETE FROM staging")
+        connection.executemany(
+            "INSERT INTO staging (barcode, order_id) VALUES (?, ?)", barcodes
+        )
+        for (barcode,) in connection.execute(_DUPLICATES):
+            self._log_duplicate(barcode)
+
+        last_seq = self._last_seq
+        connection.execute(_INSERT_BARCODES)
+        connection.execute(_INSERT_VOUCHERS, (last_seq,))
+        (unused,) = connection.execute(
+            "SELECT COUNT(*) FROM barcodes WHERE seq > ? AND order_id IS NULL",
+            (last_seq,),
+        ).fetchone()
+        self._unused += unused
+        (self._last_seq,) = connection.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM barcodes"
+        ).fetchone()
+
+    async def merge_barcodes(
+        self,
+        customer_to_barcodes: dict[tuple[int, int], list[str]],
+        used_barcodes: set[str],
+        unused_barcodes: set[str],
+        duplicate_barcodes: Sequence[str] = (),
+    ) -> None:
+        """
+        Merge the barcode state of a partial `OrderStorage`; duplicates are
+        detected by `_apply_barcodes`.
+        """
+        async with self._lock:
+            self.duplicate_barcodes.extend(duplicate_barcodes)
+            self._apply_barcodes(
+                (barcode, order_id)
+                for (order_id, _), barcodes in customer_to_barcodes.items()
+                for barcode in barcodes
+            )
+            self._apply_barcodes((barcode, None) for barcode in unused_barcodes)
+
+    def _customer_of(self, order_id: int) -> int | None:
+        """
+        Return the customer of a stored order, or None for an unknown order.
+        """
+        row = self._connection.execute(
+            "SELECT customer_id FROM orders WHERE order_id = ?", (order_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _unused_count(self) -> int:
+        """
+        Return the number of unused barcodes. Callers must hold the lock.
+        """
+        return self._unused
+
+    def _allocate(self, requests: Sequence[tuple[int, int]]) -> list[list[str]]:
+        """
+        Move the most recently stored unused barcodes to the orders of validated
+        requests through the partial unused index, in O(count) per request.
+        Allocated barcodes get new sequence numbers, so they follow the existing
+        barcodes of the voucher. Callers must hold the lock.
+        """
+        connection = self._connection
+        allocations = []
+        for order_id, count in requests:
+            customer_id = self._customer_of(order_id)
+            rows = connection.execute(
+                "SELECT seq, barcode FROM barcodes WHERE order_id IS NULL "
+                "ORDER BY seq DESC LIMIT ?",
+                (count,),
+            ).fetchall()[::-1]
+            connection.executemany(
+                "UPDATE barcodes SET seq = ?, order_id = ?, customer_id = ? "
+                "WHERE seq = ?",
+                (
+                    (self._last_seq + index, order_id, customer_id, seq)
+                    for index, (seq, _) in enumerate(rows, start=1)
+                ),
+            )
+            connection.execute(_INSERT_VOUCHERS, (self._last_seq,))
+            self._last_seq += len(rows)
+            self._unused -= len(rows)
+            allocations.append([barcode for _, barcode in rows])
+        return allocations
+
+    async def get_top_customers(self, n: int) -> list[tuple[int, int]]:
+        """
+        Retrieve the `n` customers with the most orders as (customer_id, count)
+        pairs, ties broken by earliest order. Cached until orders change.
+        """
+        async with self._lock:
+            if n not in self._top_customers_cache:
+                self._commit()
+                self._top_customers_cache[n] = self._connection.execute(
+                    _TOP_CUSTOMERS, (n,)
+                ).fetchall()
+            return list(self._top_customers_cache[n])
+
+    async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
+        """
+        Retrieve a mapping of (order_id, customer_id) to barcodes.
+        """
+        async with self._lock:
+            return {key: barcodes async for key, barcodes in self.iter_vouchers()}
+
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs streamed from a
+        cursor, one voucher at a time. Intended to be consumed once loading has
+        finished.
+        """
+        self._commit()
+        rows = self._connection.execute(_VOUCHERS.format(where=""))
+        for key, group in groupby(rows, key=lambda row: (row[0], row[1])):
+            yield key, [barcode for _, _, barcode in group]
+
+    async def get_customer_vouchers(self, customer_id: int) -> dict[int, list[str]]:
+        """
+        Retrieve the vouchers of one customer as a mapping of order_id to
+        barcodes, through the customer index of the vouchers table.
+        """
+        async with self._lock:
+            self._commit()
+            rows = self._connection.execute(
+                _VOUCHERS.format(where="WHERE vouchers.customer_id = ?"),
+                (customer_id,),
+            )
+            return {
+                order_id: [barcode for _, _, barcode in group]
+                for order_id, group in groupby(rows, key=lambda row: row[0])
+            }
+
+    async def get_customer_barcode_count(self, customer_id: int) -> int:
+        """
+        Count the barcodes of one customer's vouchers without reading them.
+        """
+        async with self._lock:
+            self._commit()
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM vouchers JOIN barcodes "
+                "ON barcodes.order_id = vouchers.order_id "
+                "AND barcodes.customer_id = vouchers.customer_id "
+                "WHERE vouchers.customer_id = ?",
+                (customer_id,),
+            ).fetchone()
+            return int(count)
+
+    async def get_unused_barcodes(self) -> set[str]:
+        """
+        Retrieve unused barcodes through the partial unused index.
+        """
+        async with self._lock:
+            self._commit()
+            return {
+                barcode
+                for (barcode,) in self._connection.execute(
+                    "SELECT barcode FROM barcodes WHERE order_id IS NULL"
+                )
+            }
+
+    async def get_unused_barcode_count(self) -> int:
+        """
+        Count unused barcodes through the partial unused index, without
+        loading them.
+        """
+        async with self._lock:
+            self._commit()
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM barcodes WHERE order_id IS NULL"
+            ).fetchone()
+            return int(count)
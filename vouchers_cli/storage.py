@@ -1,6 +1,128 @@
 import asyncio
+import heapq
 from collections import defaultdict
 from logging import Logger
+from typing import AsyncIterator, Iterable, Sequence
+
+# customer_id -> order_id -> barcodes of the voucher
+CustomerVouchers = dict[int, dict[int, list[str]]]
+
+
+async def index_by_customer(
+    vouchers: AsyncIterator[tuple[tuple[int, int], list[str]]],
+) -> CustomerVouchers:
+    """
+    Group ((order_id, customer_id), barcodes) vouchers by customer, sharing the
+    barcode lists.
+    """
+    index: CustomerVouchers = {}
+    async for (order_id, customer_id), barcodes in vouchers:
+        index.setdefault(customer_id, {})[order_id] = barcodes
+    return index
+
+
+def first_positions(customers: Iterable[int]) -> dict[int, int]:
+    """
+    Map every customer to the position of its first entry in `customers`.
+    """
+    positions: dict[int, int] = {}
+    for position, customer_id in enumerate(customers):
+        positions.setdefault(customer_id, position)
+    return positions
+
+
+class CustomerOrderIndex:
+    """
+    Incrementally maintained order counts per customer, bucketed by count, so
+    the top customers can be found without rescanning every order.
+
+    Ties are broken by the position of each customer's earliest current order,
+    matching `Counter.most_common` over the customers of the orders in storage
+    order. An order stored again under another customer keeps its position but
+    can change the rank of both customers, so the ranks are then marked stale
+    and must be rebuilt with `rerank` before `top` is called.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes an empty index.
+        """
+        self.counts: dict[int, int] = {}  # customer_id -> number of orders
+        self._buckets: dict[int, set[int]] = {}  # number of orders -> customer_ids
+        self._rank: dict[int, int] = {}  # customer_id -> position of earliest order
+        self.stale = False  # Whether an order moved since the ranks were built
+
+    def add(self, customer_id: int, position: int) -> None:
+        """
+        Record a new order for the customer, stored at `position`.
+        """
+        count = self.counts.get(customer_id, 0)
+        if not count:
+            self._rank[customer_id] = position
+        self._move(customer_id, count, count + 1)
+
+    def reassign(self, old_customer_id: int, new_customer_id: int) -> None:
+        """
+        Record an order moving from one customer to another.
+        """
+        count = self.counts[old_customer_id]
+        self._move(old_customer_id, count, count - 1)
+        count = self.counts.get(new_customer_id, 0)
+        self._move(new_customer_id, count, count + 1)
+        self.stale = True
+
+    def rerank(self, customers: Iterable[int]) -> None:
+        """
+        Rebuild the ranks from the customers of every order, in storage order.
+        """
+        self._rank = first_positions(customers)
+        self.stale = False
+
+    def restore(
+        self, ranks: Iterable[tuple[int, int]], counts: Iterable[tuple[int, int]]
+    ) -> None:
+        """
+        Fill an empty index in bulk from (customer_id, position of earliest
+        order) and (customer_id, count) pairs.
+        """
+        self._rank = dict(ranks)
+        self.counts = dict(counts)
+        for customer_id, count in self.counts.items():
+            self._buckets.setdefault(count, set()).add(customer_id)
+
+    def _move(self, customer_id: int, old_count: int, new_count: int) -> None:
+        """
+        Move a customer from one count bucket to another.
+        """
+        if old_count:
+            bucket = self._buckets[old_count]
+            bucket.discard(customer_id)
+            if not bucket:
+                del self._buckets[old_count]
+        if new_count:
+            self.counts[customer_id] = new_count
+            self._buckets.setdefault(new_count, set()).add(customer_id)
+        else:
+            del self.counts[customer_id]
+            self._rank.pop(customer_id, None)
+
+    def top(self, n: int) -> list[tuple[int, int]]:
+        """
+        Return the `n` customers with the most orders as (customer_id, count) pairs.
+
+        Only the distinct counts and the buckets that reach into the top `n` are
+        visited, so the cost does not depend on the number of orders.
+        """
+        result: list[tuple[int, int]] = []
+        for count in sorted(self._buckets, reverse=True):
+            remaining = n - len(result)
+            if remaining <= 0:
+                break
+            customers = heapq.nsmallest(
+                remaining, self._buckets[count], key=self._rank.__getitem__
+            )
+            result.extend((customer_id, count) for customer_id in customers)
+        return result
 
 
 class OrderStorage:
@@ -20,6 +142,17 @@ class OrderStorage:
         self.customer_to_barcodes: dict[tuple[int, int], list[str]] = defaultdict(list)
         self.unused_barcodes: set[str] = set()
         self.used_barcodes: set[str] = set()
+        # Reverse index sharing the lists of customer_to_barcodes, so vouchers of
+        # one customer are found without scanning every voucher
+        self.customer_vouchers: CustomerVouchers = {}
+
+        # Per-customer order counts, kept up to date as orders are stored
+        self.customer_orders = CustomerOrderIndex()
+        self._top_customers_cache: dict[int, list[tuple[int, int]]] = {}
+
+        # Duplicate barcodes dropped so far, in the order they were logged; counted
+        # in the run metrics and kept in snapshots
+        self.duplicate_barcodes: list[str] = []
 
         # Async lock for protecting access to shared data
         self._lock = asyncio.Lock()
@@ -28,35 +161,232 @@ class OrderStorage:
         """
         Store an order and associate it with a customer, with async-safe access.
         """
-        async with self._lock:
-            self.orders_to_customers[order_id] = customer_id
+        await self.store_orders_bulk([(order_id, customer_id)])
 
     async def store_barcode(self, barcode: str, order_id: str) -> None:
         """
         Store a barcode and associate it with an order and customer
         if applicable, with async-safe access.
         """
+        await self.store_barcodes_bulk([(barcode, order_id)])
+
+    async def store_orders_bulk(self, orders: Iterable[tuple[int, int]]) -> None:
+        """
+        Store a batch of (order_id, customer_id) pairs under a single lock
+        acquisition, keeping the per-customer order counts up to date.
+        """
+        async with self._lock:
+            orders_to_customers = self.orders_to_customers
+            customer_orders = self.customer_orders
+
+            for order_id, customer_id in orders:
+                previous_customer_id = orders_to_customers.get(order_id, None)
+                if previous_customer_id == customer_id:
+                    continue
+
+                # A re-stored order moves from its previous customer to the new one
+                if previous_customer_id is None:
+                    customer_orders.add(customer_id, len(orders_to_customers))
+                else:
+                    customer_orders.reassign(previous_customer_id, customer_id)
+                orders_to_customers[order_id] = customer_id
+
+            self._top_customers_cache.clear()
+
+    async def store_barcodes_bulk(self, barcodes: Iterable[Sequence[str]]) -> None:
+        """
+        Store a batch of (barcode, order_id) rows under a single lock acquisition.
+        Rows are applied in order, so duplicates inside the batch are detected
+        exactly as if they were stored one by one.
+        """
+        async with self._lock:
+            self._apply_barcodes(
+                (barcode, int(order_id) if order_id else None)
+                for barcode, order_id in barcodes
+            )
+
+    async def store_barcode_columns(
+        self, barcodes: Sequence[str], order_ids: Sequence[int | None]
+    ) -> None:
+        """
+        Store a batch of barcodes given as typed columns, where a `None` order id
+        marks an unused barcode, under a single lock acquisition.
+        """
         async with self._lock:
+            self._apply_barcodes(zip(barcodes, order_ids, strict=True))
+
+    @property
+    def duplicate_count(self) -> int:
+        """
+        Number of duplicate barcodes dropped so far.
+        """
+        return len(self.duplicate_barcodes)
+
+    def _log_duplicate(self, barcode: str) -> None:
+        """
+        Log a dropped duplicate barcode and record it.
+        """
+        self.duplicate_barcodes.append(barcode)
+        self._logger.error(f"Duplicate barcode: {barcode}")
+
+    def _apply_barcodes(self, barcodes: Iterable[tuple[str, int | None]]) -> None:
+        """
+        Apply (barcode, order_id) pairs in order without taking the lock. Callers
+        must hold the lock or own the storage exclusively.
+        """
+        # Bind hot attributes locally to keep the per-row loop cheap
+        used_barcodes = self.used_barcodes
+        unused_barcodes = self.unused_barcodes
+        orders_to_customers = self.orders_to_customers
+        customer_to_barcodes = self.customer_to_barcodes
+        customer_vouchers = self.customer_vouchers
+
+        for barcode, order_id in barcodes:
             # If the barcode has already been used, don't store it again
-            if barcode in self.used_barcodes or barcode in self.unused_barcodes:
-                self._logger.error(f"Duplicate barcode: {barcode}")
-                return
+            if barcode in used_barcodes or barcode in unused_barcodes:
+                self._log_duplicate(barcode)
+                continue
 
             # If no valid order_id is provided, mark the barcode as unused
-            if not order_id:
-                self.unused_barcodes.add(barcode)
-                return
-
-            # Parse order_id and attempt to associate the barcode with
-            # the corresponding customer
-            parsed_order_id = int(order_id)
-            if customer_id := self.orders_to_customers.get(parsed_order_id, None):
+            if order_id is None:
+                unused_barcodes.add(barcode)
+                continue
+
+            # Attempt to associate the barcode with the corresponding customer
+            if customer_id := orders_to_customers.get(order_id, None):
                 # Associate the barcode with the order and customer
-                self.customer_to_barcodes[(parsed_order_id, customer_id)].append(
-                    barcode
-                )
+                voucher = customer_to_barcodes.get((order_id, customer_id))
+                if voucher is None:
+                    voucher = customer_to_barcodes[(order_id, customer_id)] = []
+                    customer_vouchers.setdefault(customer_id, {})[order_id] = voucher
+                voucher.append(barcode)
                 # Mark the barcode as used
-                self.used_barcodes.add(barcode)
+                used_barcodes.add(barcode)
+
+    async def merge_barcodes(
+        self,
+        customer_to_barcodes: dict[tuple[int, int], list[str]],
+        used_barcodes: set[str],
+        unused_barcodes: set[str],
+        duplicate_barcodes: Sequence[str] = (),
+    ) -> None:
+        """
+        Merge a barcode state built elsewhere, such as one restored from a
+        snapshot, under a single lock acquisition.
+
+        Barcodes that are already stored are duplicates and are dropped from the
+        merged state. The state does not record where its rows were in the
+        barcodes file, so parallel loading replays the parsed rows instead.
+
+        :param duplicate_barcodes: Duplicates already dropped (and logged) while
+            the merged state was built, added to this storage's duplicates.
+        """
+        async with self._lock:
+            self.duplicate_barcodes.extend(duplicate_barcodes)
+            duplicates = (
+                (used_barcodes & self.used_barcodes)
+                | (used_barcodes & self.unused_barcodes)
+                | (unused_barcodes & self.used_barcodes)
+                | (unused_barcodes & self.unused_barcodes)
+            )
+            for barcode in duplicates:
+                self._log_duplicate(barcode)
+
+            self.used_barcodes |= used_barcodes - duplicates
+            self.unused_barcodes |= unused_barcodes - duplicates
+            for (order_id, customer_id), barcodes in customer_to_barcodes.items():
+                if duplicates:
+                    barcodes = [code for code in barcodes if code not in duplicates]
+                if barcodes:
+                    self._voucher(order_id, customer_id).extend(barcodes)
+
+    def _voucher(self, order_id: int, customer_id: int) -> list[str]:
+        """
+        Return the barcode list of a voucher, creating it (and registering it in
+        the customer index) if needed. Callers must hold the lock.
+        """
+        voucher = self.customer_to_barcodes.get((order_id, customer_id))
+        if voucher is None:
+            voucher = self.customer_to_barcodes[(order_id, customer_id)] = []
+            self.customer_vouchers.setdefault(customer_id, {})[order_id] = voucher
+        return voucher
+
+    async def allocate_barcodes(self, order_id: int, count: int) -> list[str]:
+        """
+        Reserve `count` unused barcodes for an order, with async-safe access.
+
+        :return: The reserved barcodes, now part of the order's voucher.
+        :raises ValueError: If the order is unknown or not enough unused
+            barcodes are left; nothing is reserved then.
+        """
+        return (await self.allocate_barcodes_bulk([(order_id, count)]))[0]
+
+    async def allocate_barcodes_bulk(
+        self, requests: Sequence[tuple[int, int]]
+    ) -> list[list[str]]:
+        """
+        Reserve unused barcodes for a batch of (order_id, count) requests under a
+        single lock acquisition. The batch is all-or-nothing: it is validated as
+        a whole before any barcode is moved.
+
+        :return: The reserved barcodes of every request, in request order.
+        :raises ValueError: If an order is unknown, a count is negative or the
+            batch needs more barcodes than are unused.
+        """
+        async with self._lock:
+            needed = 0
+            for order_id, count in requests:
+                if count < 0:
+                    raise ValueError(f"Cannot allocate {count} barcodes")
+                if not self._customer_of(order_id):
+                    raise ValueError(f"Unknown order: {order_id}")
+                needed += count
+
+            available = self._unused_count()
+            if needed > available:
+                raise ValueError(
+                    f"Cannot allocate {needed} barcodes: only {available} unused"
+                )
+            return self._allocate(requests)
+
+    def _customer_of(self, order_id: int) -> int | None:
+        """
+        Return the customer of a stored order, or None for an unknown order.
+        Callers must hold the lock.
+        """
+        return self.orders_to_customers.get(order_id, None)
+
+    def _unused_count(self) -> int:
+        """
+        Return the number of unused barcodes. Callers must hold the lock.
+        """
+        return len(self.unused_barcodes)
+
+    def _allocate(self, requests: Sequence[tuple[int, int]]) -> list[list[str]]:
+        """
+        Move unused barcodes to the vouchers of validated requests, popping each
+        barcode from the unused set in O(1). Callers must hold the lock.
+        """
+        pop = self.unused_barcodes.pop
+        allocations = []
+        for order_id, count in requests:
+            barcodes = [pop() for _ in range(count)]
+            self.used_barcodes.update(barcodes)
+            self._voucher(order_id, self.orders_to_customers[order_id]).extend(barcodes)
+            allocations.append(barcodes)
+        return allocations
+
+    async def get_top_customers(self, n: int) -> list[tuple[int, int]]:
+        """
+        Retrieve the `n` customers with the most orders as (customer_id, count)
+        pairs, with async-safe access. Results are cached until orders change.
+        """
+        async with self._lock:
+            if n not in self._top_customers_cache:
+                if self.customer_orders.stale:
+                    self.customer_orders.rerank(self.orders_to_customers.values())
+                self._top_customers_cache[n] = self.customer_orders.top(n)
+            return list(self._top_customers_cache[n])
 
     async def get_vouchers(self) -> dict[tuple[int, int], list[str]]:
         """
@@ -66,6 +396,50 @@ class OrderStorage:
         async with self._lock:
             return self.customer_to_barcodes
 
+    async def iter_vouchers(self) -> AsyncIterator[tuple[tuple[int, int], list[str]]]:
+        """
+        Lazily yield ((order_id, customer_id), barcodes) pairs without copying
+        the stored vouchers. Intended to be consumed once loading has finished.
+        """
+        for key, barcodes in self.customer_to_barcodes.items():
+            yield key, barcodes
+
+    async def _customer_index(self) -> CustomerVouchers:
+        """
+        Return the vouchers indexed by customer. Kept up to date during
+        ingestion; storages that group vouchers on read build it lazily.
+        """
+        return self.customer_vouchers
+
+    async def get_customer_vouchers(self, customer_id: int) -> dict[int, list[str]]:
+        """
+        Retrieve the vouchers of one customer as a mapping of order_id to
+        barcodes, with async-safe access, in time proportional to the result.
+        """
+        async with self._lock:
+            return dict((await self._customer_index()).get(customer_id, {}))
+
+    async def get_customer_barcode_count(self, customer_id: int) -> int:
+        """
+        Count the barcodes of one customer's vouchers, with async-safe access.
+        """
+        async with self._lock:
+            orders = (await self._customer_index()).get(customer_id, {})
+            return sum(map(len, orders.values()))
+
+    async def get_order_voucher(self, order_id: int) -> tuple[int, list[str]] | None:
+        """
+        Retrieve the voucher of one order through its customer's vouchers.
+
+        :return: The order's (customer_id, barcodes), or None without a voucher.
+        """
+        async with self._lock:
+            customer_id = self._customer_of(order_id)
+        if not customer_id:
+            return None
+        barcodes = (await self.get_customer_vouchers(customer_id)).get(order_id)
+        return None if barcodes is None else (customer_id, barcodes)
+
     async def get_unused_barcodes(self) -> set[str]:
         """
         Retrieve unused barcodes that are not associated with any orders,
@@ -73,3 +447,10 @@ class OrderStorage:
         """
         async with self._lock:
             return self.unused_barcodes
+
+    async def get_unused_barcode_count(self) -> int:
+        """
+        Count the unused barcodes without collecting them, with async-safe access.
+        """
+        async with self._lock:
+            return self._unused_count()
@@ -4,6 +4,20 @@ import sys
 from argparse import Namespace
 from pathlib import Path
 
+from vouchers_cli.options import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_BATCH_WORKERS,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_DATABASE_PATH,
+    DEFAULT_HOST,
+    DEFAULT_MEMORY_LIMIT,
+    DEFAULT_PORT,
+    DEFAULT_TOP_CUSTOMERS,
+    CSVReader,
+    OutputFormat,
+    StorageBackend,
+)
+
 
 def setup_logger(name: str, log_level: int = logging.INFO) -> logging.Logger:
     """
@@ -47,7 +61,10 @@ def parse_arguments(app_description: str) -> Namespace:
         "--orders-file",
         type=Path,
         default=Path("data/orders.csv"),
-        help="Path to orders.csv file (default: 'data/orders.csv')",
+        help=(
+            "Path to orders.csv file, optionally gzip, zstd or bz2 compressed "
+            "(default: 'data/orders.csv')"
+        ),
     )
 
     # Add argument for specifying the barcodes file
@@ -55,7 +72,10 @@ def parse_arguments(app_description: str) -> Namespace:
         "--barcodes-file",
         type=Path,
         default=Path("data/barcodes.csv"),
-        help="Path to barcodes.csv file (default: 'data/barcodes.csv')",
+        help=(
+            "Path to barcodes.csv file, optionally gzip, zstd or bz2 compressed "
+            "(default: 'data/barcodes.csv')"
+        ),
     )
 
     # Add argument for specifying the output directory
@@ -66,5 +86,215 @@ def parse_arguments(app_description: str) -> Namespace:
         help="Path to output directory (default: 'output')",
     )
 
+    # Add argument for selecting the format of the vouchers output file
+    parser.add_argument(
+        "--output-format",
+        type=OutputFormat,
+        choices=list(OutputFormat),
+        default=OutputFormat.TEXT,
+        help=(
+            "Format of the vouchers output file: 'text' writes plain lines, "
+            "'gzip' and 'zstd' compress them and 'parquet' writes one row per "
+            "voucher with a list of barcodes (default: 'text')"
+        ),
+    )
+
+    # Add argument for splitting the vouchers output into partition files
+    parser.add_argument(
+        "--output-partitions",
+        type=int,
+        default=1,
+        help=(
+            "Number of text files the vouchers are hash-partitioned into by "
+            "customer (Fibonacci hash of the customer id), written in parallel "
+            "next to a manifest with their counts and checksums (default: 1, "
+            "one file)"
+        ),
+    )
+
+    # Add argument for specifying how many rows are streamed at a time
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=(
+            "Number of CSV rows loaded into memory at a time "
+            f"(default: {DEFAULT_BATCH_SIZE})"
+        ),
+    )
+
+    # Add argument for selecting the storage backend
+    parser.add_argument(
+        "--storage",
+        type=StorageBackend,
+        choices=list(StorageBackend),
+        default=StorageBackend.MEMORY,
+        help=(
+            "Storage backend: 'memory' keeps barcodes as strings, 'compact' "
+            "encodes numeric barcodes as 64-bit ints, 'numpy' joins barcodes "
+            "to orders with vectorized NumPy operations, 'sqlite' keeps the "
+            "data in a local SQLite file and 'external' sorts it in runs on "
+            "disk, for inputs larger than memory (default: 'memory')"
+        ),
+    )
+
+    # Add argument for specifying the database file of the sqlite storage
+    parser.add_argument(
+        "--sqlite-path",
+        type=Path,
+        default=DEFAULT_DATABASE_PATH,
+        help=(
+            "Database file of the 'sqlite' storage, replaced on every run "
+            f"(default: '{DEFAULT_DATABASE_PATH}')"
+        ),
+    )
+
+    # Add argument for capping the memory of the external storage
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=DEFAULT_MEMORY_LIMIT >> 20,
+        help=(
+            "Megabytes of rows the 'external' storage buffers before spilling "
+            f"sorted runs to disk (default: {DEFAULT_MEMORY_LIMIT >> 20})"
+        ),
+    )
+
+    # Add argument for overlapping file reads with parsing and storing
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=0,
+        help=(
+            "Chunks and batches read ahead of the parser and the storage by "
+            "reader tasks, so slow reads overlap parsing and storing; 0 "
+            "disables pipelining (default: 0)"
+        ),
+    )
+
+    # Add argument for selecting the CSV reader
+    parser.add_argument(
+        "--csv-reader",
+        type=CSVReader,
+        choices=list(CSVReader),
+        default=CSVReader.STREAM,
+        help=(
+            "CSV reader: 'stream' parses chunks with csv.reader, 'mmap' scans "
+            "the memory-mapped file as bytes (default: 'stream')"
+        ),
+    )
+
+    # Add argument for specifying how many top customers are reported
+    parser.add_argument(
+        "--top-customers",
+        type=int,
+        default=DEFAULT_TOP_CUSTOMERS,
+        help=f"Number of top customers to report (default: {DEFAULT_TOP_CUSTOMERS})",
+    )
+
+    # Add argument for parsing the input files in parallel processes
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Number of processes parsing the input files; more than 1 splits "
+            "the files into shards (default: 1)"
+        ),
+    )
+
+    # Add argument for validating every voucher before it is written
+    parser.add_argument(
+        "--validate-output",
+        action="store_true",  # Defaults to False if not provided
+        help="Validate every voucher with pydantic before writing it (slower)",
+    )
+
+    # Add argument for specifying where snapshots of loaded inputs are cached
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=DEFAULT_CACHE_DIR,
+        help=(
+            "Directory for snapshots of loaded input files, reused while the "
+            f"inputs are unchanged (default: '{DEFAULT_CACHE_DIR}')"
+        ),
+    )
+
+    # Add argument for forcing the snapshot to be rebuilt
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",  # Defaults to False if not provided
+        help="Ignore any cached snapshot and rebuild it from the input files",
+    )
+
+    # Add argument for loading only the lines appended since the previous run
+    parser.add_argument(
+        "--delta-state",
+        type=Path,
+        default=None,
+        help=(
+            "State file for delta mode: only lines appended to the input files "
+            "since the previous run are loaded, and only new vouchers written"
+        ),
+    )
+
+    # Add arguments for dumping the run metrics at exit
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        default=None,
+        help=(
+            "File the stage timers, counters and peak RSS of the run are "
+            "written to as JSON at exit"
+        ),
+    )
+    parser.add_argument(
+        "--metrics-prometheus",
+        type=Path,
+        default=None,
+        help="File the run metrics are written to in the Prometheus text format",
+    )
+
+    # Add arguments for processing many file pairs in one invocation
+    parser.add_argument(
+        "--batch",
+        type=Path,
+        default=None,
+        help=(
+            "CSV manifest with 'orders_file', 'barcodes_file' and 'output_dir' "
+            "columns; every row runs as a separate job with the other options, "
+            "and --metrics-json receives the batch summary"
+        ),
+    )
+    parser.add_argument(
+        "--batch-workers",
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help=(
+            "Number of processes running batch jobs at the same time "
+            f"(default: {DEFAULT_BATCH_WORKERS}, the number of CPUs)"
+        ),
+    )
+
+    # Add arguments for answering queries over HTTP instead of writing output
+    parser.add_argument(
+        "--serve",
+        action="store_true",  # Defaults to False if not provided
+        help="Load the data once and serve queries over an HTTP JSON API",
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default=DEFAULT_HOST,
+        help=f"Interface the server listens on (default: '{DEFAULT_HOST}')",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port the server listens on (default: {DEFAULT_PORT})",
+    )
+
     # Parse the command line arguments
     return parser.parse_args()